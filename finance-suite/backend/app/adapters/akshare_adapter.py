@@ -1,46 +1,274 @@
 import asyncio
 import logging
-from typing import Optional, Dict, Any, List
-from datetime import datetime, timedelta
+import time
+from typing import Optional, Dict, Any, List, Callable, Awaitable, Tuple
+from datetime import date, datetime, timedelta
 import pandas as pd
 import akshare as ak
 
+from app.core.cache import TTLCache, cached, copy_value, make_key, response_cache
+from app.core.config import settings
+from app.core.executor import BlockingExecutor, blocking_executor
+from app.core.singleflight import SingleFlight, upstream_flight
+from app.adapters.valuation_store import ValuationStore, valuation_store
+from app.adapters.history_store import EARLIEST_DATE, HistoryStore, history_store
+
 logger = logging.getLogger(__name__)
 
+# 上游列名 -> 本地存储列名
+INDEX_DAILY_COLUMNS = {
+    "日期": "date",
+    "开盘": "open",
+    "收盘": "close",
+    "最高": "high",
+    "最低": "low",
+    "成交量": "volume",
+    "成交额": "amount",
+}
+FUND_NAV_COLUMNS = {
+    "净值日期": "date",
+    "单位净值": "unit_net_value",
+    "累计净值": "accumulated_net_value",
+    "日增长率": "daily_growth_rate",
+}
+
+# 本地没有序列时，刷新最新行情只下载最近这些天
+SERIES_TAIL_WINDOW_DAYS = 30
+
+
+def _sync_time(synced_at: Optional[float], bar_date: Optional[str]) -> str:
+    """最新数据的更新时间：最近一次成功同步的时间，没有同步记录时使用最后一根K线的日期"""
+    if synced_at is not None:
+        return datetime.fromtimestamp(synced_at).isoformat()
+    return bar_date or ""
+
+
+def _to_float(value: Any, default: float = 0.0) -> float:
+    """转换为float，缺失值返回默认值"""
+    return float(value) if value is not None and pd.notna(value) else default
+
+
+# 指数目录数据源（按优先级）: (AKShare函数, 列名映射)
+INDEX_CATALOG_SOURCES = [
+    (ak.index_csindex_all, {
+        "指数代码": "code", "指数简称": "name", "基日": "base_date",
+        "基点": "base_point", "样本数量": "constituent_count", "发布时间": "publish_date",
+    }),
+    (ak.index_all_cni, {"指数代码": "code", "指数简称": "name", "样本数": "constituent_count"}),
+    (ak.index_stock_info, {"index_code": "code", "display_name": "name", "publish_date": "publish_date"}),
+]
+INDEX_CATALOG_COLUMNS = ["code", "name", "base_date", "base_point", "constituent_count", "publish_date"]
+
+# 乐咕乐股估值接口支持的指数: 指数代码 -> 接口symbol
+LEGULEGU_INDEX_SYMBOLS = {
+    "000016": "上证50",
+    "000300": "沪深300",
+    "000009": "上证380",
+    "399673": "创业板50",
+    "000905": "中证500",
+    "000010": "上证180",
+    "399324": "深证红利",
+    "399330": "深证100",
+    "000852": "中证1000",
+    "000015": "上证红利",
+    "000903": "中证100",
+    "000906": "中证800",
+}
+
+# 估值数据源: 名称 -> (AKShare函数, 列名映射)
+VALUATION_SOURCES = {
+    "legulegu_pe": (ak.stock_index_pe_lg, {"滚动市盈率": "pe_ratio"}),
+    "legulegu_pb": (ak.stock_index_pb_lg, {"市净率": "pb_ratio"}),
+    "csindex": (ak.stock_zh_index_value_csindex, {"市盈率1": "pe_ratio", "股息率1": "dividend_yield"}),
+}
+
+# 各估值指标的数据源优先级
+VALUATION_FIELD_SOURCES = {
+    "pe_ratio": ["legulegu_pe", "csindex"],
+    "pb_ratio": ["legulegu_pb"],
+    "dividend_yield": ["csindex"],
+}
+
 
 class AKShareAdapter:
     """AKShare数据源适配器 - 统一数据获取接口"""
     
-    def __init__(self):
-        self.timeout = 30
+    def __init__(self, cache: Optional[TTLCache] = None, flight: Optional[SingleFlight] = None,
+                 valuation: Optional[ValuationStore] = None, history: Optional[HistoryStore] = None,
+                 executor: Optional[BlockingExecutor] = None):
+        self.timeout = settings.AKSHARE_TIMEOUT
         self.max_retries = 3
+        self.cache = cache if cache is not None else response_cache
+        self.flight = flight if flight is not None else upstream_flight
+        self.valuation = valuation if valuation is not None else valuation_store
+        self.history = history if history is not None else history_store
+        self.executor = executor if executor is not None else blocking_executor
+    
+    async def _call(self, family: str, func: Callable, *args, **kwargs) -> Any:
+        """在专用线程池中执行阻塞的AKShare调用，并发的相同调用合并为一次
+
+        family 为接口族（quotes/history/valuation/metadata），同一接口族共享并发上限。
+        """
+        key = make_key(f"{func.__module__}.{func.__name__}", args, kwargs)
+        result = await self.flight.do(key, lambda: self.executor.run(family, func, *args, **kwargs))
+        # 多个调用方共享同一结果，各自拿到副本
+        return copy_value(result)
+    
+    async def _run_store(self, func: Callable, *args) -> Any:
+        """在专用线程池中执行本地存储的阻塞操作"""
+        return await self.executor.run("store", func, *args)
+    
+    async def _fetch_series(self, kind: str, code: str, start_date: str, end_date: str,
+                            family: str) -> pd.DataFrame:
+        """从上游下载序列并标准化为本地存储的列名"""
+        if kind == "index_daily":
+            df = await self._call(
+                family,
+                ak.index_zh_a_hist,
+                symbol=code,
+                period="daily",
+                start_date=start_date.replace("-", ""),
+                end_date=end_date.replace("-", "")
+            )
+            columns = INDEX_DAILY_COLUMNS
+        else:
+            # 净值接口不支持按日期区间查询，只能下载完整序列
+            df = await self._call(family, ak.fund_open_fund_info_em, code, "单位净值走势")
+            columns = FUND_NAV_COLUMNS
+        
+        if df is None or df.empty:
+            return pd.DataFrame()
+        
+        df = df.rename(columns=columns)
+        df["date"] = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")
+        return df
+    
+    async def _sync_series(self, kind: str, code: str, start_date: str, end_date: str,
+                           max_age: float) -> None:
+        """从上游补齐本地序列在 [start_date, end_date] 内缺失的部分
+
+        已同步过的区间不再下载；区间包含今天时，超过max_age秒重新拉取最新一段，
+        以更新盘中的最后一根K线。上游失败时保留本地已有数据。
+        """
+        today = date.today().isoformat()
+        end_date = min(end_date, today)
+        coverage = await self._run_store(self.history.coverage, kind, code)
+        
+        ranges = []
+        if coverage is None:
+            ranges.append((start_date, end_date))
+        else:
+            if start_date < coverage.covered_from:
+                ranges.append((start_date, coverage.covered_from))
+            if end_date > coverage.covered_to or (end_date == today and coverage.age > max_age):
+                # 从本地最后一根K线开始（含），覆盖可能未收盘的数据
+                ranges.append((coverage.last_date or coverage.covered_to, end_date))
+        
+        await self._fetch_ranges(kind, code, ranges, "history")
+    
+    async def _sync_tail(self, kind: str, code: str, max_age: float) -> Tuple[bool, Optional[float]]:
+        """只刷新本地序列最后一根K线之后的数据，用于最新行情/净值
+
+        本地没有该序列时只下载最近 SERIES_TAIL_WINDOW_DAYS 天，
+        更早的历史在请求历史数据时再按需补齐。
+        返回 (本地数据是否为最新, 最近一次成功同步的时间戳)；上游失败时前者为False。
+        """
+        today = date.today().isoformat()
+        coverage = await self._run_store(self.history.coverage, kind, code)
+        
+        if coverage is None:
+            window_start = (date.today() - timedelta(days=SERIES_TAIL_WINDOW_DAYS)).isoformat()
+            ranges = [(window_start, today)]
+        elif kind == "fund_nav" and coverage.last_date == today:
+            # 当日净值已公布，不会再变化
+            return True, coverage.synced_at
+        elif coverage.covered_to < today or coverage.age > max_age:
+            ranges = [(coverage.last_date or coverage.covered_to, today)]
+        else:
+            return True, coverage.synced_at
+        
+        if await self._fetch_ranges(kind, code, ranges, "quotes"):
+            return True, time.time()
+        return False, coverage.synced_at if coverage is not None else None
+    
+    async def _fetch_ranges(self, kind: str, code: str, ranges: List[Tuple[str, str]],
+                            family: str) -> bool:
+        """下载日期区间并写入本地存储，返回是否全部成功"""
+        if kind == "fund_nav" and ranges:
+            # 基金净值只能整段下载，一次即可覆盖全部区间
+            ranges = [(EARLIEST_DATE, date.today().isoformat())]
+        
+        succeeded = True
+        for range_start, range_end in ranges:
+            try:
+                df = await self._fetch_series(kind, code, range_start, range_end, family)
+                rows = await self._run_store(self.history.write, kind, code, df, range_start, range_end)
+                logger.info(f"同步本地序列 {kind} {code}: {range_start} ~ {range_end}, {rows} 条")
+            except Exception as e:
+                succeeded = False
+                logger.warning(f"同步本地序列失败 {kind} {code}: {str(e)}")
+        return succeeded
+    
+    async def refresh(self, method_name: str, *args) -> Any:
+        """绕过缓存重新获取某个缓存方法的结果，并写回缓存"""
+        method = getattr(type(self), method_name)
+        return await method.refresh(self, *args)
+    
+    async def refresh_valuation(self, index_code: str) -> None:
+        """重新下载指数的全部估值表"""
+        for source in VALUATION_SOURCES:
+            await self.valuation.get(source, index_code, self._load_valuation_table, force=True)
+    
+    async def _with_timeout(self, coro: Awaitable[Any], label: str, code: str) -> Any:
+        """带超时执行单个子请求，超时或失败时返回None，不影响其他字段"""
+        try:
+            return await asyncio.wait_for(coro, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{label}超时 {code}: 超过{self.timeout}秒")
+            return None
+        except Exception as e:
+            logger.warning(f"{label}失败 {code}: {str(e)}")
+            return None
     
     async def get_index_info(self, index_code: str) -> Optional[Dict[str, Any]]:
         """获取指数信息"""
         try:
-            # 获取实时行情
-            realtime_data = await self.get_index_realtime(index_code)
+            # 并发获取实时行情和估值数据，总耗时取决于最慢的子请求
+            # 静态元数据（基日、基点、成分股数量）由指数目录提供，不在此处下载
+            (
+                realtime_data,
+                pe_ratio,
+                pb_ratio,
+                dividend_yield,
+                valuation_percentile,
+            ) = await asyncio.gather(
+                self._with_timeout(self.get_index_realtime(index_code), "获取实时行情", index_code),
+                self._with_timeout(self._get_index_pe(index_code), "获取指数PE", index_code),
+                self._with_timeout(self._get_index_pb(index_code), "获取指数PB", index_code),
+                self._with_timeout(self._get_index_dividend_yield(index_code), "获取指数股息率", index_code),
+                self._with_timeout(self._get_valuation_percentile(index_code), "计算估值分位数", index_code),
+            )
+            
+            # 实时行情是必需的，估值数据缺失时对应字段为None
             if not realtime_data:
                 return None
             
-            # 获取基本信息
-            basic_info = await self.get_index_basic_info(index_code)
-            
             # 合并数据
             result = {
                 "code": index_code,
-                "name": self._get_index_name(index_code),
                 "current_value": realtime_data.get("current"),
                 "change_value": realtime_data.get("change"),
                 "change_percent": realtime_data.get("pct_chg"),
                 "volume": realtime_data.get("volume"),
                 "turnover": realtime_data.get("amount"),
                 "amplitude": self._calculate_amplitude(realtime_data),
-                # 获取估值数据
-                "pe_ratio": await self._get_index_pe(index_code),
-                "pb_ratio": await self._get_index_pb(index_code),
-                "dividend_yield": await self._get_index_dividend_yield(index_code),
-                "valuation_percentile": await self._get_valuation_percentile(index_code),
+                "pe_ratio": pe_ratio,
+                "pb_ratio": pb_ratio,
+                "dividend_yield": dividend_yield,
+                "valuation_percentile": valuation_percentile,
+                # 行情的获取时间；行情或估值任一为过期数据时标记stale（后台正在刷新）
+                "last_update": realtime_data.get("last_update"),
+                "stale": bool(realtime_data.get("stale")) or self.valuation.is_stale(index_code),
             }
             
             logger.info(f"获取指数信息成功: {index_code} - 当前值: {result['current_value']}, 涨跌: {result['change_value']}")
@@ -50,21 +278,6 @@ class AKShareAdapter:
             logger.error(f"获取指数信息失败 {index_code}: {str(e)}")
             return None
     
-    def _get_index_name(self, index_code: str) -> str:
-        """根据指数代码获取名称"""
-        name_map = {
-            "000001": "上证指数",
-            "000300": "沪深300",
-            "000905": "中证500",
-            "399001": "深证成指",
-            "399006": "创业板指",
-            "000016": "上证50",
-            "000852": "中证1000",
-            "399005": "中小板指",
-            "000906": "中证800",
-        }
-        return name_map.get(index_code, f"指数 {index_code}")
-    
     def _calculate_amplitude(self, realtime_data: Dict[str, Any]) -> Optional[float]:
         """计算振幅"""
         try:
@@ -76,52 +289,44 @@ class AKShareAdapter:
         except Exception:
             return None
 
-    async def get_index_basic_info(self, index_code: str) -> Optional[Dict[str, Any]]:
-        """获取指数基本信息"""
-        try:
-            # 运行在线程池中以避免阻塞
-            loop = asyncio.get_event_loop()
-            
-            # 使用关键字参数调用
-            df = await loop.run_in_executor(
-                None, 
-                lambda: ak.index_zh_a_hist(
-                    symbol=index_code,
-                    period="daily",
-                    start_date="19901219",
-                    end_date="20231231"
-                )
-            )
-            
-            if df is None or df.empty:
-                return None
-            
-            latest = df.iloc[-1]
-            return {
-                "base_date": "1990-12-19",
-                "base_point": 100.0,
-                "pe_ratio": None,
-                "pb_ratio": None,
-                "current_point": latest.get("收盘"),
-                "last_update": datetime.now().isoformat()
-            }
-        except Exception as e:
-            logger.error(f"获取指数基本信息失败 {index_code}: {str(e)}")
+    async def get_index_catalog(self) -> Optional[pd.DataFrame]:
+        """获取指数目录（代码、名称、基日、基点、成分股数量）
+
+        合并多个上游列表，同一指数按数据源优先级取第一个非空值；单个数据源失败不影响其他数据源。
+        """
+        frames = []
+        for func, columns in INDEX_CATALOG_SOURCES:
+            try:
+                df = await self._call("metadata", func)
+                if df is None or df.empty:
+                    continue
+                
+                df = df.rename(columns=columns)
+                df = df[[col for col in INDEX_CATALOG_COLUMNS if col in df.columns]].copy()
+                df["code"] = df["code"].astype(str).str.split(".").str[0].str.zfill(6)
+                frames.append(df.drop_duplicates("code").set_index("code"))
+            except Exception as e:
+                logger.warning(f"获取指数目录失败 {func.__name__}: {str(e)}")
+        
+        if not frames:
             return None
+        
+        catalog = frames[0]
+        for frame in frames[1:]:
+            catalog = catalog.combine_first(frame)
+        
+        for col in ("base_date", "publish_date"):
+            if col in catalog.columns:
+                catalog[col] = pd.to_datetime(catalog[col], errors="coerce").dt.strftime("%Y-%m-%d")
+        return catalog.reset_index()
     
+    @cached(ttl=settings.CACHE_TTL_REALTIME)
     async def get_index_realtime(self, index_code: str) -> Optional[Dict[str, Any]]:
         """获取指数实时行情"""
         try:
-            loop = asyncio.get_event_loop()
-            
-            # 获取实时行情数据 - 使用默认参数获取最新数据
-            df = await loop.run_in_executor(
-                None, 
-                lambda: ak.index_zh_a_hist(
-                    symbol=index_code,
-                    period="daily"
-                )
-            )
+            # 只向上游请求本地最后一根K线之后的数据，再从本地读取最近两根K线
+            synced, synced_at = await self._sync_tail("index_daily", index_code, settings.CACHE_TTL_REALTIME)
+            df = await self._run_store(self.history.read_tail, "index_daily", index_code, 2)
             
             if df is None or df.empty:
                 return None
@@ -129,8 +334,8 @@ class AKShareAdapter:
             latest = df.iloc[-1]
             prev = df.iloc[-2] if len(df) > 1 else latest
             
-            current = float(latest["收盘"])
-            prev_close = float(prev["收盘"])
+            current = float(latest["close"])
+            prev_close = float(prev["close"])
             change = current - prev_close
             pct_chg = (change / prev_close) * 100 if prev_close > 0 else 0
             
@@ -138,81 +343,73 @@ class AKShareAdapter:
                 "current": current,
                 "change": change,
                 "pct_chg": pct_chg,
-                "high": float(latest["最高"]),
-                "low": float(latest["最低"]),
-                "open": float(latest["开盘"]),
-                "volume": float(latest.get("成交量", 0)),
-                "amount": float(latest.get("成交额", 0)),
-                "last_update": datetime.now().isoformat()
+                "high": float(latest["high"]),
+                "low": float(latest["low"]),
+                "open": float(latest["open"]),
+                "volume": _to_float(latest.get("volume")),
+                "amount": _to_float(latest.get("amount")),
+                "date": latest.get("date", ""),
+                # 最近一次成功同步的时间；上游刷新失败时返回的是本地旧数据，标记为stale
+                "last_update": _sync_time(synced_at, latest.get("date")),
+                "stale": not synced
             }
         except Exception as e:
             logger.error(f"获取实时行情失败 {index_code}: {str(e)}")
             return None
     
+    @cached(ttl=settings.CACHE_TTL_HISTORY)
     async def get_index_history(self, index_code: str, start_date: str, end_date: str) -> Optional[pd.DataFrame]:
         """获取指数历史数据"""
         try:
-            loop = asyncio.get_event_loop()
-            
-            # 格式化日期
-            start_formatted = start_date.replace("-", "")
-            end_formatted = end_date.replace("-", "")
-            
-            df = await loop.run_in_executor(
-                None,
-                lambda: ak.index_zh_a_hist(
-                    symbol=index_code,
-                    period="daily",
-                    start_date=start_formatted,
-                    end_date=end_formatted
-                )
-            )
+            # 先补齐本地缺失的日期区间，再从本地读取
+            await self._sync_series("index_daily", index_code, start_date, end_date, settings.CACHE_TTL_HISTORY)
+            df = await self._run_store(self.history.read, "index_daily", index_code, start_date, end_date)
             
             if df is None or df.empty:
                 return None
             
-            # 标准化列名
-            df = df.rename(columns={
-                "日期": "date",
-                "开盘": "open", 
-                "收盘": "close",
-                "最高": "high",
-                "最低": "low",
-                "成交量": "volume",
-                "成交额": "amount"
-            })
-            
-            # 确保日期格式
-            df["date"] = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")
-            
-            return df.sort_values("date").reset_index(drop=True)
+            return df
         except Exception as e:
             logger.error(f"获取历史数据失败 {index_code}: {str(e)}")
             return None
     
+    @cached(ttl=settings.CACHE_TTL_FUND_LIST)
     async def get_fund_list(self) -> Optional[pd.DataFrame]:
-        """获取基金列表"""
+        """获取全部基金列表（基金代码/拼音缩写/基金简称/基金类型/拼音全称）"""
         try:
-            loop = asyncio.get_event_loop()
-            
-            # 获取基金基本信息
-            df = await loop.run_in_executor(None, ak.fund_name_em)
+            df = await self._call("metadata", ak.fund_name_em)
             
             if df is None or df.empty:
                 return None
             
-            return df.head(1000)  # 限制返回数量
+            # 基金目录依赖完整列表解析名称，不截断
+            return df
         except Exception as e:
             logger.error(f"获取基金列表失败: {str(e)}")
             return None
     
+    @cached(ttl=settings.CACHE_TTL_FUND_LIST)
+    async def get_fund_companies(self) -> Optional[pd.DataFrame]:
+        """获取基金代码 -> 基金公司映射（来自基金经理列表的现任基金）"""
+        try:
+            df = await self._call("metadata", ak.fund_manager_em)
+            
+            if df is None or df.empty:
+                return None
+            
+            df = df.rename(columns={"现任基金代码": "基金代码", "所属公司": "基金公司"})
+            df = df.dropna(subset=["基金代码", "基金公司"])
+            return df[["基金代码", "基金公司"]].drop_duplicates(subset="基金代码").reset_index(drop=True)
+        except Exception as e:
+            logger.error(f"获取基金公司失败: {str(e)}")
+            return None
+    
+    @cached(ttl=settings.CACHE_TTL_FUND_INFO)
     async def get_fund_basic_info(self, fund_code: str) -> Optional[Dict[str, Any]]:
         """获取基金基本信息"""
         try:
-            loop = asyncio.get_event_loop()
-            
             # 获取基金基本信息
-            df = await loop.run_in_executor(None, ak.fund_individual_basic_info_xq, fund_code)
+            df = await self._call("metadata", ak.fund_individual_basic_info_xq, fund_code)
             
             if df is None or df.empty:
                 return None
@@ -236,94 +433,100 @@ class AKShareAdapter:
             logger.error(f"获取基金基本信息失败 {fund_code}: {str(e)}")
             return None
     
+    @cached(ttl=settings.CACHE_TTL_REALTIME)
     async def get_fund_nav(self, fund_code: str) -> Optional[Dict[str, Any]]:
         """获取基金净值信息"""
         try:
-            loop = asyncio.get_event_loop()
-            
-            # 获取基金净值
-            df = await loop.run_in_executor(None, ak.fund_open_fund_info_em, fund_code, "单位净值走势")
+            # 获取最新净值：仅在本地净值过期时刷新，再读取最后一条
+            synced, _ = await self._sync_tail("fund_nav", fund_code, settings.CACHE_TTL_REALTIME)
+            df = await self._run_store(self.history.read_tail, "fund_nav", fund_code, 1)
             
             if df is None or df.empty:
                 return None
             
             latest = df.iloc[-1]
             return {
-                "单位净值": float(latest.get("单位净值", 0)),
-                "累计净值": float(latest.get("累计净值", 0)),
-                "净值日期": latest.get("净值日期", ""),
-                "日增长率": float(latest.get("日增长率", 0))
+                "单位净值": _to_float(latest.get("unit_net_value")),
+                "累计净值": _to_float(latest.get("accumulated_net_value")),
+                "净值日期": latest.get("date", ""),
+                "日增长率": _to_float(latest.get("daily_growth_rate")),
+                "stale": not synced
             }
         except Exception as e:
             logger.error(f"获取基金净值失败 {fund_code}: {str(e)}")
             return None
     
+    @cached(ttl=settings.CACHE_TTL_HISTORY)
     async def get_fund_history(self, fund_code: str, start_date: str, end_date: str) -> Optional[pd.DataFrame]:
         """获取基金历史净值"""
         try:
-            loop = asyncio.get_event_loop()
-            
-            # 获取基金历史净值
-            df = await loop.run_in_executor(None, ak.fund_open_fund_info_em, fund_code, "单位净值走势")
+            # 先补齐本地净值序列，再从本地读取日期区间
+            await self._sync_series("fund_nav", fund_code, start_date, end_date, settings.CACHE_TTL_HISTORY)
+            df = await self._run_store(self.history.read, "fund_nav", fund_code, start_date, end_date)
             
             if df is None or df.empty:
                 return None
             
-            # 过滤日期范围
-            df["净值日期"] = pd.to_datetime(df["净值日期"])
-            start_dt = pd.to_datetime(start_date)
-            end_dt = pd.to_datetime(end_date)
-            
-            df = df[(df["净值日期"] >= start_dt) & (df["净值日期"] <= end_dt)]
-            df["净值日期"] = df["净值日期"].dt.strftime("%Y-%m-%d")
-            
-            return df.sort_values("净值日期").reset_index(drop=True)
+            return df.rename(columns={v: k for k, v in FUND_NAV_COLUMNS.items()})
         except Exception as e:
             logger.error(f"获取基金历史数据失败 {fund_code}: {str(e)}")
             return None
     
+    @cached(ttl=settings.CACHE_TTL_REALTIME)
     async def get_fund_realtime(self, fund_code: str) -> Optional[Dict[str, Any]]:
         """获取基金实时净值"""
         try:
-            loop = asyncio.get_event_loop()
-            
-            # 获取实时净值
-            df = await loop.run_in_executor(None, ak.fund_open_fund_info_em, fund_code, "单位净值走势")
+            # 获取最新净值：仅在本地净值过期时刷新，再读取最后一条
+            synced, synced_at = await self._sync_tail("fund_nav", fund_code, settings.CACHE_TTL_REALTIME)
+            df = await self._run_store(self.history.read_tail, "fund_nav", fund_code, 1)
             
             if df is None or df.empty:
                 return None
             
             latest = df.iloc[-1]
             return {
-                "单位净值": float(latest.get("单位净值", 0)),
-                "累计净值": float(latest.get("累计净值", 0)),
-                "净值日期": latest.get("净值日期", ""),
-                "日增长率": float(latest.get("日增长率", 0)),
-                "last_update": datetime.now().isoformat()
+                "单位净值": _to_float(latest.get("unit_net_value")),
+                "累计净值": _to_float(latest.get("accumulated_net_value")),
+                "净值日期": latest.get("date", ""),
+                "日增长率": _to_float(latest.get("daily_growth_rate")),
+                "last_update": _sync_time(synced_at, latest.get("date")),
+                "stale": not synced
             }
         except Exception as e:
             logger.error(f"获取基金实时数据失败 {fund_code}: {str(e)}")
             return None
     
+    async def _load_valuation_table(self, source: str, index_code: str) -> Optional[pd.DataFrame]:
+        """下载单个指数的估值表，并标准化列名"""
+        func, columns = VALUATION_SOURCES[source]
+        if source == "csindex":
+            symbol = index_code
+        else:
+            symbol = LEGULEGU_INDEX_SYMBOLS.get(index_code)
+            if symbol is None:
+                # 乐咕乐股不提供该指数的估值数据
+                return None
+        
+        df = await self._call("valuation", func, symbol=symbol)
+        if df is None or df.empty:
+            return None
+        
+        df = df.rename(columns={"日期": "date", **columns})
+        return df[["date", *columns.values()]]
+    
+    async def _get_valuation_value(self, field: str, index_code: str) -> Optional[float]:
+        """按数据源优先级查找估值指标的最新值"""
+        for source in VALUATION_FIELD_SOURCES[field]:
+            table = await self.valuation.get(source, index_code, self._load_valuation_table)
+            value = table.get(field)
+            if value and value > 0:
+                return float(value)
+        return None
+    
     async def _get_index_pe(self, index_code: str) -> Optional[float]:
         """获取指数PE数据"""
         try:
-            loop = asyncio.get_event_loop()
-            
-            # 获取指数PE数据
-            df = await loop.run_in_executor(None, ak.stock_index_pe_lg)
-            
-            if df is None or df.empty:
-                return None
-            
-            # 获取最新的PE数据
-            latest = df.iloc[-1]
-            pe_ratio = latest.get("滚动市盈率")
-            
-            if pe_ratio and pe_ratio > 0:
-                return float(pe_ratio)
-            
-            return None
+            return await self._get_valuation_value("pe_ratio", index_code)
         except Exception as e:
             logger.warning(f"获取指数PE失败 {index_code}: {str(e)}")
             return None
@@ -331,22 +534,7 @@ class AKShareAdapter:
     async def _get_index_pb(self, index_code: str) -> Optional[float]:
         """获取指数PB数据"""
         try:
-            loop = asyncio.get_event_loop()
-            
-            # 获取指数PB数据
-            df = await loop.run_in_executor(None, ak.stock_index_pb_lg)
-            
-            if df is None or df.empty:
-                return None
-            
-            # 获取最新的PB数据
-            latest = df.iloc[-1]
-            pb_ratio = latest.get("市净率")
-            
-            if pb_ratio and pb_ratio > 0:
-                return float(pb_ratio)
-            
-            return None
+            return await self._get_valuation_value("pb_ratio", index_code)
         except Exception as e:
             logger.warning(f"获取指数PB失败 {index_code}: {str(e)}")
             return None
@@ -354,20 +542,10 @@ class AKShareAdapter:
     async def _get_index_dividend_yield(self, index_code: str) -> Optional[float]:
         """获取指数股息率数据"""
         try:
-            loop = asyncio.get_event_loop()
-            
-            # 尝试从中证指数估值数据获取股息率
-            df = await loop.run_in_executor(None, ak.stock_zh_index_value_csindex)
-            
-            if df is None or df.empty:
-                return None
-            
-            # 查找对应指数的股息率
-            index_data = df[df['指数代码'] == index_code]
-            if not index_data.empty:
-                dividend_yield = index_data.iloc[-1].get('股息率1')
-                if dividend_yield and dividend_yield > 0:
-                    return float(dividend_yield)
+            # 从中证指数估值数据获取股息率
+            dividend_yield = await self._get_valuation_value("dividend_yield", index_code)
+            if dividend_yield is not None:
+                return dividend_yield
             
             # 如果找不到，返回估计值
             return self._estimate_dividend_yield(index_code)
@@ -392,26 +570,19 @@ class AKShareAdapter:
     async def _get_valuation_percentile(self, index_code: str) -> Optional[float]:
         """计算估值分位数"""
         try:
-            # 获取历史PE数据计算分位数
-            pe_ratio = await self._get_index_pe(index_code)
-            if not pe_ratio:
-                return None
-            
-            loop = asyncio.get_event_loop()
-            
-            # 获取历史PE数据
-            df = await loop.run_in_executor(None, ak.stock_index_pe_lg)
-            
-            if df is None or df.empty or len(df) < 100:
+            # 当前PE在历史PE中的分位数，加载估值表时已预先计算
+            for source in VALUATION_FIELD_SOURCES["pe_ratio"]:
+                table = await self.valuation.get(source, index_code, self._load_valuation_table)
+                pe_ratio = table.get("pe_ratio")
+                if not pe_ratio or pe_ratio <= 0:
+                    continue
+                
+                percentile = table.percentiles.get("pe_ratio")
+                if percentile is not None:
+                    return percentile
                 return self._estimate_valuation_percentile(index_code, pe_ratio)
             
-            # 计算当前PE在历史数据中的分位数
-            pe_values = df["滚动市盈率"].dropna()
-            if len(pe_values) > 0:
-                percentile = (pe_values < pe_ratio).sum() / len(pe_values) * 100
-                return float(percentile)
-            
-            return self._estimate_valuation_percentile(index_code, pe_ratio)
+            return None
         except Exception as e:
             logger.warning(f"计算估值分位数失败 {index_code}: {str(e)}")
             return None
@@ -0,0 +1,178 @@
+"""
+本地时间序列存储 - 持久化指数日线和基金净值，按日期区间从本地读取
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 序列类型 -> 数值列
+SERIES_COLUMNS: Dict[str, List[str]] = {
+    "index_daily": ["open", "close", "high", "low", "volume", "amount"],
+    "fund_nav": ["unit_net_value", "accumulated_net_value", "daily_growth_rate"],
+}
+
+# 本地数据覆盖范围未知时使用的最早日期
+EARLIEST_DATE = "1900-01-01"
+
+
+class SeriesCoverage:
+    """某个序列在本地的覆盖情况
+
+    covered_from/covered_to 是已经向上游请求过的日期区间（不一定每天都有数据），
+    first_date/last_date 是本地实际存在数据的日期范围。
+    """
+
+    def __init__(self, covered_from: str, covered_to: str, first_date: Optional[str],
+                 last_date: Optional[str], synced_at: float):
+        self.covered_from = covered_from
+        self.covered_to = covered_to
+        self.first_date = first_date
+        self.last_date = last_date
+        self.synced_at = synced_at
+
+    @property
+    def age(self) -> float:
+        """距离上次同步的秒数"""
+        return time.time() - self.synced_at
+
+
+class HistoryStore:
+    """基于SQLite的时间序列存储
+
+    每个序列类型一张表，以 (code, date) 为聚簇主键，日期区间查询只扫描对应范围。
+    所有方法都是阻塞调用，需要在线程池中执行。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """打开连接，退出时提交并关闭；首次使用时建表"""
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    self._init_db()
+                    self._initialized = True
+
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for kind, columns in SERIES_COLUMNS.items():
+                column_defs = ", ".join(f"{col} REAL" for col in columns)
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {kind} ("
+                    f"code TEXT NOT NULL, date TEXT NOT NULL, {column_defs}, "
+                    f"PRIMARY KEY (code, date)) WITHOUT ROWID"
+                )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS series_meta ("
+                "kind TEXT NOT NULL, code TEXT NOT NULL, "
+                "covered_from TEXT NOT NULL, covered_to TEXT NOT NULL, "
+                "synced_at REAL NOT NULL, PRIMARY KEY (kind, code))"
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def coverage(self, kind: str, code: str) -> Optional[SeriesCoverage]:
+        """查询序列的本地覆盖范围"""
+        with self._connect() as conn:
+            meta = conn.execute(
+                "SELECT covered_from, covered_to, synced_at FROM series_meta WHERE kind = ? AND code = ?",
+                (kind, code),
+            ).fetchone()
+            if meta is None:
+                return None
+            first_date, last_date = conn.execute(
+                f"SELECT MIN(date), MAX(date) FROM {kind} WHERE code = ?", (code,)
+            ).fetchone()
+        return SeriesCoverage(meta[0], meta[1], first_date, last_date, meta[2])
+
+    def read(self, kind: str, code: str, start_date: Optional[str] = None,
+             end_date: Optional[str] = None) -> pd.DataFrame:
+        """读取日期区间内的数据（含首尾），按日期升序"""
+        columns = SERIES_COLUMNS[kind]
+        sql = f"SELECT date, {', '.join(columns)} FROM {kind} WHERE code = ?"
+        params: List[Any] = [code]
+        if start_date:
+            sql += " AND date >= ?"
+            params.append(start_date)
+        if end_date:
+            sql += " AND date <= ?"
+            params.append(end_date)
+        sql += " ORDER BY date"
+
+        with self._connect() as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    def read_tail(self, kind: str, code: str, count: int) -> pd.DataFrame:
+        """读取最近的count条数据，按日期升序"""
+        columns = SERIES_COLUMNS[kind]
+        sql = (
+            f"SELECT date, {', '.join(columns)} FROM {kind} WHERE code = ? "
+            f"ORDER BY date DESC LIMIT ?"
+        )
+        with self._connect() as conn:
+            df = pd.read_sql_query(sql, conn, params=[code, count])
+        return df.iloc[::-1].reset_index(drop=True)
+
+    def write(self, kind: str, code: str, df: Optional[pd.DataFrame],
+              covered_from: str, covered_to: str) -> int:
+        """写入（覆盖）数据并扩展覆盖范围，返回写入行数
+
+        df 需包含 date 列（YYYY-MM-DD）和该序列类型的数值列，缺失的列写入NULL。
+        """
+        columns = SERIES_COLUMNS[kind]
+        rows: List[tuple] = []
+        if df is not None and not df.empty:
+            frame = df.reindex(columns=["date", *columns])
+            frame = frame.astype(object).where(frame.notna(), None)
+            rows = [(code, *values) for values in frame.itertuples(index=False, name=None)]
+
+        placeholders = ", ".join("?" for _ in range(len(columns) + 2))
+        with self._lock, self._connect() as conn:
+            if rows:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {kind} (code, date, {', '.join(columns)}) VALUES ({placeholders})",
+                    rows,
+                )
+            conn.execute(
+                "INSERT INTO series_meta (kind, code, covered_from, covered_to, synced_at) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (kind, code) DO UPDATE SET "
+                "covered_from = MIN(covered_from, excluded.covered_from), "
+                "covered_to = MAX(covered_to, excluded.covered_to), "
+                "synced_at = excluded.synced_at",
+                (kind, code, covered_from, covered_to, time.time()),
+            )
+        return len(rows)
+
+
+# 进程内共享的本地时间序列存储
+history_store = HistoryStore(settings.HISTORY_DB_PATH)
@@ -0,0 +1,165 @@
+"""
+指数估值快照 - 每个估值表每个刷新周期只下载一次，按指数代码和日期建立索引
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 计算估值分位数所需的最少历史样本数
+MIN_PERCENTILE_SAMPLES = 100
+
+# 加载估值表: (数据源, 指数代码) -> 标准化后的DataFrame（date列 + 指标列）
+TableLoader = Callable[[str, str], Awaitable[Optional[pd.DataFrame]]]
+
+
+class ValuationTable:
+    """单个指数的估值表
+
+    加载时一次性建立按日期的索引，并预先计算每个指标的最新值和历史分位数，
+    之后的查询都是字典查找。
+    """
+
+    def __init__(self, df: Optional[pd.DataFrame] = None):
+        self.loaded_at = time.monotonic()
+        self.by_date: Dict[str, Dict[str, float]] = {}
+        self.latest: Dict[str, float] = {}
+        self.latest_date: Optional[str] = None
+        self.percentiles: Dict[str, float] = {}
+
+        if df is None or df.empty:
+            return
+
+        df = df.dropna(subset=["date"]).sort_values("date")
+        dates: List[str] = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d").tolist()
+        if not dates:
+            return
+        self.latest_date = dates[-1]
+
+        for field in df.columns:
+            if field == "date":
+                continue
+            values = pd.to_numeric(df[field], errors="coerce").to_numpy(dtype=float)
+            valid = ~np.isnan(values)
+            if not valid.any():
+                continue
+
+            for day, value in zip(np.asarray(dates)[valid].tolist(), values[valid].tolist()):
+                self.by_date.setdefault(day, {})[field] = value
+
+            history = values[valid]
+            current = float(history[-1])
+            self.latest[field] = current
+            if len(history) >= MIN_PERCENTILE_SAMPLES:
+                self.percentiles[field] = float((history < current).sum() / len(history) * 100)
+
+    @property
+    def empty(self) -> bool:
+        return not self.latest
+
+    def get(self, field: str, date: Optional[str] = None) -> Optional[float]:
+        """获取指标值，不指定日期时返回最新值"""
+        if date is None:
+            return self.latest.get(field)
+        return self.by_date.get(date, {}).get(field)
+
+
+class ValuationStore:
+    """指数估值快照存储
+
+    估值表过期后在 stale_grace 秒内继续返回旧表，同时在后台重新下载（stale-while-revalidate）。
+    """
+
+    def __init__(self, refresh_interval: float, retry_interval: float = 60, stale_grace: float = 0):
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+        self.stale_grace = stale_grace
+        self._tables: Dict[Tuple[str, str], ValuationTable] = {}
+        self._pending: Dict[Tuple[str, str], "asyncio.Task[ValuationTable]"] = {}
+        self.loads = 0
+        self.stale_hits = 0
+
+    def _age(self, table: ValuationTable) -> float:
+        return time.monotonic() - table.loaded_at
+
+    def _is_fresh(self, table: ValuationTable) -> bool:
+        # 加载失败的空表只保留较短时间，避免反复请求不支持的指数
+        ttl = self.retry_interval if table.empty else self.refresh_interval
+        return self._age(table) < ttl
+
+    def _is_servable(self, table: ValuationTable) -> bool:
+        """过期但仍在宽限期内、可以作为旧数据返回"""
+        return not table.empty and self._age(table) < self.refresh_interval + self.stale_grace
+
+    async def _reload(self, source: str, index_code: str, loader: TableLoader) -> ValuationTable:
+        key = (source, index_code)
+        table = self._tables.get(key)
+        try:
+            df = await loader(source, index_code)
+        except Exception as e:
+            logger.warning(f"加载估值表失败 {source} {index_code}: {str(e)}")
+            df = None
+
+        fresh = ValuationTable(df)
+        self.loads += 1
+        if fresh.empty and table is not None and not table.empty:
+            # 刷新失败时继续使用旧数据，稍后重试
+            table.loaded_at = time.monotonic() - self.refresh_interval + self.retry_interval
+            return table
+
+        self._tables[key] = fresh
+        return fresh
+
+    def _start_reload(self, source: str, index_code: str, loader: TableLoader) -> "asyncio.Task[ValuationTable]":
+        """启动或加入同一估值表的重新下载"""
+        key = (source, index_code)
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._reload(source, index_code, loader))
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        return task
+
+    async def get(self, source: str, index_code: str, loader: TableLoader,
+                  force: bool = False) -> ValuationTable:
+        """获取估值表，过期或force时通过loader重新下载"""
+        table = self._tables.get((source, index_code))
+        if table is not None and not force:
+            if self._is_fresh(table):
+                return table
+            if self._is_servable(table):
+                self.stale_hits += 1
+                self._start_reload(source, index_code, loader)
+                return table
+
+        return await asyncio.shield(self._start_reload(source, index_code, loader))
+
+    def is_stale(self, index_code: str) -> bool:
+        """该指数是否有估值表已过期（正在使用旧数据）"""
+        return any(
+            code == index_code and not table.empty and not self._is_fresh(table)
+            for (_, code), table in self._tables.items()
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """估值快照统计信息"""
+        return {
+            "tables": len(self._tables),
+            "loads": self.loads,
+            "stale_hits": self.stale_hits,
+            "reloading": len(self._pending),
+        }
+
+
+# 进程内共享的估值快照
+valuation_store = ValuationStore(
+    refresh_interval=settings.CACHE_TTL_VALUATION,
+    stale_grace=settings.CACHE_STALE_GRACE,
+)
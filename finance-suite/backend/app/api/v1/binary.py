@@ -0,0 +1,86 @@
+"""
+二进制数据格式 - 历史/对比序列以 Arrow IPC 流或 Parquet 返回
+
+直接由适配器的 DataFrame 构建列式表，不经过逐行的响应模型。
+pyarrow 为可选依赖，未安装时请求二进制格式返回406。
+"""
+from typing import Optional
+
+import pandas as pd
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+# format 查询参数 -> 媒体类型
+BINARY_FORMATS = {
+    "arrow": ARROW_STREAM_MEDIA_TYPE,
+    "parquet": PARQUET_MEDIA_TYPE,
+}
+
+# Accept 头中可识别的媒体类型
+ACCEPT_MEDIA_TYPES = {
+    ARROW_STREAM_MEDIA_TYPE: ARROW_STREAM_MEDIA_TYPE,
+    PARQUET_MEDIA_TYPE: PARQUET_MEDIA_TYPE,
+    "application/x-parquet": PARQUET_MEDIA_TYPE,
+}
+
+FILE_EXTENSIONS = {
+    ARROW_STREAM_MEDIA_TYPE: "arrows",
+    PARQUET_MEDIA_TYPE: "parquet",
+}
+
+
+def pyarrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def negotiate_binary(accept: Optional[str], data_format: Optional[str] = None) -> Optional[str]:
+    """根据 format 参数或 Accept 头确定二进制媒体类型，不需要二进制格式时返回None
+
+    format 参数优先；Accept 头按出现顺序取第一个可识别的类型。
+    """
+    media_type = BINARY_FORMATS.get(data_format) if data_format else None
+    if media_type is None and accept:
+        for part in accept.split(","):
+            candidate = part.split(";")[0].strip().lower()
+            if candidate in ACCEPT_MEDIA_TYPES:
+                media_type = ACCEPT_MEDIA_TYPES[candidate]
+                break
+
+    if media_type is not None and not pyarrow_available():
+        raise HTTPException(status_code=406, detail="服务端未安装pyarrow，不支持Arrow/Parquet格式")
+    return media_type
+
+
+def dataframe_response(df: pd.DataFrame, media_type: str, filename: str) -> Response:
+    """将DataFrame编码为Arrow IPC流或Parquet响应"""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if "date" in table.column_names:
+        # 日期列使用 date32 类型，而不是字符串
+        dates = pa.array(pd.to_datetime(df["date"]), type=pa.timestamp("ns")).cast(pa.date32())
+        table = table.set_column(table.column_names.index("date"), pa.field("date", pa.date32()), dates)
+    if "code" in table.column_names:
+        codes = table.column("code").dictionary_encode()
+        table = table.set_column(table.column_names.index("code"), pa.field("code", codes.type), codes)
+
+    sink = pa.BufferOutputStream()
+    if media_type == PARQUET_MEDIA_TYPE:
+        import pyarrow.parquet as pq
+        pq.write_table(table, sink)
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    return Response(
+        content=sink.getvalue().to_pybytes(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{FILE_EXTENSIONS[media_type]}"'},
+    )
@@ -1,35 +1,56 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Header
+from typing import List, Optional, Union
 from datetime import datetime, timedelta
+from app.api.v1.binary import dataframe_response, negotiate_binary
 from app.services.fund_service import FundService
 from app.schemas.fund_schemas import (
     FundInfo,
     FundListResponse,
     FundHistoryData,
+    FundHistoryColumnarData,
     FundComparisonResponse
 )
 
 # 创建基金路由
 router = APIRouter()
 
-# 依赖注入：获取基金服务实例
-def get_fund_service() -> FundService:
-    return FundService()
+# 依赖注入：获取应用共享的基金服务实例
+def get_fund_service(request: Request) -> FundService:
+    return request.app.state.services.fund_service
 
 @router.get("/list", response_model=FundListResponse)
 async def get_fund_list(
-    fund_type: Optional[str] = Query(None, description="基金类型"),
+    fund_type: Optional[str] = Query(None, description="基金类型: stock, bond, hybrid, index, money, qdii"),
+    company: Optional[str] = Query(None, description="基金公司"),
     page: int = Query(1, description="页码", ge=1),
     size: int = Query(20, description="每页数量", ge=1, le=100),
     service: FundService = Depends(get_fund_service)
 ):
     """获取基金列表"""
     try:
-        funds = await service.get_fund_list(fund_type, page, size)
+        funds = await service.get_fund_list(fund_type, page, size, company)
         return funds
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取基金列表失败: {str(e)}")
 
+@router.get("/search")
+async def search_funds(
+    keyword: str = Query(..., min_length=1, description="搜索关键词：基金代码、简称或拼音缩写"),
+    size: int = Query(10, description="返回数量", ge=1, le=50),
+    fund_type: Optional[str] = Query(None, description="基金类型: stock, bond, hybrid, index, money, qdii"),
+    service: FundService = Depends(get_fund_service)
+):
+    """搜索基金"""
+    try:
+        funds = await service.search_funds(keyword, size, fund_type)
+        return {
+            "success": True,
+            "data": funds,
+            "message": "搜索基金成功"
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"搜索基金失败: {str(e)}")
+
 @router.get("/{fund_code}", response_model=FundInfo)
 async def get_fund_info(
     fund_code: str,
@@ -44,15 +65,23 @@ async def get_fund_info(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取基金信息失败: {str(e)}")
 
-@router.get("/{fund_code}/history", response_model=FundHistoryData)
+@router.get("/{fund_code}/history", response_model=Union[FundHistoryData, FundHistoryColumnarData])
 async def get_fund_history(
     fund_code: str,
     start_date: Optional[str] = Query(None, description="开始日期 YYYY-MM-DD"),
     end_date: Optional[str] = Query(None, description="结束日期 YYYY-MM-DD"),
     period: str = Query("1y", description="时间周期: 1m, 3m, 6m, 1y, 2y, 5y"),
+    data_format: str = Query("rows", alias="format", pattern="^(rows|columnar|arrow|parquet)$",
+                             description="数据格式: rows(每天一个对象), columnar(每个字段一个数组), "
+                                         "arrow(Arrow IPC流), parquet"),
+    accept: Optional[str] = Header(None),
     service: FundService = Depends(get_fund_service)
 ):
-    """获取基金历史净值数据"""
+    """获取基金历史净值数据
+
+    format=arrow/parquet 或 Accept 头为对应媒体类型时返回二进制列式数据。
+    """
+    media_type = negotiate_binary(accept, data_format)
     try:
         # 计算日期范围
         if not start_date or not end_date:
@@ -64,7 +93,13 @@ async def get_fund_history(
             days = period_days.get(period, 365)
             start_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
         
-        history_data = await service.get_fund_history(fund_code, start_date, end_date)
+        if media_type:
+            df = await service.get_fund_history_frame(fund_code, start_date, end_date)
+            return dataframe_response(df, media_type, f"fund_{fund_code}_history")
+        
+        history_data = await service.get_fund_history(
+            fund_code, start_date, end_date, columnar=data_format == "columnar"
+        )
         return history_data
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取基金历史数据失败: {str(e)}")
@@ -75,9 +110,16 @@ async def compare_funds(
     start_date: Optional[str] = Query(None, description="开始日期 YYYY-MM-DD"),
     end_date: Optional[str] = Query(None, description="结束日期 YYYY-MM-DD"),
     period: str = Query("1y", description="时间周期"),
+    data_format: str = Query("json", alias="format", pattern="^(json|arrow|parquet)$",
+                             description="数据格式: json, arrow(Arrow IPC流), parquet"),
+    accept: Optional[str] = Header(None),
     service: FundService = Depends(get_fund_service)
 ):
-    """对比多个基金的表现"""
+    """对比多个基金的表现
+
+    format=arrow/parquet 或 Accept 头为对应媒体类型时返回各基金净值的二进制长表。
+    """
+    media_type = negotiate_binary(accept, data_format)
     try:
         if len(fund_codes) < 2:
             raise HTTPException(status_code=400, detail="至少需要选择2个基金进行对比")
@@ -95,6 +137,10 @@ async def compare_funds(
             days = period_days.get(period, 365)
             start_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
         
+        if media_type:
+            df = await service.compare_funds_frame(fund_codes, start_date, end_date)
+            return dataframe_response(df, media_type, "fund_comparison")
+        
         comparison_data = await service.compare_funds(fund_codes, start_date, end_date)
         return comparison_data
     except Exception as e:
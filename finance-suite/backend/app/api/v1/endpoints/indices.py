@@ -1,42 +1,29 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Header
 from typing import List, Optional
 from datetime import datetime, timedelta
+from app.api.v1.binary import dataframe_response, negotiate_binary
 from app.services.index_service import IndexService
-from app.schemas.index_schemas import (
-    IndexInfo,
-    IndexHistoryData,
-    IndexComparisonResponse,
-    IndexListResponse
-)
+from app.schemas.index_schemas import IndexListResponse
 
 # 创建指数路由
 router = APIRouter()
 
-# 依赖注入：获取指数服务实例
-def get_index_service() -> IndexService:
-    return IndexService()
+# 依赖注入：获取应用共享的指数服务实例
+def get_index_service(request: Request) -> IndexService:
+    return request.app.state.services.index_service
 
 @router.get("/list", response_model=IndexListResponse)
 async def get_index_list(
-    size: int = Query(50, description="返回数量"),
+    index_type: Optional[str] = Query(None, description="指数类型: equity, bond, commodity 等"),
+    category: Optional[str] = Query(None, description="指数分类: 规模指数, 行业指数, 策略指数, 综合指数"),
+    market: Optional[str] = Query(None, description="市场: SH, SZ"),
+    page: int = Query(1, description="页码", ge=1),
+    size: int = Query(50, description="每页数量", ge=1, le=200),
     service: IndexService = Depends(get_index_service)
 ):
-    """获取支持的指数列表"""
+    """获取指数列表（全部A股指数，支持筛选和分页）"""
     try:
-        indices = await service.get_available_indices()
-        # 限制返回数量
-        total = len(indices)
-        if size > 0:
-            indices = indices[:size]
-        
-        return IndexListResponse(
-            success=True,
-            data=indices,
-            total=total,
-            page=1,
-            size=len(indices),
-            message="获取指数列表成功"
-        )
+        return await service.get_index_list(index_type, category, market, page, size)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取指数列表失败: {str(e)}")
 
@@ -99,9 +86,17 @@ async def get_index_history(
     start_date: Optional[str] = Query(None, description="开始日期 YYYY-MM-DD"),
     end_date: Optional[str] = Query(None, description="结束日期 YYYY-MM-DD"),
     period: str = Query("1y", description="时间周期: 1m, 3m, 6m, 1y, 2y, 5y"),
+    data_format: str = Query("rows", alias="format", pattern="^(rows|columnar|arrow|parquet)$",
+                             description="数据格式: rows(每天一个对象), columnar(每个字段一个数组), "
+                                         "arrow(Arrow IPC流), parquet"),
+    accept: Optional[str] = Header(None),
     service: IndexService = Depends(get_index_service)
 ):
-    """获取指数历史数据"""
+    """获取指数历史数据
+
+    format=arrow/parquet 或 Accept 头为对应媒体类型时返回二进制列式数据。
+    """
+    media_type = negotiate_binary(accept, data_format)
     try:
         # 如果没有指定日期，根据period计算
         if not start_date or not end_date:
@@ -113,7 +108,13 @@ async def get_index_history(
             days = period_days.get(period, 365)
             start_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
         
-        history_data = await service.get_index_history(index_code, start_date, end_date)
+        if media_type:
+            df = await service.get_index_history_frame(index_code, start_date, end_date)
+            return dataframe_response(df, media_type, f"index_{index_code}_history")
+        
+        history_data = await service.get_index_history(
+            index_code, start_date, end_date, columnar=data_format == "columnar"
+        )
         return {
             "success": True,
             "data": history_data,
@@ -128,9 +129,16 @@ async def compare_indices(
     start_date: Optional[str] = Query(None, description="开始日期 YYYY-MM-DD"),
     end_date: Optional[str] = Query(None, description="结束日期 YYYY-MM-DD"),
     period: str = Query("1y", description="时间周期"),
+    data_format: str = Query("json", alias="format", pattern="^(json|arrow|parquet)$",
+                             description="数据格式: json, arrow(Arrow IPC流), parquet"),
+    accept: Optional[str] = Header(None),
     service: IndexService = Depends(get_index_service)
 ):
-    """对比多个指数的表现"""
+    """对比多个指数的表现
+
+    format=arrow/parquet 或 Accept 头为对应媒体类型时返回各指数日线的二进制长表。
+    """
+    media_type = negotiate_binary(accept, data_format)
     try:
         if len(index_codes) < 2:
             raise HTTPException(status_code=400, detail="至少需要选择2个指数进行对比")
@@ -148,6 +156,10 @@ async def compare_indices(
             days = period_days.get(period, 365)
             start_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
         
+        if media_type:
+            df = await service.compare_indices_frame(index_codes, start_date, end_date)
+            return dataframe_response(df, media_type, "index_comparison")
+        
         comparison_data = await service.compare_indices(index_codes, start_date, end_date)
         return {
             "success": True,
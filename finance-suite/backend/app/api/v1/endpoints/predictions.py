@@ -1,5 +1,5 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Depends, Request
+from typing import List, Optional
 from app.services.prediction_service import PredictionService
 from app.schemas.prediction_schemas import (
     InvestmentPrediction,
@@ -11,9 +11,9 @@ from app.schemas.prediction_schemas import (
 # 创建预测路由
 router = APIRouter()
 
-# 依赖注入：获取预测服务实例
-def get_prediction_service() -> PredictionService:
-    return PredictionService()
+# 依赖注入：获取应用共享的预测服务实例
+def get_prediction_service(request: Request) -> PredictionService:
+    return request.app.state.services.prediction_service
 
 @router.post("/fund-return", response_model=InvestmentPrediction)
 async def predict_fund_return(
@@ -26,7 +26,8 @@ async def predict_fund_return(
             fund_code=request.fund_code,
             investment_amount=request.investment_amount,
             investment_period=request.investment_period,
-            investment_type=request.investment_type
+            investment_type=request.investment_type,
+            method=request.method
         )
         return prediction
     except Exception as e:
@@ -55,17 +56,31 @@ async def backtest_investment(
     investment_amount: float = Query(..., description="投资金额"),
     start_date: str = Query(..., description="开始日期 YYYY-MM-DD"),
     end_date: Optional[str] = Query(None, description="结束日期 YYYY-MM-DD"),
-    strategy: str = Query("lump_sum", description="投资策略: lump_sum, dca"),
+    strategy: str = Query(
+        "lump_sum",
+        description="投资策略: lump_sum(一次性), dca(定投), value_averaging(价值平均), valuation(净值分位数定投)"
+    ),
+    target_growth: Optional[List[float]] = Query(None, description="价值平均的目标年化增长率，可多个"),
+    threshold: Optional[List[float]] = Query(None, description="分位数策略的低估阈值(%)，可多个"),
+    multiplier: Optional[List[float]] = Query(None, description="分位数策略的加减仓倍数，可多个"),
+    window: Optional[List[int]] = Query(None, description="分位数策略的回看交易日数，可多个"),
     service: PredictionService = Depends(get_prediction_service)
 ):
-    """投资策略回测"""
+    """投资策略回测（策略参数给出多个取值时回测全部组合）"""
     try:
+        parameters = {
+            name: values for name, values in (
+                ("target_growth", target_growth), ("threshold", threshold),
+                ("multiplier", multiplier), ("window", window),
+            ) if values
+        }
         backtest_result = await service.backtest_investment(
             fund_code=fund_code,
             investment_amount=investment_amount,
             start_date=start_date,
             end_date=end_date,
-            strategy=strategy
+            strategy=strategy,
+            parameters=parameters
         )
         return {
             "success": True,
@@ -0,0 +1,219 @@
+"""
+内存缓存 - 带过期时间(TTL)和容量上限(LRU淘汰)的响应缓存
+"""
+import functools
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import pandas as pd
+
+from app.core.config import settings
+
+# 未命中时的哨兵值，用于区分"缓存了None"和"没有缓存"
+MISSING = object()
+
+
+class CacheEntry:
+    """缓存条目"""
+
+    __slots__ = ("value", "expires_at", "stale_until", "fetched_at")
+
+    def __init__(self, value: Any, ttl: float, stale_grace: float):
+        now = time.monotonic()
+        self.value = value
+        self.expires_at = now + ttl
+        # 过期后仍可作为旧数据返回的截止时间
+        self.stale_until = self.expires_at + stale_grace
+        self.fetched_at = datetime.now()
+
+    @property
+    def stale(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+
+class TTLCache:
+    """带过期时间的LRU缓存
+
+    条目过期后在 stale_grace 秒内仍可通过 get_entry 作为旧数据返回（stale-while-revalidate）。
+    仅在事件循环线程中访问，不需要加锁。
+    """
+
+    def __init__(self, max_size: int = 1024, default_ttl: float = 300, stale_grace: float = 0):
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self.stale_grace = stale_grace
+        self._data: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _lookup(self, key: Hashable, allow_stale: bool) -> Optional[CacheEntry]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        now = time.monotonic()
+        if entry.stale_until <= now:
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        if entry.expires_at <= now:
+            if not allow_stale:
+                self.misses += 1
+                return None
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+        self._data.move_to_end(key)
+        return entry
+
+    def get_entry(self, key: Hashable) -> Optional[CacheEntry]:
+        """读取缓存条目，包括宽限期内的过期条目"""
+        return self._lookup(key, allow_stale=True)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """读取未过期的缓存值"""
+        entry = self._lookup(key, allow_stale=False)
+        return default if entry is None else entry.value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0 or self.max_size <= 0:
+            return
+
+        self._data[key] = CacheEntry(value, ttl, self.stale_grace)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        """删除缓存条目"""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """清空缓存（不重置计数器）"""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and not entry.stale
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计信息"""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+def make_key(name: str, args: tuple, kwargs: Dict[str, Any]) -> Hashable:
+    """根据方法名和参数生成缓存键"""
+    if kwargs:
+        return (name, args, tuple(sorted(kwargs.items())))
+    return (name, args)
+
+
+def copy_value(value: Any) -> Any:
+    """返回缓存值的副本，避免调用方修改缓存中的对象"""
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+def is_stale(value: Any) -> bool:
+    """返回值自身是否标记为过期数据（如上游刷新失败时返回的本地旧数据）"""
+    if isinstance(value, dict):
+        return bool(value.get("stale"))
+    if isinstance(value, pd.DataFrame):
+        return bool(value.attrs.get("stale"))
+    return False
+
+
+def mark_stale(value: Any, stale: bool) -> Any:
+    """在返回值上标记是否为过期数据"""
+    if isinstance(value, dict):
+        value["stale"] = stale
+    elif isinstance(value, pd.DataFrame):
+        value.attrs["stale"] = stale
+    return value
+
+
+def _entry_ttl(value: Any, ttl: Optional[float]) -> Optional[float]:
+    if not is_stale(value):
+        return ttl
+    return settings.CACHE_TTL_STALE_RESULT if ttl is None else min(ttl, settings.CACHE_TTL_STALE_RESULT)
+
+
+def cached(ttl: Optional[float] = None) -> Callable:
+    """适配器异步方法的缓存装饰器
+
+    缓存键由方法名和调用参数构成；返回None（获取失败）时不缓存。
+    条目过期但仍在宽限期内时直接返回旧数据（标记 stale=True），同时在后台刷新，
+    同一条目同时只有一个刷新任务。
+    方法自身返回标记为 stale 的结果（上游失败时的本地旧数据）时，只缓存 CACHE_TTL_STALE_RESULT 秒，
+    命中时仍标记 stale。
+    被装饰的方法所属对象需要提供 `cache` 和 `flight` 属性；`wrapper.refresh` 可强制刷新某个缓存条目。
+    """
+    def decorator(func: Callable) -> Callable:
+        name = func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            cache: TTLCache = self.cache
+            key = make_key(name, args, kwargs)
+
+            entry = cache.get_entry(key)
+            if entry is None:
+                value = await func(self, *args, **kwargs)
+                if value is None:
+                    return None
+                cache.set(key, value, _entry_ttl(value, ttl))
+                stale = is_stale(value)
+            else:
+                value = entry.value
+                if entry.stale:
+                    self.flight.start(("revalidate", key), lambda: refresh(self, *args, **kwargs))
+                stale = entry.stale or is_stale(value)
+
+            return mark_stale(copy_value(value), stale)
+
+        async def refresh(self, *args, **kwargs):
+            """绕过缓存重新获取并写回缓存（后台预取使用）"""
+            value = await func(self, *args, **kwargs)
+            if value is not None:
+                self.cache.set(make_key(name, args, kwargs), value, _entry_ttl(value, ttl))
+            return value
+
+        wrapper.refresh = refresh
+        return wrapper
+
+    return decorator
+
+
+# 进程内共享的响应缓存
+response_cache = TTLCache(
+    max_size=settings.CACHE_MAX_SIZE,
+    default_ttl=settings.CACHE_TTL,
+    stale_grace=settings.CACHE_STALE_GRACE,
+)
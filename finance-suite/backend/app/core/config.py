@@ -27,9 +27,66 @@ class Settings(BaseSettings):
     
     # 数据源配置
     AKSHARE_ENABLED: bool = True
+    AKSHARE_TIMEOUT: int = 30  # 单个上游请求超时(秒)
     
     # 缓存配置
     CACHE_TTL: int = 300  # 5分钟缓存
+    CACHE_MAX_SIZE: int = 1024  # 缓存条目上限，超出按LRU淘汰
+    CACHE_STALE_GRACE: int = 600  # 过期后仍可返回旧数据并后台刷新的宽限期(秒)
+    CACHE_TTL_REALTIME: int = 60  # 实时行情/最新净值
+    CACHE_TTL_STALE_RESULT: int = 10  # 上游刷新失败、返回本地旧数据时的缓存时间
+    CACHE_TTL_HISTORY: int = 3600  # 历史行情/净值
+    CACHE_TTL_VALUATION: int = 3600  # 估值数据
+    CACHE_TTL_FUND_LIST: int = 86400  # 基金列表
+    CACHE_TTL_FUND_INFO: int = 3600  # 基金基本信息
+
+    SHUTDOWN_DRAIN_TIMEOUT: int = 10  # 关闭时等待进行中的上游请求完成的最长时间(秒)
+
+    # 阻塞调用线程池：各接口族并发上限之和不超过线程数，任何一类请求都不能占满线程
+    EXECUTOR_MAX_WORKERS: int = 18
+    EXECUTOR_FAMILY_LIMITS: Dict[str, int] = {
+        "quotes": 4,  # 实时行情/最新净值
+        "history": 4,  # 历史行情/净值
+        "valuation": 3,  # 估值表
+        "metadata": 2,  # 基金列表、基金信息、指数目录
+        "store": 3,  # 本地时间序列存储
+        "compute": 2,  # 模拟、回测等CPU密集计算
+    }
+    
+    # 蒙特卡洛收益预测：路径数 × 交易日数不超过 MONTE_CARLO_MAX_STEPS，以限制单次预测的耗时
+    MONTE_CARLO_PATHS: int = 10000
+    MONTE_CARLO_MIN_PATHS: int = 1000
+    MONTE_CARLO_MAX_STEPS: int = 12_000_000
+    MONTE_CARLO_SEED: int = 20240101
+    PREDICTION_HISTORY_DAYS: int = 1095  # 模拟使用的历史净值区间(天)
+    BACKTEST_MAX_COMBINATIONS: int = 200  # 单次回测的最大参数组合数
+    
+    # 指数目录刷新周期(秒)
+    INDEX_CATALOG_REFRESH_INTERVAL: int = 86400
+    
+    # 后台预取配置
+    SCHEDULER_ENABLED: bool = True
+    HOT_INDEX_CODES: List[str] = [
+        "000001", "000300", "000905", "399001", "399006",
+        "000016", "000852", "399005", "000906",
+    ]
+    HOT_FUND_CODES: List[str] = []
+    HOT_TOP_N: int = 20  # 额外预取请求次数最多的前N个代码
+    HOT_SYMBOL_MAX_SIZE: int = 500  # 每类最多记录的代码数，超出时只保留请求次数最多的
+    HOT_SYMBOL_DECAY_INTERVAL: int = 3600  # 请求次数减半的周期(秒)，长期不再请求的代码逐渐退出
+    QUOTE_REFRESH_INTERVAL: int = 60  # 交易时段行情刷新间隔(秒)
+    OFF_HOURS_REFRESH_INTERVAL: int = 1800  # 非交易时段行情刷新间隔(秒)
+    VALUATION_REFRESH_INTERVAL: int = 3000
+    FUND_NAV_REFRESH_INTERVAL: int = 1800
+    FUND_LIST_REFRESH_INTERVAL: int = 43200
+    FUND_COMPANY_REFRESH_INTERVAL: int = 86400  # 基金公司映射（基金经理列表，下载较慢）
+    SCHEDULER_JITTER: float = 0.1  # 刷新间隔随机抖动比例
+    SCHEDULER_MAX_BACKOFF: int = 3600  # 连续失败时的最大退避间隔(秒)
+    
+    # 本地数据存储
+    DATA_DIR: str = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data")
+    HISTORY_DB_PATH: str = os.path.join(DATA_DIR, "history.db")
+    INDEX_CATALOG_PATH: str = os.path.join(DATA_DIR, "index_catalog.json")
     
     # 日志配置
     LOG_LEVEL: str = "INFO"
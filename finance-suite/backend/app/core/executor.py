@@ -0,0 +1,135 @@
+"""
+阻塞调用执行器 - 专用线程池 + 按接口族的并发限制
+
+AKShare 和本地存储都是阻塞调用，统一放到专用线程池中执行，不占用事件循环的默认线程池。
+每个接口族（行情、历史、估值、元数据、本地存储）有独立的并发上限，
+某一类请求突发时只会在自己的队列中排队，不会占满线程而阻塞其他请求。
+"""
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+
+
+class FamilyStats:
+    """单个接口族的排队和执行统计"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.calls = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "calls": self.calls,
+            "avg_wait": round(self.total_wait / self.calls, 4) if self.calls else 0.0,
+            "max_wait": round(self.max_wait, 4),
+            "avg_run": round(self.total_run / self.calls, 4) if self.calls else 0.0,
+        }
+
+
+class BlockingExecutor:
+    """带接口族并发限制的线程池执行器
+
+    未在 family_limits 中配置的接口族使用 default_limit。
+    信号量在首次使用时创建，仅在事件循环线程中访问。
+    """
+
+    def __init__(self, max_workers: int, family_limits: Dict[str, int], default_limit: int = 2):
+        self.max_workers = max_workers
+        self.family_limits = dict(family_limits)
+        self.default_limit = default_limit
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._stats: Dict[str, FamilyStats] = {}
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="blocking")
+        return self._pool
+
+    def _family(self, family: str) -> "tuple[asyncio.Semaphore, FamilyStats]":
+        semaphore = self._semaphores.get(family)
+        if semaphore is None:
+            limit = self.family_limits.get(family, self.default_limit)
+            semaphore = self._semaphores[family] = asyncio.Semaphore(limit)
+            self._stats[family] = FamilyStats(limit)
+        return semaphore, self._stats[family]
+
+    async def run(self, family: str, func: Callable, *args, **kwargs) -> Any:
+        """在线程池中执行阻塞调用，超出接口族并发上限时排队等待"""
+        semaphore, stats = self._family(family)
+        queued = time.monotonic()
+        stats.waiting += 1
+        stats.max_waiting = max(stats.max_waiting, stats.waiting)
+        try:
+            await semaphore.acquire()
+        finally:
+            stats.waiting -= 1
+
+        started = time.monotonic()
+        wait = started - queued
+        stats.calls += 1
+        stats.total_wait += wait
+        stats.max_wait = max(stats.max_wait, wait)
+        stats.active += 1
+
+        loop = asyncio.get_running_loop()
+
+        def finish(_) -> None:
+            stats.active -= 1
+            stats.total_run += time.monotonic() - started
+            semaphore.release()
+
+        try:
+            future = self.pool.submit(functools.partial(func, *args, **kwargs))
+        except Exception:
+            finish(None)
+            raise
+        # 线程执行结束后才释放名额：调用方被取消时线程仍在运行，不能提前让出
+        future.add_done_callback(functools.partial(self._release, loop, finish))
+        return await asyncio.wrap_future(future)
+
+    @staticmethod
+    def _release(loop: asyncio.AbstractEventLoop, finish: Callable, future: Any) -> None:
+        """在事件循环线程中释放名额；事件循环已关闭（如 shutdown(wait=False) 之后线程才结束）时跳过"""
+        if loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(finish, future)
+        except RuntimeError:
+            # 检查之后、调度之前事件循环被关闭
+            pass
+
+    def shutdown(self, wait: bool = True) -> None:
+        """关闭线程池，之后再调用 run 会重新创建"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> Dict[str, Any]:
+        """线程池和各接口族统计信息"""
+        return {
+            "max_workers": self.max_workers,
+            "families": {family: stats.to_dict() for family, stats in self._stats.items()},
+        }
+
+
+# 进程内共享的阻塞调用执行器
+blocking_executor = BlockingExecutor(
+    max_workers=settings.EXECUTOR_MAX_WORKERS,
+    family_limits=settings.EXECUTOR_FAMILY_LIMITS,
+)
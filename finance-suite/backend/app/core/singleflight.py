@@ -0,0 +1,66 @@
+"""
+请求合并 - 并发的相同请求只执行一次，其余调用方共享同一个结果
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class SingleFlight:
+    """并发请求合并器
+
+    同一个键在执行期间的所有调用方等待同一个任务；任务完成后键被移除，
+    下一次调用会重新执行。仅在事件循环线程中使用。
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self.executed = 0
+        self.shared = 0
+
+    def start(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> "asyncio.Future[Any]":
+        """启动或加入一个进行中的请求，不等待结果（可用于后台刷新）"""
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._done(key, f))
+            self.executed += 1
+        else:
+            self.shared += 1
+        return future
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """执行或加入一个进行中的请求"""
+        # shield: 单个调用方被取消时不影响其他等待者
+        return await asyncio.shield(self.start(key, factory))
+
+    def _done(self, key: Hashable, future: "asyncio.Future[Any]") -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        # 读取异常，避免所有等待者都已取消时出现 "exception was never retrieved"
+        if not future.cancelled():
+            future.exception()
+
+    async def drain(self, timeout: Optional[float] = None) -> int:
+        """等待进行中的请求完成（关闭时使用），返回超时后仍未完成的数量"""
+        pending = list(self._inflight.values())
+        if not pending:
+            return 0
+        _, not_done = await asyncio.wait(pending, timeout=timeout)
+        return len(not_done)
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    def stats(self) -> Dict[str, Any]:
+        """请求合并统计信息"""
+        return {
+            "inflight": len(self._inflight),
+            "executed": self.executed,
+            "shared": self.shared,
+        }
+
+
+# 进程内共享的上游请求合并器
+upstream_flight = SingleFlight()
@@ -1,14 +1,29 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api.v1.router import api_router
+from app.services.container import ServiceContainer
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：创建共享的服务容器并启动后台预取，关闭时等待进行中的请求后释放资源"""
+    services = ServiceContainer()
+    app.state.services = services
+    await services.start()
+    yield
+    await services.shutdown()
+
 
 # 创建FastAPI应用实例
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="个人指数分析平台 - 提供指数查询、基金对比和收益预测功能",
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 # 配置CORS中间件
@@ -38,6 +53,11 @@ async def health_check():
     """健康检查端点"""
     return {"status": "healthy"}
 
+@app.get("/stats")
+async def runtime_stats():
+    """运行时统计（缓存命中率、后台刷新等）"""
+    return app.state.services.stats()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -54,7 +54,7 @@ class FundDataPoint(BaseModel):
     """基金净值数据点"""
     date: str = Field(..., description="日期")
     unit_net_value: float = Field(..., description="单位净值")
-    accumulated_net_value: float = Field(..., description="累计净值")
+    accumulated_net_value: Optional[float] = Field(None, description="累计净值")
     daily_growth_rate: Optional[float] = Field(None, description="日增长率")
 
 
@@ -66,6 +66,22 @@ class FundHistoryData(BaseModel):
     statistics: Optional[Dict[str, Any]] = Field(None, description="统计信息")
 
 
+class FundHistoryColumns(BaseModel):
+    """基金净值序列（列式，每个字段一个数组）"""
+    date: List[str] = Field(..., description="日期")
+    unit_net_value: List[float] = Field(..., description="单位净值")
+    accumulated_net_value: List[Optional[float]] = Field(..., description="累计净值")
+    daily_growth_rate: List[Optional[float]] = Field(..., description="日增长率")
+
+
+class FundHistoryColumnarData(BaseModel):
+    """基金历史数据（列式格式）"""
+    code: str = Field(..., description="基金代码")
+    name: str = Field(..., description="基金名称")
+    data: FundHistoryColumns = Field(..., description="历史净值数据")
+    statistics: Optional[Dict[str, Any]] = Field(None, description="统计信息")
+
+
 class FundComparisonItem(BaseModel):
     """基金对比项"""
     code: str = Field(..., description="基金代码")
@@ -112,6 +128,7 @@ class FundRealtimeData(BaseModel):
     net_value_date: str = Field(..., description="净值日期")
     day_growth_rate: float = Field(..., description="日涨跌幅")
     last_update: datetime = Field(..., description="最后更新时间")
+    stale: bool = Field(False, description="是否为过期数据（后台正在刷新）")
 
 
 class FundPerformanceAnalysis(BaseModel):
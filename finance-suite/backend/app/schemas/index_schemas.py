@@ -47,6 +47,7 @@ class IndexInfo(BaseModel):
     valuation_percentile: Optional[float] = Field(None, description="估值分位数")
     constituent_count: Optional[int] = Field(None, description="成分股数量")
     last_update: Optional[datetime] = Field(None, description="最后更新时间")
+    stale: bool = Field(False, description="是否为过期数据（后台正在刷新）")
 
 
 class IndexDataPoint(BaseModel):
@@ -70,6 +71,27 @@ class IndexHistoryData(BaseModel):
     statistics: Optional[Dict[str, Any]] = Field(None, description="统计信息")
 
 
+class IndexHistoryColumns(BaseModel):
+    """指数历史序列（列式，每个字段一个数组）"""
+    date: List[str] = Field(..., description="日期")
+    open_value: List[Optional[float]] = Field(..., description="开盘点数")
+    high_value: List[Optional[float]] = Field(..., description="最高点数")
+    low_value: List[Optional[float]] = Field(..., description="最低点数")
+    close_value: List[float] = Field(..., description="收盘点数")
+    volume: List[Optional[float]] = Field(..., description="成交量")
+    turnover: List[Optional[float]] = Field(..., description="成交额")
+    change_value: List[float] = Field(..., description="涨跌点数")
+    change_percent: List[float] = Field(..., description="涨跌幅")
+
+
+class IndexHistoryColumnarData(BaseModel):
+    """指数历史数据（列式格式）"""
+    code: str = Field(..., description="指数代码")
+    name: str = Field(..., description="指数名称")
+    data: IndexHistoryColumns = Field(..., description="历史数据")
+    statistics: Optional[Dict[str, Any]] = Field(None, description="统计信息")
+
+
 class IndexComparisonItem(BaseModel):
     """指数对比项"""
     code: str = Field(..., description="指数代码")
@@ -10,12 +10,22 @@ class InvestmentType(str, Enum):
     DCA = "dca"              # 定期定额投资
 
 
+class BacktestStrategy(str, Enum):
+    """回测策略枚举"""
+    LUMP_SUM = "lump_sum"                # 一次性投资
+    DCA = "dca"                          # 定期定额投资
+    VALUE_AVERAGING = "value_averaging"  # 价值平均定投
+    VALUATION = "valuation"              # 按净值分位数调整金额的定投
+
+
 class PredictionRequest(BaseModel):
     """收益预测请求"""
     fund_code: str = Field(..., description="基金代码")
     investment_amount: float = Field(..., description="投资金额", gt=0)
     investment_period: int = Field(..., description="投资期限(月)", gt=0)
     investment_type: InvestmentType = Field(InvestmentType.LUMP_SUM, description="投资类型")
+    method: str = Field("bootstrap", pattern="^(bootstrap|gbm)$",
+                        description="模拟方法: bootstrap(历史收益重抽样), gbm(几何布朗运动)")
 
 
 class DCARequest(BaseModel):
@@ -119,6 +129,10 @@ class BacktestResult(BaseModel):
     sharpe_ratio: float = Field(..., description="夏普比率")
     calmar_ratio: float = Field(..., description="卡玛比率")
     
+    # 参数
+    parameters: Dict[str, float] = Field(default_factory=dict, description="策略参数")
+    parameter_results: List[Dict[str, Any]] = Field(default_factory=list, description="全部参数组合的回测指标")
+    
     # 详细数据
     performance_data: List[Dict[str, Any]] = Field(..., description="业绩数据")
 
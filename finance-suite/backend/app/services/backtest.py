@@ -0,0 +1,172 @@
+"""
+策略回测 - 基于历史净值的向量化回测，一次计算多组策略参数
+
+每个策略只决定"每个扣款日买入多少份额"，得到 扣款期数 × 参数组合 的份额矩阵；
+之后的持仓、现金、账户总值都由 cumsum 展开到每个交易日，形成 交易日 × 参数组合 的账户价值矩阵，
+收益/风险指标用 metrics.compute_metrics_matrix 一次算出。
+
+账户价值 = 未投入的现金 + 持有份额 × 净值，初始为投资总额，现金不计利息，
+因此不同策略（一次性、分批投入）的回撤、夏普比率、卡玛比率可以直接比较。
+"""
+import itertools
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services import metrics
+
+# 策略 -> 参数及默认值
+STRATEGY_PARAMETERS: Dict[str, Dict[str, float]] = {
+    "lump_sum": {},
+    "dca": {},
+    # 目标市值每月按 target_growth（年化）增长
+    "value_averaging": {"target_growth": 0.08},
+    # 扣款日净值在过去 window 个交易日中的分位数低于 threshold 时按 multiplier 倍买入，
+    # 高于 100 - threshold 时按 1 / multiplier 倍买入
+    "valuation": {"threshold": 30.0, "multiplier": 2.0, "window": 756},
+}
+
+
+def parameter_grid(strategy: str, values: Optional[Mapping[str, Sequence[float]]] = None
+                   ) -> List[Dict[str, float]]:
+    """策略参数的全部组合（笛卡尔积），未给出的参数使用默认值"""
+    if strategy not in STRATEGY_PARAMETERS:
+        raise ValueError(f"不支持的回测策略: {strategy}")
+    defaults = STRATEGY_PARAMETERS[strategy]
+    values = values or {}
+    unknown = set(values) - set(defaults)
+    if unknown:
+        raise ValueError(f"策略 {strategy} 不支持参数: {', '.join(sorted(unknown))}")
+    names = list(defaults)
+    choices = [list(values[name]) if values.get(name) else [defaults[name]] for name in names]
+    return [dict(zip(names, combination)) for combination in itertools.product(*choices)]
+
+
+def _capped_purchases(spend: np.ndarray, prices: np.ndarray, budget: float) -> np.ndarray:
+    """按期望买入金额（扣款期数 × 参数组合）计算买入份额，累计投入不超过投资总额
+
+    超出预算的那一期只买入剩余现金，之后不再买入。
+    """
+    cumulative = np.cumsum(spend, axis=0)
+    previous = cumulative - spend
+    spend = np.clip(np.minimum(cumulative, budget) - previous, 0.0, None)
+    return spend / prices[:, None]
+
+
+def _periodic_nav_percentile(nav: np.ndarray, positions: np.ndarray, windows: np.ndarray) -> np.ndarray:
+    """扣款日净值在其之前 window 个交易日（含当日）中的分位数(%)，扣款期数 × 窗口长度"""
+    # 扣款日数量很少，按 扣款日 × 最长窗口 取出回看区间后一次比较
+    longest = int(windows.max())
+    offsets = np.arange(-longest + 1, 1)
+    index = positions[:, None] + offsets[None, :]
+    lookback = np.where(index >= 0, nav[np.clip(index, 0, None)], np.nan)
+    current = nav[positions]
+
+    percentiles = np.empty((len(positions), len(windows)))
+    for j, window in enumerate(windows):
+        recent = lookback[:, longest - int(window):]
+        valid = ~np.isnan(recent)
+        below = ((recent < current[:, None]) & valid).sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            percentiles[:, j] = np.where(valid.sum(axis=1) > 1, below / (valid.sum(axis=1) - 1) * 100, 50.0)
+    return percentiles
+
+
+def strategy_shares(strategy: str, nav: np.ndarray, positions: np.ndarray, budget: float,
+                    grid: List[Dict[str, float]]) -> np.ndarray:
+    """每个扣款日买入的份额，扣款期数 × 参数组合
+
+    lump_sum 在第一个扣款日全部买入；dca 每期买入 budget / 期数；
+    value_averaging 每期补足到目标市值（不卖出）；valuation 按净值分位数调整每期金额。
+    分批策略的累计投入都以 budget 为上限，剩余部分保留为现金。
+    """
+    prices = nav[positions]
+    periods, combinations = len(positions), len(grid)
+    base = budget / periods
+
+    if strategy == "lump_sum":
+        shares = np.zeros((periods, combinations))
+        shares[0] = budget / prices[0]
+        return shares
+
+    if strategy == "dca":
+        return np.broadcast_to((base / prices)[:, None], (periods, combinations)).copy()
+
+    if strategy == "value_averaging":
+        # 第k期目标市值 base × (k + 1) × (1 + g/12)^k；不卖出时持有份额为目标份额的累计最大值
+        growth = np.array([params["target_growth"] for params in grid])
+        k = np.arange(periods)[:, None]
+        target = base * (k + 1) * (1 + growth[None, :] / 12) ** k
+        held = np.maximum.accumulate(target / prices[:, None], axis=0)
+        wanted = np.diff(held, axis=0, prepend=0.0) * prices[:, None]
+        return _capped_purchases(wanted, prices, budget)
+
+    # valuation
+    windows = np.array([params["window"] for params in grid], dtype=int)
+    unique_windows, window_index = np.unique(windows, return_inverse=True)
+    percentile = _periodic_nav_percentile(nav, positions, unique_windows)[:, window_index]
+    threshold = np.array([params["threshold"] for params in grid])[None, :]
+    multiplier = np.array([params["multiplier"] for params in grid])[None, :]
+    scale = np.where(percentile < threshold, multiplier,
+                     np.where(percentile > 100 - threshold, 1 / multiplier, 1.0))
+    return _capped_purchases(base * scale, prices, budget)
+
+
+def run(nav: Any, positions: np.ndarray, budget: float, strategy: str,
+        grid: List[Dict[str, float]], first: int = 0) -> Dict[str, np.ndarray]:
+    """回测全部参数组合，返回每个交易日的持有份额、累计投入、持仓市值、现金和账户总值
+
+    nav 为完整净值序列（可以包含 first 之前用于计算分位数的历史），positions 为扣款日位置；
+    返回的矩阵从 first 开始，形状为 交易日 × 参数组合。
+    """
+    nav = np.asarray(nav, dtype=float)
+    shares = strategy_shares(strategy, nav, positions, budget, grid)
+
+    days = len(nav) - first
+    bought = np.zeros((days, len(grid)))
+    np.add.at(bought, positions - first, shares)
+    spent = np.zeros((days, len(grid)))
+    np.add.at(spent, positions - first, shares * nav[positions][:, None])
+
+    held = np.cumsum(bought, axis=0)
+    invested = np.cumsum(spent, axis=0)
+    market_value = held * nav[first:, None]
+    cash = budget - invested
+    return {
+        "shares": held,
+        "invested": invested,
+        "market_value": market_value,
+        "cash": cash,
+        "total_value": market_value + cash,
+    }
+
+
+def evaluate(ledger: Dict[str, np.ndarray], dates: Sequence[str], budget: float) -> List[Dict[str, Any]]:
+    """每个参数组合的账户价值指标（收益率、回撤等为百分比）"""
+    values = ledger["total_value"]
+    results = metrics.compute_metrics_matrix(values, dates, [str(i) for i in range(values.shape[1])])
+    return [
+        {
+            **results[str(i)],
+            "final_value": float(values[-1, i]),
+            "invested": float(ledger["invested"][-1, i]),
+            "total_profit": float(values[-1, i] - budget),
+        }
+        for i in range(values.shape[1])
+    ]
+
+
+def best_combination(results: List[Dict[str, Any]], key: str = "sharpe_ratio") -> int:
+    """按指标选出最优参数组合的编号"""
+    return int(np.argmax([result.get(key, float("-inf")) for result in results]))
+
+
+def performance_rows(ledger: Dict[str, np.ndarray], dates: Sequence[str], nav: np.ndarray,
+                     column: int) -> List[Dict[str, Any]]:
+    """单个参数组合的逐日账户明细"""
+    columns: Tuple[str, ...] = ("shares", "invested", "market_value", "cash", "total_value")
+    values = {name: ledger[name][:, column].tolist() for name in columns}
+    return [
+        {"date": date, "nav": price, **{name: values[name][i] for name in columns}}
+        for i, (date, price) in enumerate(zip(dates, np.asarray(nav, dtype=float).tolist()))
+    ]
@@ -0,0 +1,71 @@
+"""
+服务容器 - 应用级共享的适配器和业务服务，在应用生命周期内创建和关闭
+"""
+import asyncio
+import logging
+from contextlib import suppress
+from typing import Any, Dict, Optional
+
+from app.adapters.akshare_adapter import AKShareAdapter
+from app.core.config import settings
+from app.services.fund_directory import FundDirectory
+from app.services.fund_service import FundService
+from app.services.index_catalog import IndexCatalog
+from app.services.index_service import IndexService
+from app.services.prediction_service import PredictionService
+from app.services.refresh_scheduler import create_scheduler
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    """应用级服务容器
+
+    所有路由共享同一个适配器（及其缓存、请求合并器和线程池）和同一组服务实例；
+    指数目录和基金目录也由容器创建，使用同一个适配器。
+    """
+
+    def __init__(self, adapter: Optional[AKShareAdapter] = None, catalog: Optional[IndexCatalog] = None):
+        self.adapter = adapter or AKShareAdapter()
+        self.catalog = catalog if catalog is not None else IndexCatalog(self.adapter)
+        self.fund_directory = FundDirectory(self.adapter)
+        self.fund_service = FundService(self.adapter, self.fund_directory)
+        self.index_service = IndexService(self.adapter, self.catalog)
+        self.prediction_service = PredictionService(self.fund_service)
+        self.scheduler = create_scheduler(self.adapter, self.catalog, self.fund_directory)
+        self._catalog_task: Optional["asyncio.Task[bool]"] = None
+
+    async def start(self) -> None:
+        """恢复本地指数目录，启动后台预取调度（含指数目录刷新）"""
+        await self.catalog.restore()
+        if settings.SCHEDULER_ENABLED:
+            self.scheduler.start()
+        else:
+            # 不启用预取时仍需在启动时加载一次指数目录
+            self._catalog_task = asyncio.create_task(self.catalog.load())
+
+    async def shutdown(self, timeout: float = settings.SHUTDOWN_DRAIN_TIMEOUT) -> None:
+        """停止后台任务，等待进行中的上游请求完成后关闭线程池"""
+        await self.scheduler.stop()
+        if self._catalog_task is not None:
+            self._catalog_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._catalog_task
+
+        pending = await self.adapter.flight.drain(timeout)
+        if pending:
+            logger.warning(f"关闭时仍有 {pending} 个上游请求未完成，放弃等待")
+        # 已等待过进行中的请求，剩余线程不再阻塞关闭
+        self.adapter.executor.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """运行时统计（缓存命中率、后台刷新等）"""
+        return {
+            "scheduler": self.scheduler.stats(),
+            "cache": self.adapter.cache.stats(),
+            "singleflight": self.adapter.flight.stats(),
+            "executor": self.adapter.executor.stats(),
+            "valuation": self.adapter.valuation.stats(),
+            "fund_directory": self.fund_directory.stats(),
+            "index_catalog": self.catalog.stats(),
+        }
@@ -0,0 +1,98 @@
+"""
+DataFrame -> 响应模型的批量转换
+
+按列一次性转换为Python原生类型，再用 model_construct 构建模型（跳过逐字段校验），
+避免 iterrows 逐行创建 Series 和逐行校验的开销。
+"""
+from typing import Any, Dict, List, Optional, Type, TypeVar
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+from app.schemas.fund_schemas import FundBaseInfo, FundDataPoint
+from app.schemas.index_schemas import IndexDataPoint
+from app.schemas.prediction_schemas import DCADataPoint
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def _float_column(df: pd.DataFrame, column: str) -> List[Optional[float]]:
+    """数值列转为float列表，缺失值（或缺失整列）为None"""
+    if column not in df.columns:
+        return [None] * len(df)
+    values = pd.to_numeric(df[column], errors="coerce").astype(float)
+    return values.astype(object).where(values.notna(), None).tolist()
+
+
+def _str_column(df: pd.DataFrame, column: str) -> List[str]:
+    """列转为str列表，缺失值（或缺失整列）为空字符串"""
+    if column not in df.columns:
+        return [""] * len(df)
+    return df[column].fillna("").astype(str).tolist()
+
+
+def _construct_rows(model: Type[ModelT], columns: Dict[str, list]) -> List[ModelT]:
+    """列式数据逐行构建模型"""
+    construct = model.model_construct
+    names = list(columns)
+    return [construct(**dict(zip(names, values))) for values in zip(*columns.values())]
+
+
+def fund_history_columns(df: pd.DataFrame) -> Dict[str, list]:
+    """基金净值序列（净值日期/单位净值/累计净值/日增长率）转换为列式数据"""
+    return {
+        "date": _str_column(df, "净值日期"),
+        "unit_net_value": _float_column(df, "单位净值"),
+        "accumulated_net_value": _float_column(df, "累计净值"),
+        "daily_growth_rate": _float_column(df, "日增长率"),
+    }
+
+
+def fund_data_points(columns: Dict[str, list]) -> List[FundDataPoint]:
+    """列式基金净值数据转换为数据点"""
+    return _construct_rows(FundDataPoint, columns)
+
+
+def index_history_columns(df: pd.DataFrame) -> Dict[str, list]:
+    """指数日线（date/open/close/high/low/volume/amount）转换为列式数据，并计算涨跌和涨跌幅"""
+    close = pd.to_numeric(df["close"], errors="coerce").to_numpy(dtype=float)
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    change = close - prev_close
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct_change = np.where(prev_close > 0, change / prev_close * 100, 0.0)
+
+    return {
+        "date": _str_column(df, "date"),
+        "open_value": _float_column(df, "open"),
+        "high_value": _float_column(df, "high"),
+        "low_value": _float_column(df, "low"),
+        "close_value": close.tolist(),
+        "volume": _float_column(df, "volume"),
+        "turnover": _float_column(df, "amount"),
+        # 第一天没有前收盘价，涨跌记为0
+        "change_value": np.nan_to_num(np.round(change, 2)).tolist(),
+        "change_percent": np.nan_to_num(np.round(pct_change, 2)).tolist(),
+    }
+
+
+def index_data_points(columns: Dict[str, list]) -> List[IndexDataPoint]:
+    """列式指数数据转换为数据点"""
+    return _construct_rows(IndexDataPoint, columns)
+
+
+def dca_data_points(columns: Dict[str, Any]) -> List[DCADataPoint]:
+    """列式定投账本（每个字段一个数组）转换为数据点"""
+    return _construct_rows(DCADataPoint, {
+        name: values.tolist() if isinstance(values, np.ndarray) else list(values)
+        for name, values in columns.items()
+    })
+
+
+def fund_base_infos(entries: List[Dict[str, Any]]) -> List[FundBaseInfo]:
+    """基金目录条目转换为基础信息"""
+    construct = FundBaseInfo.model_construct
+    return [
+        construct(code=entry["code"], name=entry["name"], fund_type=entry["fund_type"], company=entry["company"])
+        for entry in entries
+    ]
@@ -0,0 +1,107 @@
+"""
+定投计算 - 基于历史净值的向量化定投账本
+
+扣款日、买入份额、累计份额、市值和收益都由 searchsorted / cumsum 一次算出，没有按期的循环；
+价格可以是一维（单只基金）或 期数 × 基金 的二维数组，多只基金一次计算。
+"""
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# 持有期短于一天时不计算年化收益率（年化倍数过大，没有意义）
+MIN_ANNUALIZE_YEARS = 1 / 365
+
+
+def purchase_positions(dates: Any, start_date: str, months: int) -> np.ndarray:
+    """每月扣款日在净值日期序列中的位置
+
+    扣款日为 start_date 起每月同一天，遇到非交易日顺延到下一个有净值的日期；
+    超出净值序列末尾的期数不返回。dates 需按日期升序。
+    """
+    dates = pd.to_datetime(pd.Series(dates)).to_numpy().astype("datetime64[D]")
+    start = pd.Timestamp(start_date)
+    # 每期都以 start_date 的日为准（月末日超出当月天数时取当月最后一天），不随短月份漂移
+    month_starts = np.datetime64(start.strftime("%Y-%m"), "M") + np.arange(months)
+    month_ends = (month_starts + 1).astype("datetime64[D]") - 1
+    targets = np.minimum(month_starts.astype("datetime64[D]") + (start.day - 1), month_ends)
+    positions = np.searchsorted(dates, targets, side="left")
+    return positions[positions < len(dates)]
+
+
+def dca_ledger(prices: Any, amount: Any) -> Dict[str, np.ndarray]:
+    """定投账本：每期的投入金额、买入份额、累计投入、累计份额、市值、收益和收益率(%)
+
+    prices 为每个扣款日的净值（第0维为期数），amount 为每期金额（标量或与 prices 同形状）。
+    """
+    prices = np.asarray(prices, dtype=float)
+    amounts = np.broadcast_to(np.asarray(amount, dtype=float), prices.shape)
+    shares = amounts / prices
+    cumulative_investment = np.cumsum(amounts, axis=0)
+    cumulative_shares = np.cumsum(shares, axis=0)
+    market_value = cumulative_shares * prices
+    total_return = market_value - cumulative_investment
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return_rate = np.where(cumulative_investment > 0, total_return / cumulative_investment * 100, 0.0)
+    return {
+        "investment_amount": amounts,
+        "shares_purchased": shares,
+        "cumulative_investment": cumulative_investment,
+        "cumulative_shares": cumulative_shares,
+        "market_value": market_value,
+        "total_return": total_return,
+        "return_rate": return_rate,
+    }
+
+
+def money_weighted_return(amounts: Any, years_to_end: Any, final_value: Any,
+                          iterations: int = 50) -> np.ndarray:
+    """资金加权年化收益率(%)：求 r 使 Σ amount_i × (1 + r) ^ years_to_end_i = final_value
+
+    amounts / years_to_end 的第0维为期数，final_value 为每只基金的期末价值；
+    牛顿迭代对所有基金同时进行。投资期短于一天的基金返回0。
+    """
+    amounts = np.asarray(amounts, dtype=float)
+    years = np.broadcast_to(np.asarray(years_to_end, dtype=float).reshape((-1,) + (1,) * (amounts.ndim - 1)),
+                            amounts.shape)
+    final_value = np.asarray(final_value, dtype=float)
+    invested = amounts.sum(axis=0)
+    horizon = np.maximum(years.max(axis=0), 1e-9)
+
+    # 以简单年化作为初值
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        rate = np.where(invested > 0, (final_value / invested) ** (1 / horizon) - 1, 0.0)
+    rate = np.clip(np.nan_to_num(rate), -0.99, 10.0)
+    for _ in range(iterations):
+        growth = (1 + rate) ** years
+        value = (amounts * growth).sum(axis=0) - final_value
+        derivative = (amounts * years * growth / (1 + rate)).sum(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = np.where(derivative > 0, value / derivative, 0.0)
+        rate = np.clip(rate - step, -0.99, 10.0)
+        if np.all(np.abs(step) < 1e-10):
+            break
+    return np.where(horizon >= MIN_ANNUALIZE_YEARS, rate * 100, 0.0)
+
+
+def lump_sum_comparison(total: float, entry_price: Any, exit_price: Any, years: float,
+                        dca_final_value: Optional[Any] = None) -> Dict[str, Any]:
+    """同样的总金额在首个扣款日一次性买入，持有到期末的结果"""
+    entry_price = np.asarray(entry_price, dtype=float)
+    exit_price = np.asarray(exit_price, dtype=float)
+    final_value = total * exit_price / entry_price
+    growth = final_value / total
+    if years < MIN_ANNUALIZE_YEARS:
+        annualized = np.zeros_like(growth)
+    else:
+        annualized = np.where(growth > 0, (np.maximum(growth, 0) ** (1 / years) - 1) * 100, -100.0)
+    comparison = {
+        "lump_sum_final_value": final_value,
+        "lump_sum_total_return": final_value - total,
+        "lump_sum_return_rate": (growth - 1) * 100,
+        "lump_sum_annualized_return": annualized,
+    }
+    if dca_final_value is not None:
+        # 正数表示定投优于一次性投资
+        comparison["dca_advantage"] = np.asarray(dca_final_value, dtype=float) - final_value
+    return comparison
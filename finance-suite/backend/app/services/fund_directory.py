@@ -0,0 +1,196 @@
+"""
+基金目录服务 - 全部公募基金的代码、简称、类型、基金公司和拼音缩写
+
+基金列表来自 fund_name_em，基金公司来自基金经理列表（fund_manager_em）。
+加载时一次性完成类型分类并建立按类型、按基金公司的二级索引，
+并建立代码/简称/拼音缩写的搜索索引。列表分页、搜索和名称查询都在内存中完成，
+不再为了显示名称请求基金详情接口。
+"""
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from app.adapters.akshare_adapter import AKShareAdapter
+from app.schemas.fund_schemas import FundType
+from app.services.search_index import SearchIndex
+
+logger = logging.getLogger(__name__)
+
+# 基金类型（fund_name_em 的"基金类型"前缀） -> FundType，按顺序匹配
+FUND_CATEGORY_TYPES = [
+    ("货币", FundType.MONEY),
+    ("QDII", FundType.QDII),
+    ("指数", FundType.INDEX),
+    ("股票", FundType.STOCK),
+    ("债券", FundType.BOND),
+    ("混合", FundType.HYBRID),
+]
+
+
+def classify_fund_type(name: str, category: str = "") -> FundType:
+    """判断基金类型：优先按基金类型字段，无法识别时按基金简称中的关键词"""
+    for keyword, fund_type in FUND_CATEGORY_TYPES:
+        if category.startswith(keyword):
+            return fund_type
+
+    name = name.lower()
+    if '指数' in name or 'etf' in name:
+        return FundType.INDEX
+    elif '债券' in name or '债' in name:
+        return FundType.BOND
+    elif '股票' in name:
+        return FundType.STOCK
+    elif '货币' in name:
+        return FundType.MONEY
+    elif 'qdii' in name:
+        return FundType.QDII
+    else:
+        return FundType.HYBRID
+
+
+class FundDirectory:
+    """基金目录
+
+    首次查询时加载，之后由后台调度器随基金列表一起刷新。
+    加载失败时保留现有数据，retry_interval 秒内不再重试。
+    基金公司映射单独加载（下载较慢），加载前 company 为空字符串。
+    """
+
+    def __init__(self, adapter: AKShareAdapter, retry_interval: float = 60):
+        self.adapter = adapter
+        self.retry_interval = retry_interval
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        # 按代码排序的全部基金，以及按类型/基金公司的二级索引（均为排好序的代码列表）
+        self._codes: List[str] = []
+        self._by_type: Dict[FundType, List[str]] = {}
+        self._by_company: Dict[str, List[str]] = {}
+        self._companies: Dict[str, str] = {}
+        self._search = SearchIndex()
+        self.loaded_at: Optional[float] = None
+        self._last_attempt: Optional[float] = None
+
+    async def load(self) -> bool:
+        """从基金列表加载目录，失败时保留现有数据"""
+        self._last_attempt = time.monotonic()
+        df = await self.adapter.get_fund_list()
+        if df is None or df.empty or "基金代码" not in df.columns:
+            logger.warning("加载基金目录失败，继续使用现有目录")
+            return False
+
+        # 分类和建索引是纯CPU操作（上万只基金），放到线程池中执行，不阻塞事件循环
+        entries, by_type, search = await self.adapter.executor.run("metadata", self._build, df, dict(self._companies))
+
+        self._entries = entries
+        self._codes = list(entries)
+        self._by_type = by_type
+        self._by_company = self._index_companies(entries)
+        self._search = search
+        self.loaded_at = time.monotonic()
+        logger.info(f"加载基金目录成功: {len(entries)} 只基金")
+        return True
+
+    @staticmethod
+    def _build(df: pd.DataFrame, companies: Dict[str, str]
+               ) -> Tuple[Dict[str, Dict[str, Any]], Dict[FundType, List[str]], SearchIndex]:
+        """由基金列表构建目录条目、类型索引和搜索索引"""
+        df = df.fillna("").drop_duplicates(subset="基金代码", keep="last").sort_values("基金代码")
+        columns = [
+            df[column].astype(str).tolist() if column in df.columns else [""] * len(df)
+            for column in ("基金代码", "基金简称", "基金类型", "拼音缩写")
+        ]
+        entries = {
+            code: {
+                "code": code,
+                "name": name,
+                "category": category,
+                "fund_type": classify_fund_type(name, category),
+                "company": companies.get(code, ""),
+                "pinyin_initials": initials,
+            }
+            for code, name, category, initials in zip(*columns)
+        }
+
+        by_type: Dict[FundType, List[str]] = {}
+        for code, entry in entries.items():
+            by_type.setdefault(entry["fund_type"], []).append(code)
+        return entries, by_type, SearchIndex(entries.values())
+
+    async def load_companies(self) -> bool:
+        """加载基金代码 -> 基金公司映射并更新目录，失败时保留现有数据"""
+        df = await self.adapter.get_fund_companies()
+        if df is None or df.empty:
+            logger.warning("加载基金公司失败，继续使用现有数据")
+            return False
+
+        self._companies = dict(zip(df["基金代码"].astype(str), df["基金公司"].astype(str)))
+        for code, entry in self._entries.items():
+            entry["company"] = self._companies.get(code, "")
+        self._by_company = self._index_companies(self._entries)
+        logger.info(f"加载基金公司成功: {len(self._by_company)} 家公司")
+        return True
+
+    @staticmethod
+    def _index_companies(entries: Dict[str, Dict[str, Any]]) -> Dict[str, List[str]]:
+        by_company: Dict[str, List[str]] = {}
+        for code, entry in entries.items():
+            if entry["company"]:
+                by_company.setdefault(entry["company"], []).append(code)
+        return by_company
+
+    async def ensure_loaded(self) -> None:
+        """尚未加载时加载一次（失败后按重试间隔限流）"""
+        if self.loaded_at is not None:
+            return
+        if self._last_attempt is not None and time.monotonic() - self._last_attempt < self.retry_interval:
+            return
+        await self.load()
+
+    async def resolve(self, code: str) -> Optional[Dict[str, Any]]:
+        """查询基金元数据，目录中没有时返回None"""
+        await self.ensure_loaded()
+        return self._entries.get(code)
+
+    async def resolve_name(self, code: str) -> str:
+        """查询基金简称，目录中没有时返回代码"""
+        entry = await self.resolve(code)
+        return entry["name"] if entry and entry["name"] else code
+
+    def page(self, fund_type: Optional[FundType] = None, company: Optional[str] = None,
+             page: int = 1, size: int = 20) -> Tuple[List[Dict[str, Any]], int]:
+        """按类型/基金公司筛选后分页，返回 (当前页基金, 筛选后总数)
+
+        只按一个条件筛选时直接切片对应的索引列表；同时按两个条件时在基金公司的列表上按类型过滤。
+        """
+        if company is not None:
+            codes = self._by_company.get(company, [])
+            if fund_type is not None:
+                codes = [code for code in codes if self._entries[code]["fund_type"] == fund_type]
+        elif fund_type is not None:
+            codes = self._by_type.get(fund_type, [])
+        else:
+            codes = self._codes
+
+        start = (page - 1) * size
+        return [self._entries[code] for code in codes[start:start + size]], len(codes)
+
+    async def search(self, keyword: str, limit: int = 10,
+                     fund_type: Optional[FundType] = None) -> List[Dict[str, Any]]:
+        """按代码、简称或拼音缩写搜索基金，可按类型筛选"""
+        await self.ensure_loaded()
+        predicate = (lambda entry: entry["fund_type"] == fund_type) if fund_type is not None else None
+        return self._search.search(keyword, limit, predicate)
+
+    def stats(self) -> Dict[str, Any]:
+        """目录统计信息"""
+        return {
+            "funds": len(self._entries),
+            "types": {fund_type.value: len(codes) for fund_type, codes in self._by_type.items()},
+            "companies": len(self._by_company),
+            "loaded": self.loaded_at is not None,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
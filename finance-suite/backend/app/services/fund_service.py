@@ -1,15 +1,20 @@
 import logging
 import asyncio
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
 from datetime import datetime, timedelta
 import pandas as pd
-import numpy as np
 
-from app.adapters.akshare_adapter import AKShareAdapter
+from app.adapters.akshare_adapter import FUND_NAV_COLUMNS, AKShareAdapter
+from app.adapters.history_store import SERIES_COLUMNS
+from app.services.converters import fund_base_infos, fund_data_points, fund_history_columns
+from app.services.fund_directory import FundDirectory, classify_fund_type
+from app.services import metrics
+from app.services.refresh_scheduler import hot_symbols
 from app.schemas.fund_schemas import (
-    FundBaseInfo, FundInfo, FundDataPoint, FundHistoryData,
+    FundBaseInfo, FundInfo, FundHistoryData,
     FundComparisonItem, FundComparisonResponse, FundListResponse,
-    FundType, FundRealtimeData, FundPerformanceAnalysis
+    FundType, FundRealtimeData, FundPerformanceAnalysis,
+    FundHistoryColumnarData, FundHistoryColumns
 )
 
 logger = logging.getLogger(__name__)
@@ -18,38 +23,27 @@ logger = logging.getLogger(__name__)
 class FundService:
     """基金服务类"""
     
-    def __init__(self):
-        self.adapter = AKShareAdapter()
+    def __init__(self, adapter: AKShareAdapter, directory: FundDirectory):
+        self.adapter = adapter
+        self.directory = directory
     
     async def get_fund_list(self, fund_type: Optional[str] = None, 
-                          page: int = 1, size: int = 20) -> FundListResponse:
-        """获取基金列表"""
+                          page: int = 1, size: int = 20, company: Optional[str] = None) -> FundListResponse:
+        """获取基金列表（全部基金，可按类型和基金公司筛选）"""
         try:
-            funds_df = await self.adapter.get_fund_list()
+            selected_type = FundType(fund_type) if fund_type else None
             
-            if funds_df is None or funds_df.empty:
+            await self.directory.ensure_loaded()
+            if not len(self.directory):
                 return FundListResponse(
                     success=True, data=[], total=0, page=page, size=size,
                     message="暂无基金数据"
                 )
             
-            # 分页处理
-            total = min(len(funds_df), 100)  # 限制数量避免超时
-            start_idx = (page - 1) * size
-            end_idx = min(start_idx + size, total)
-            paged_df = funds_df.iloc[start_idx:end_idx]
-            
-            funds = []
-            for _, row in paged_df.iterrows():
-                funds.append(FundBaseInfo(
-                    code=str(row.get('基金代码', '')),
-                    name=str(row.get('基金简称', '')),
-                    fund_type=FundType.HYBRID,  # 简化处理
-                    company=str(row.get('基金公司', ''))
-                ))
+            entries, total = self.directory.page(selected_type, company, page, size)
             
             return FundListResponse(
-                success=True, data=funds, total=total, page=page, size=size,
+                success=True, data=fund_base_infos(entries), total=total, page=page, size=size,
                 message="获取基金列表成功"
             )
         except Exception as e:
@@ -60,6 +54,16 @@ class FundService:
                 total=0, page=page, size=size, message=f"获取基金列表失败: {str(e)}"
             )
     
+    async def search_funds(self, keyword: str, size: int = 10,
+                           fund_type: Optional[str] = None) -> List[FundBaseInfo]:
+        """按代码、简称或拼音缩写搜索基金"""
+        try:
+            selected_type = FundType(fund_type) if fund_type else None
+            return fund_base_infos(await self.directory.search(keyword, size, selected_type))
+        except Exception as e:
+            logger.error(f"搜索基金失败: {str(e)}")
+            return []
+    
     async def get_fund_info(self, fund_code: str) -> Optional[FundInfo]:
         """获取基金详细信息"""
         try:
@@ -67,6 +71,7 @@ class FundService:
             if not basic_info:
                 logger.error(f"获取基金基本信息失败: {fund_code}")
                 return None
+            hot_symbols.record("fund", fund_code)
             
             nav_info = await self.adapter.get_fund_nav(fund_code)
             
@@ -89,70 +94,103 @@ class FundService:
             logger.error(f"获取基金信息失败: {str(e)}")
             return None
     
-    async def get_fund_history(self, fund_code: str, start_date: str, 
-                             end_date: str) -> FundHistoryData:
-        """获取基金历史净值数据"""
+    async def get_fund_history(self, fund_code: str, start_date: str, end_date: str,
+                               columnar: bool = False) -> Union[FundHistoryData, FundHistoryColumnarData]:
+        """获取基金历史净值数据，columnar为True时按列返回（每个字段一个数组）"""
         try:
             df = await self.adapter.get_fund_history(fund_code, start_date, end_date)
             
             if df is None or df.empty:
                 raise ValueError(f"无法获取基金 {fund_code} 的历史数据")
+            hot_symbols.record("fund", fund_code)
             
-            data_points = []
-            for _, row in df.iterrows():
-                data_points.append(FundDataPoint(
-                    date=row['净值日期'],
-                    unit_net_value=float(row['单位净值']),
-                    accumulated_net_value=float(row['累计净值']),
-                    daily_growth_rate=float(row.get('日增长率', 0)) if pd.notnull(row.get('日增长率')) else None
-                ))
+            columns = fund_history_columns(df)
             
-            statistics = self._calculate_fund_statistics(df)
-            fund_info = await self.get_fund_info(fund_code)
-            fund_name = fund_info.name if fund_info else fund_code
+            # 一次计算全部收益/风险指标，对比和业绩分析直接复用
+            statistics = metrics.compute_metrics(df['单位净值'], df['净值日期'])
+            fund_name = await self.directory.resolve_name(fund_code)
             
+            if columnar:
+                return FundHistoryColumnarData.model_construct(
+                    code=fund_code, name=fund_name,
+                    data=FundHistoryColumns.model_construct(**columns), statistics=statistics
+                )
             return FundHistoryData(
-                code=fund_code, name=fund_name, data=data_points, statistics=statistics
+                code=fund_code, name=fund_name,
+                data=fund_data_points(columns), statistics=statistics
             )
         except Exception as e:
             logger.error(f"获取基金历史数据失败: {str(e)}")
             raise
     
+    async def get_fund_history_frame(self, fund_code: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """获取基金历史净值的DataFrame（英文列名），用于二进制格式导出"""
+        df = await self.adapter.get_fund_history(fund_code, start_date, end_date)
+        if df is None or df.empty:
+            raise ValueError(f"无法获取基金 {fund_code} 的历史数据")
+        hot_symbols.record("fund", fund_code)
+        return df.rename(columns=FUND_NAV_COLUMNS).reindex(columns=["date", *SERIES_COLUMNS["fund_nav"]])
+    
+    async def compare_funds_frame(self, fund_codes: List[str], start_date: str, end_date: str) -> pd.DataFrame:
+        """获取多个基金的历史净值（长表，code列区分基金），用于二进制格式导出"""
+        results = await asyncio.gather(
+            *(self.get_fund_history_frame(code, start_date, end_date) for code in fund_codes),
+            return_exceptions=True
+        )
+        frames = [
+            df.assign(code=code) for code, df in zip(fund_codes, results) if not isinstance(df, Exception)
+        ]
+        if not frames:
+            raise ValueError("无法获取任何基金的历史数据")
+        df = pd.concat(frames, ignore_index=True)
+        return df[["code", *(col for col in df.columns if col != "code")]]
+    
     async def compare_funds(self, fund_codes: List[str], start_date: str, 
                           end_date: str) -> FundComparisonResponse:
-        """对比多个基金"""
+        """对比多个基金
+        
+        所有基金的净值按日期对齐为一个 日期 × 基金 矩阵，一次计算全部指标和相关性。
+        """
         try:
-            comparison_items = []
-            all_data = {}
+            results = await asyncio.gather(
+                *(self.adapter.get_fund_history(code, start_date, end_date) for code in fund_codes),
+                return_exceptions=True
+            )
+            histories = {
+                code: df for code, df in zip(fund_codes, results)
+                if not isinstance(df, Exception) and df is not None and not df.empty
+            }
+            for code in histories:
+                hot_symbols.record("fund", code)
+            if not histories:
+                return FundComparisonResponse(
+                    success=True, data=[], comparison_metrics={}, message="无法获取任何基金的历史数据"
+                )
             
-            tasks = [self.get_fund_history(code, start_date, end_date) for code in fund_codes]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            codes = list(histories)
             
-            for i, result in enumerate(results):
-                if isinstance(result, Exception):
-                    continue
-                
-                code = fund_codes[i]
-                history_data = result
-                
-                df = pd.DataFrame([{
-                    'date': point.date,
-                    'unit_net_value': point.unit_net_value
-                } for point in history_data.data])
-                
-                performance = self._calculate_fund_performance(df)
-                risk_metrics = self._calculate_fund_risk_metrics(df)
-                all_data[code] = df
-                
-                fund_info = await self.get_fund_info(code)
-                fund_type = fund_info.fund_type if fund_info else FundType.HYBRID
-                
+            wide = metrics.align_prices({
+                code: pd.to_numeric(df['单位净值'], errors="coerce").set_axis(df['净值日期'].astype(str))
+                for code, df in histories.items()
+            })
+            prices = wide.to_numpy(dtype=float)
+            all_data = metrics.compute_metrics_matrix(prices, wide.index, codes)
+            
+            comparison_items = []
+            for code in codes:
+                statistics = all_data[code]
+                entry = await self.directory.resolve(code)
                 comparison_items.append(FundComparisonItem(
-                    code=code, name=history_data.name, fund_type=fund_type,
-                    data=history_data.data, performance=performance, risk_metrics=risk_metrics
+                    code=code,
+                    name=entry["name"] if entry else code,
+                    fund_type=entry["fund_type"] if entry else FundType.HYBRID,
+                    data=fund_data_points(fund_history_columns(histories[code])),
+                    performance=metrics.pick(statistics, metrics.RETURN_METRICS),
+                    risk_metrics=metrics.pick(statistics, metrics.RISK_METRICS)
                 ))
             
             comparison_metrics = self._calculate_comparison_metrics(all_data)
+            comparison_metrics.update(metrics.correlation_matrices(prices, codes))
             
             return FundComparisonResponse(
                 success=True, data=comparison_items, 
@@ -168,9 +206,9 @@ class FundService:
             data = await self.adapter.get_fund_realtime(fund_code)
             if not data:
                 raise ValueError(f"无法获取基金 {fund_code} 的实时数据")
+            hot_symbols.record("fund", fund_code)
             
-            fund_info = await self.get_fund_info(fund_code)
-            fund_name = fund_info.name if fund_info else fund_code
+            fund_name = await self.directory.resolve_name(fund_code)
             
             return FundRealtimeData(
                 code=fund_code, name=fund_name,
@@ -178,7 +216,8 @@ class FundService:
                 accumulated_net_value=data.get("累计净值", 0),
                 net_value_date=data.get("净值日期", ""),
                 day_growth_rate=data.get("日增长率", 0),
-                last_update=datetime.now()
+                last_update=data.get("last_update") or datetime.now(),
+                stale=data.get("stale", False)
             )
         except Exception as e:
             logger.error(f"获取实时数据失败: {str(e)}")
@@ -187,25 +226,20 @@ class FundService:
     async def get_performance_analysis(self, fund_code: str) -> FundPerformanceAnalysis:
         """获取基金业绩分析"""
         try:
-            fund_info = await self.get_fund_info(fund_code)
-            if not fund_info:
-                raise ValueError(f"基金 {fund_code} 不存在")
-            
             end_date = datetime.now().strftime("%Y-%m-%d")
             start_date = (datetime.now() - timedelta(days=1095)).strftime("%Y-%m-%d")
             
+            # 没有净值数据时 get_fund_history 抛出异常，名称也由它从基金目录取得
             history_data = await self.get_fund_history(fund_code, start_date, end_date)
             
-            df = pd.DataFrame([{
-                'unit_net_value': point.unit_net_value
-            } for point in history_data.data])
+            statistics = history_data.statistics or {}
             
-            return_metrics = self._calculate_fund_performance(df)
-            risk_metrics = self._calculate_fund_risk_metrics(df)
-            risk_adjusted_metrics = self._calculate_risk_adjusted_metrics(df)
+            return_metrics = metrics.pick(statistics, metrics.RETURN_METRICS)
+            risk_metrics = metrics.pick(statistics, metrics.RISK_METRICS)
+            risk_adjusted_metrics = metrics.pick(statistics, metrics.RISK_ADJUSTED_METRICS)
             
             return FundPerformanceAnalysis(
-                code=fund_code, name=fund_info.name,
+                code=fund_code, name=history_data.name,
                 return_metrics=return_metrics, risk_metrics=risk_metrics,
                 risk_adjusted_metrics=risk_adjusted_metrics,
                 last_update=datetime.now()
@@ -216,104 +250,18 @@ class FundService:
     
     def _determine_fund_type(self, fund_info: Dict[str, Any]) -> FundType:
         """判断基金类型"""
-        fund_name = fund_info.get('基金简称', '').lower()
-        
-        if '指数' in fund_name or 'etf' in fund_name:
-            return FundType.INDEX
-        elif '债券' in fund_name or '债' in fund_name:
-            return FundType.BOND
-        elif '股票' in fund_name:
-            return FundType.STOCK
-        elif '货币' in fund_name:
-            return FundType.MONEY
-        elif 'qdii' in fund_name:
-            return FundType.QDII
-        else:
-            return FundType.HYBRID
-    
-    def _calculate_fund_statistics(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """计算基金统计信息"""
-        try:
-            df['pct_change'] = df['单位净值'].pct_change()
-            
-            return {
-                "total_return": float((df['单位净值'].iloc[-1] / df['单位净值'].iloc[0] - 1) * 100),
-                "volatility": float(df['pct_change'].std() * np.sqrt(252) * 100),
-                "max_drawdown": float(self._calculate_max_drawdown(df['单位净值'])),
-                "sharpe_ratio": float(self._calculate_sharpe_ratio(df['pct_change']))
-            }
-        except Exception:
-            return {}
-    
-    def _calculate_fund_performance(self, df: pd.DataFrame) -> Dict[str, float]:
-        """计算基金表现指标"""
-        try:
-            df['pct_change'] = df['unit_net_value'].pct_change()
-            
-            return {
-                "total_return": float((df['unit_net_value'].iloc[-1] / df['unit_net_value'].iloc[0] - 1) * 100),
-                "annualized_return": float(((df['unit_net_value'].iloc[-1] / df['unit_net_value'].iloc[0]) ** (252 / len(df)) - 1) * 100)
-            }
-        except Exception:
-            return {}
-    
-    def _calculate_fund_risk_metrics(self, df: pd.DataFrame) -> Dict[str, float]:
-        """计算基金风险指标"""
-        try:
-            df['pct_change'] = df['unit_net_value'].pct_change()
-            
-            return {
-                "volatility": float(df['pct_change'].std() * np.sqrt(252) * 100),
-                "max_drawdown": float(self._calculate_max_drawdown(df['unit_net_value']))
-            }
-        except Exception:
-            return {}
-    
-    def _calculate_risk_adjusted_metrics(self, df: pd.DataFrame) -> Dict[str, float]:
-        """计算风险调整后指标"""
-        try:
-            df['pct_change'] = df['unit_net_value'].pct_change()
-            
-            return {
-                "sharpe_ratio": float(self._calculate_sharpe_ratio(df['pct_change']))
-            }
-        except Exception:
-            return {}
+        return classify_fund_type(fund_info.get('基金简称', ''), fund_info.get('基金类型', ''))
     
-    def _calculate_comparison_metrics(self, all_data: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
+    def _calculate_comparison_metrics(self, all_data: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
         """计算对比指标"""
         try:
-            metrics = {"best_performer": "", "worst_performer": ""}
+            comparison = {"best_performer": "", "worst_performer": ""}
             
-            if len(all_data) > 1:
-                performance = {}
-                for code, df in all_data.items():
-                    total_return = (df['unit_net_value'].iloc[-1] / df['unit_net_value'].iloc[0] - 1) * 100
-                    performance[code] = total_return
-                
-                if performance:
-                    metrics["best_performer"] = max(performance, key=performance.get)
-                    metrics["worst_performer"] = min(performance, key=performance.get)
+            ranking = metrics.rank(all_data, "total_return")
+            if len(ranking) > 1:
+                comparison["best_performer"] = ranking[0]
+                comparison["worst_performer"] = ranking[-1]
             
-            return metrics
+            return comparison
         except Exception:
             return {}
-    
-    def _calculate_max_drawdown(self, prices: pd.Series) -> float:
-        """计算最大回撤"""
-        try:
-            cumulative = (1 + prices.pct_change()).cumprod()
-            running_max = cumulative.expanding().max()
-            drawdown = (cumulative - running_max) / running_max
-            return abs(drawdown.min()) * 100
-        except:
-            return 0.0
-    
-    def _calculate_sharpe_ratio(self, returns: pd.Series, risk_free_rate: float = 0.03) -> float:
-        """计算夏普比率"""
-        try:
-            excess_return = returns.mean() * 252 - risk_free_rate
-            volatility = returns.std() * np.sqrt(252)
-            return excess_return / volatility if volatility > 0 else 0.0
-        except:
-            return 0.0 
\ No newline at end of file
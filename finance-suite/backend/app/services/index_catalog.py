@@ -0,0 +1,226 @@
+"""
+指数目录服务 - 全部A股指数的静态元数据（名称、市场、分类、类型、基日、基点、成分股数量）
+
+上游目录（中证、国证、沪深交易所指数列表）加载后保存到本地文件，冷启动时先从本地恢复；
+分类和类型在加载时一次性计算，并建立按类型/分类/市场的二级索引和搜索索引，
+列表筛选、分页和搜索都在内存中完成。
+"""
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.adapters.akshare_adapter import AKShareAdapter
+from app.core.config import settings
+from app.schemas.index_schemas import IndexType
+from app.services.search_index import SearchIndex, pinyin_initials
+
+logger = logging.getLogger(__name__)
+
+# 常用指数的静态元数据，上游目录缺失或不可用时使用
+KNOWN_INDEX_METADATA: Dict[str, Dict[str, Any]] = {
+    "000001": {"name": "上证指数", "base_date": "1990-12-19", "base_point": 100.0, "constituent_count": None},
+    "000300": {"name": "沪深300", "base_date": "2004-12-31", "base_point": 1000.0, "constituent_count": 300},
+    "000905": {"name": "中证500", "base_date": "2004-12-31", "base_point": 1000.0, "constituent_count": 500},
+    "399001": {"name": "深证成指", "base_date": "1994-07-20", "base_point": 1000.0, "constituent_count": 500},
+    "399006": {"name": "创业板指", "base_date": "2010-05-31", "base_point": 1000.0, "constituent_count": 100},
+    "000016": {"name": "上证50", "base_date": "2003-12-31", "base_point": 1000.0, "constituent_count": 50},
+    "000852": {"name": "中证1000", "base_date": "2004-12-31", "base_point": 1000.0, "constituent_count": 1000},
+    "399005": {"name": "中小板指", "base_date": "2005-06-07", "base_point": 1000.0, "constituent_count": 100},
+    "000906": {"name": "中证800", "base_date": "2004-12-31", "base_point": 1000.0, "constituent_count": 800},
+}
+
+
+def infer_market(code: str) -> str:
+    """根据指数代码推断市场"""
+    return "SZ" if code.startswith("399") else "SH"
+
+
+def classify_index_type(code: str, name: str) -> IndexType:
+    """根据指数代码和名称确定指数类型"""
+    if any(keyword in name for keyword in ["债券", "债"]):
+        return IndexType.BOND
+    elif any(keyword in name for keyword in ["商品", "黄金", "原油"]):
+        return IndexType.COMMODITY
+    else:
+        return IndexType.EQUITY
+
+
+def classify_category(name: str) -> str:
+    """根据指数名称确定分类"""
+    if any(keyword in name for keyword in ["300", "500", "50", "1000"]):
+        return "规模指数"
+    elif any(keyword in name for keyword in ["行业", "医药", "科技", "消费"]):
+        return "行业指数"
+    elif any(keyword in name for keyword in ["价值", "成长", "红利"]):
+        return "策略指数"
+    else:
+        return "综合指数"
+
+
+class IndexCatalog:
+    """指数目录
+
+    启动时先从本地文件恢复，再由后台调度器从上游加载并定期刷新，查询都在内存中完成。
+    """
+
+    def __init__(self, adapter: AKShareAdapter, path: Optional[str] = None):
+        self.adapter = adapter
+        self.path = path if path is not None else settings.INDEX_CATALOG_PATH
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._codes: List[str] = []
+        self._by_type: Dict[IndexType, List[str]] = {}
+        self._by_category: Dict[str, List[str]] = {}
+        self._by_market: Dict[str, List[str]] = {}
+        self._search = SearchIndex()
+        self._apply(self._build({}))
+        self.loaded_at: Optional[float] = None
+        self.restored_at: Optional[float] = None
+
+    def _build(self, upstream: Dict[str, Dict[str, Any]]) -> Tuple[Dict[str, Dict[str, Any]], SearchIndex]:
+        """合并上游目录和静态元数据（静态元数据优先），计算分类/类型并建立搜索索引"""
+        entries: Dict[str, Dict[str, Any]] = {}
+        for code in sorted({*upstream, *KNOWN_INDEX_METADATA}):
+            entry = {
+                "code": code,
+                "name": f"指数 {code}",
+                "market": infer_market(code),
+                "base_date": None,
+                "base_point": None,
+                "constituent_count": None,
+            }
+            for source in (upstream.get(code, {}), KNOWN_INDEX_METADATA.get(code, {})):
+                entry.update({key: value for key, value in source.items() if value is not None})
+            entry["category"] = classify_category(entry["name"])
+            entry["index_type"] = classify_index_type(code, entry["name"])
+            entry["pinyin_initials"] = pinyin_initials(entry["name"])
+            entries[code] = entry
+        return entries, SearchIndex(entries.values())
+
+    def _apply(self, built: Tuple[Dict[str, Dict[str, Any]], SearchIndex]) -> None:
+        """替换目录数据并重建二级索引"""
+        entries, search = built
+        by_type: Dict[IndexType, List[str]] = {}
+        by_category: Dict[str, List[str]] = {}
+        by_market: Dict[str, List[str]] = {}
+        for code, entry in entries.items():
+            by_type.setdefault(entry["index_type"], []).append(code)
+            by_category.setdefault(entry["category"], []).append(code)
+            by_market.setdefault(entry["market"], []).append(code)
+
+        self._entries = entries
+        self._codes = list(entries)
+        self._by_type = by_type
+        self._by_category = by_category
+        self._by_market = by_market
+        self._search = search
+
+    async def load(self) -> bool:
+        """从上游加载指数目录并保存到本地，失败时保留现有数据"""
+        df = await self.adapter.get_index_catalog()
+        if df is None or df.empty:
+            logger.warning("加载指数目录失败，继续使用现有目录")
+            return False
+
+        df = df.astype(object).where(df.notna(), None)
+        upstream = {row["code"]: row for row in df.to_dict("records")}
+        for row in upstream.values():
+            count = row.get("constituent_count")
+            row["constituent_count"] = int(count) if count is not None else None
+            point = row.get("base_point")
+            row["base_point"] = float(point) if point is not None else None
+
+        # 拼音转换和建索引是纯CPU操作，放到线程池中执行
+        self._apply(await self.adapter.executor.run("metadata", self._build, upstream))
+        self.loaded_at = time.monotonic()
+        logger.info(f"加载指数目录成功: {len(self._entries)} 个指数")
+
+        try:
+            await self.adapter.executor.run("store", self._save, upstream)
+        except Exception as e:
+            logger.warning(f"保存指数目录失败: {str(e)}")
+        return True
+
+    async def restore(self) -> bool:
+        """从本地文件恢复上次加载的目录，用于冷启动"""
+        try:
+            upstream = await self.adapter.executor.run("store", self._read)
+            if not upstream:
+                return False
+            self._apply(await self.adapter.executor.run("metadata", self._build, upstream))
+        except Exception as e:
+            logger.warning(f"恢复本地指数目录失败: {str(e)}")
+            return False
+        self.restored_at = time.monotonic()
+        logger.info(f"从本地恢复指数目录: {len(self._entries)} 个指数")
+        return True
+
+    def _save(self, upstream: Dict[str, Dict[str, Any]]) -> None:
+        """保存上游目录（先写临时文件再替换，避免留下半个文件）"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": time.time(), "indices": upstream}, f, ensure_ascii=False, default=str)
+        os.replace(temp_path, self.path)
+
+    def _read(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, encoding="utf-8") as f:
+            return json.load(f).get("indices")
+
+    def get(self, code: str) -> Optional[Dict[str, Any]]:
+        """获取指数元数据"""
+        return self._entries.get(code)
+
+    def get_name(self, code: str) -> str:
+        """获取指数名称"""
+        entry = self._entries.get(code)
+        return entry["name"] if entry else f"指数 {code}"
+
+    def page(self, index_type: Optional[IndexType] = None, category: Optional[str] = None,
+             market: Optional[str] = None, page: int = 1, size: int = 20) -> Tuple[List[Dict[str, Any]], int]:
+        """按类型/分类/市场筛选后分页，返回 (当前页指数, 筛选后总数)
+
+        从最短的索引列表出发，其余条件逐条过滤；没有筛选条件时直接切片全部指数。
+        """
+        filters = [
+            (index, value, field)
+            for index, value, field in ((self._by_type, index_type, "index_type"),
+                                        (self._by_category, category, "category"),
+                                        (self._by_market, market, "market"))
+            if value is not None
+        ]
+        if filters:
+            filters.sort(key=lambda item: len(item[0].get(item[1], [])))
+            index, value, _ = filters[0]
+            codes = [
+                code for code in index.get(value, [])
+                if all(self._entries[code][field] == other for _, other, field in filters[1:])
+            ]
+        else:
+            codes = self._codes
+
+        start = (page - 1) * size
+        return [self._entries[code] for code in codes[start:start + size]], len(codes)
+
+    def search(self, keyword: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """按代码、名称或拼音首字母搜索指数"""
+        return self._search.search(keyword, limit)
+
+    def stats(self) -> Dict[str, Any]:
+        """目录统计信息"""
+        return {
+            "indices": len(self._entries),
+            "types": {index_type.value: len(codes) for index_type, codes in self._by_type.items()},
+            "categories": {category: len(codes) for category, codes in self._by_category.items()},
+            "loaded": self.loaded_at is not None,
+            "restored": self.restored_at is not None,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
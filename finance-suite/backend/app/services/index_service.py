@@ -1,81 +1,54 @@
 """
 指数数据服务
 """
+import asyncio
 import logging
-from typing import Optional, List, Dict, Any
-from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Union
+from datetime import datetime
 
+import numpy as np
+import pandas as pd
 
 from app.adapters.akshare_adapter import AKShareAdapter
+from app.adapters.history_store import SERIES_COLUMNS
+from app.services.converters import index_data_points, index_history_columns
+from app.services import metrics
+from app.services.metrics import price_statistics
+from app.services.index_catalog import IndexCatalog, classify_category, classify_index_type
+from app.services.refresh_scheduler import hot_symbols
 from app.schemas.index_schemas import (
     IndexInfo, IndexListResponse, IndexBaseInfo, IndexType,
-    IndexHistoryData, IndexComparisonResponse, IndexComparisonItem
+    IndexHistoryData, IndexComparisonResponse, IndexComparisonItem,
+    IndexHistoryColumnarData, IndexHistoryColumns
 )
 
 logger = logging.getLogger(__name__)
 
+# 指数对比中每个指数的表现指标
+COMPARISON_PERFORMANCE_METRICS = ("total_return", "annualized_return", "volatility", "max_drawdown")
+
 
 class IndexService:
     """指数数据服务类"""
     
-    def __init__(self):
-        self.adapter = AKShareAdapter()
+    def __init__(self, adapter: AKShareAdapter, catalog: IndexCatalog):
+        self.adapter = adapter
+        self.catalog = catalog
 
-    async def get_index_list(self, index_type: Optional[str] = None,
-                           page: int = 1, size: int = 20) -> IndexListResponse:
-        """获取指数列表"""
+    async def get_index_list(self, index_type: Optional[str] = None, category: Optional[str] = None,
+                           market: Optional[str] = None, page: int = 1, size: int = 20) -> IndexListResponse:
+        """获取指数列表（全部指数目录，可按类型、分类和市场筛选）"""
         try:
-            # 定义一些常用指数
-            indices = [
-                IndexBaseInfo(
-                    code="000001",
-                    name="上证指数",
-                    market="SH",
-                    category="综合指数",
-                    index_type=IndexType.EQUITY
-                ),
-                IndexBaseInfo(
-                    code="000300",
-                    name="沪深300",
-                    market="SH",
-                    category="规模指数",
-                    index_type=IndexType.EQUITY
-                ),
-                IndexBaseInfo(
-                    code="000905",
-                    name="中证500",
-                    market="SH",
-                    category="规模指数",
-                    index_type=IndexType.EQUITY
-                ),
-                IndexBaseInfo(
-                    code="399001",
-                    name="深证成指",
-                    market="SZ",
-                    category="综合指数",
-                    index_type=IndexType.EQUITY
-                ),
-                IndexBaseInfo(
-                    code="399006",
-                    name="创业板指",
-                    market="SZ",
-                    category="规模指数",
-                    index_type=IndexType.EQUITY
-                ),
-            ]
-            
-            # 分页处理
-            start_idx = (page - 1) * size
-            end_idx = start_idx + size
-            page_indices = indices[start_idx:end_idx]
+            selected_type = IndexType(index_type) if index_type else None
+            entries, total = self.catalog.page(selected_type, category, market, page, size)
             
             return IndexListResponse(
                 success=True,
-                data=page_indices,
-                total=len(indices),
+                data=[self._base_info(entry) for entry in entries],
+                total=total,
                 page=page,
                 size=size,
-                pages=(len(indices) + size - 1) // size
+                message="获取指数列表成功"
             )
         except Exception as e:
             logger.error(f"获取指数列表失败: {str(e)}")
@@ -85,38 +58,26 @@ class IndexService:
                 total=0,
                 page=page,
                 size=size,
-                pages=0,
                 message=f"获取指数列表失败: {str(e)}"
             )
 
-    async def get_available_indices(self) -> List[IndexBaseInfo]:
-        """获取所有可用指数"""
-        try:
-            response = await self.get_index_list(size=100)
-            return response.data
-        except Exception as e:
-            logger.error(f"获取可用指数失败: {str(e)}")
-            return []
+    def _base_info(self, entry: Dict[str, Any]) -> IndexBaseInfo:
+        """指数目录条目转换为基础信息"""
+        return IndexBaseInfo.model_construct(
+            code=entry["code"],
+            name=entry["name"],
+            market=entry["market"],
+            category=entry["category"],
+            index_type=entry["index_type"]
+        )
 
     def _determine_index_type(self, code: str, name: str) -> IndexType:
         """根据指数代码和名称确定指数类型"""
-        if any(keyword in name for keyword in ["债券", "债"]):
-            return IndexType.BOND
-        elif any(keyword in name for keyword in ["商品", "黄金", "原油"]):
-            return IndexType.COMMODITY
-        else:
-            return IndexType.EQUITY
+        return classify_index_type(code, name)
 
     def _determine_category(self, name: str) -> str:
         """根据指数名称确定分类"""
-        if any(keyword in name for keyword in ["300", "500", "50", "1000"]):
-            return "规模指数"
-        elif any(keyword in name for keyword in ["行业", "医药", "科技", "消费"]):
-            return "行业指数"
-        elif any(keyword in name for keyword in ["价值", "成长", "红利"]):
-            return "策略指数"
-        else:
-            return "综合指数"
+        return classify_category(name)
 
     async def get_index_info(self, index_code: str) -> Optional[IndexInfo]:
         """获取指数基本信息"""
@@ -127,16 +88,24 @@ class IndexService:
             if info is None:
                 logger.error(f"获取指数信息失败: {index_code} - 适配器返回None")
                 return None
+            hot_symbols.record("index", index_code)
             
             logger.info(f"获取指数信息成功: {index_code} - {info}")
             
+            # 静态元数据（名称、分类等）来自内存中的指数目录
+            metadata = self.catalog.get(index_code) or {}
+            name = self.catalog.get_name(index_code)
+            
             # 将适配器返回的数据转换为IndexInfo对象
             return IndexInfo(
                 code=info.get("code", index_code),
-                name=info.get("name", f"指数 {index_code}"),
-                market=info.get("market", "SH" if index_code.startswith("000") else "SZ"),
-                category=self._determine_category(info.get("name", "")),
-                index_type=self._determine_index_type(index_code, info.get("name", "")),
+                name=name,
+                market=metadata.get("market") or info.get("market", "SH" if index_code.startswith("000") else "SZ"),
+                category=metadata.get("category") or self._determine_category(name),
+                index_type=metadata.get("index_type") or self._determine_index_type(index_code, name),
+                base_date=metadata.get("base_date"),
+                base_value=metadata.get("base_point"),
+                constituent_count=metadata.get("constituent_count"),
                 current_value=info.get("current_value"),
                 change_value=info.get("change_value"),
                 change_percent=info.get("change_percent"),
@@ -147,141 +116,148 @@ class IndexService:
                 pb_ratio=info.get("pb_ratio"),
                 dividend_yield=info.get("dividend_yield"),
                 valuation_percentile=info.get("valuation_percentile"),
-                last_update=datetime.now()
+                last_update=info.get("last_update") or datetime.now(),
+                stale=info.get("stale", False)
             )
         except Exception as e:
             logger.error(f"获取指数信息时出错: {e}")
             return None
 
-    async def get_index_history(self, index_code: str, start_date: str,
-                              end_date: str) -> IndexHistoryData:
-        """获取指数历史数据"""
+    async def get_index_history(self, index_code: str, start_date: str, end_date: str,
+                                columnar: bool = False) -> Union[IndexHistoryData, IndexHistoryColumnarData]:
+        """获取指数历史数据，columnar为True时按列返回（每个字段一个数组）"""
         try:
             # 使用AKShare适配器获取真实历史数据
             df = await self.adapter.get_index_history(index_code, start_date, end_date)
             
             if df is None or df.empty:
                 # 如果没有数据，返回空的历史数据结构
-                return IndexHistoryData(
-                    code=index_code,
-                    name=f"指数 {index_code}",
-                    data=[],
-                    start_date=start_date,
-                    end_date=end_date,
-                    total_days=0,
-                    statistics={}
-                )
-            
-            # 转换数据格式
-            from app.schemas.index_schemas import IndexDataPoint
-            data_points = []
+                return self._build_history(index_code, index_history_columns(pd.DataFrame(columns=["close"])),
+                                           {}, columnar)
+            hot_symbols.record("index", index_code)
             
-            for _, row in df.iterrows():
-                data_points.append(IndexDataPoint(
-                    date=row["date"],
-                    open_value=float(row["open"]),
-                    close_value=float(row["close"]),
-                    high_value=float(row["high"]),
-                    low_value=float(row["low"]),
-                    volume=int(row.get("volume", 0)),
-                    change_value=0.0,  # 计算后填入
-                    change_percent=0.0  # 计算后填入
-                ))
-            
-            # 计算涨跌和涨跌幅
-            for i in range(1, len(data_points)):
-                prev_close = data_points[i-1].close_value
-                curr_close = data_points[i].close_value
-                change = curr_close - prev_close
-                pct_change = (change / prev_close * 100) if prev_close > 0 else 0
-                
-                data_points[i].change_value = round(change, 2)
-                data_points[i].change_percent = round(pct_change, 2)
+            # 转换数据格式（批量计算涨跌和涨跌幅）
+            columns = index_history_columns(df)
             
-            # 计算统计数据
-            if data_points:
-                start_value = data_points[0].close_value
-                end_value = data_points[-1].close_value
-                total_return = ((end_value - start_value) / start_value * 100) if start_value > 0 else 0
-                
-                # 计算波动率
-                returns = [dp.change_percent for dp in data_points[1:]]
-                if returns:
-                    import statistics
-                    volatility = statistics.stdev(returns) if len(returns) > 1 else 0
-                else:
-                    volatility = 0
-                
-                statistics_data = {
-                    "total_return": round(total_return, 2),
-                    "volatility": round(volatility, 2),
-                    "max_value": max(dp.close_value for dp in data_points),
-                    "min_value": min(dp.close_value for dp in data_points),
-                    "avg_volume": sum(dp.volume for dp in data_points) / len(data_points)
-                }
-            else:
-                statistics_data = {}
-            
-            return IndexHistoryData(
-                code=index_code,
-                name=f"指数 {index_code}",
-                data=data_points,
-                start_date=start_date,
-                end_date=end_date,
-                total_days=len(data_points),
-                statistics=statistics_data
+            # 计算统计数据（区间收益、年化波动率、最大回撤、夏普比率等）
+            statistics_data = price_statistics(
+                columns["close_value"], columns["date"],
+                volumes=pd.to_numeric(df["volume"], errors="coerce").to_numpy(dtype=float) if "volume" in df else None
             )
+            
+            return self._build_history(index_code, columns, statistics_data, columnar)
         except Exception as e:
             logger.error(f"获取历史数据时出错: {e}")
             # 返回空的历史数据结构
-            return IndexHistoryData(
-                code=index_code,
-                name=f"指数 {index_code}",
-                data=[],
-                start_date=start_date,
-                end_date=end_date,
-                total_days=0,
-                statistics={}
+            return self._build_history(index_code, index_history_columns(pd.DataFrame(columns=["close"])),
+                                       {}, columnar)
+
+    def _build_history(self, index_code: str, columns: Dict[str, list], statistics: Dict[str, Any],
+                       columnar: bool) -> Union[IndexHistoryData, IndexHistoryColumnarData]:
+        """按请求的格式构建历史数据响应"""
+        name = self.catalog.get_name(index_code)
+        if columnar:
+            return IndexHistoryColumnarData.model_construct(
+                code=index_code, name=name,
+                data=IndexHistoryColumns.model_construct(**columns),
+                statistics=statistics
             )
+        return IndexHistoryData(
+            code=index_code, name=name,
+            data=index_data_points(columns),
+            statistics=statistics
+        )
+
+    async def get_index_history_frame(self, index_code: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """获取指数日线的DataFrame，用于二进制格式导出"""
+        df = await self.adapter.get_index_history(index_code, start_date, end_date)
+        if df is None or df.empty:
+            raise ValueError(f"无法获取指数 {index_code} 的历史数据")
+        hot_symbols.record("index", index_code)
+        return df.reindex(columns=["date", *SERIES_COLUMNS["index_daily"]])
+
+    async def compare_indices_frame(self, index_codes: List[str], start_date: str, end_date: str) -> pd.DataFrame:
+        """获取多个指数的日线（长表，code列区分指数），用于二进制格式导出"""
+        results = await asyncio.gather(
+            *(self.get_index_history_frame(code, start_date, end_date) for code in index_codes),
+            return_exceptions=True
+        )
+        frames = [
+            df.assign(code=code) for code, df in zip(index_codes, results) if not isinstance(df, Exception)
+        ]
+        if not frames:
+            raise ValueError("无法获取任何指数的历史数据")
+        df = pd.concat(frames, ignore_index=True)
+        return df[["code", *(col for col in df.columns if col != "code")]]
 
     async def compare_indices(self, index_codes: List[str], start_date: str,
                             end_date: str) -> IndexComparisonResponse:
-        """对比多个指数"""
+        """对比多个指数
+        
+        并发获取各指数日线，按日期对齐（缺失交易日沿用前一日收盘）为 日期 × 指数 矩阵，
+        一次计算全部指标、相关性和以100为基数的归一化走势。
+        """
         try:
-            from app.schemas.index_schemas import IndexComparisonResponse, IndexComparisonItem
-            comparison_items = []
+            results = await asyncio.gather(
+                *(self.adapter.get_index_history(code, start_date, end_date) for code in index_codes),
+                return_exceptions=True
+            )
+            histories = {
+                code: df for code, df in zip(index_codes, results)
+                if not isinstance(df, Exception) and df is not None and not df.empty
+            }
+            for code in histories:
+                hot_symbols.record("index", code)
+            if not histories:
+                return IndexComparisonResponse(
+                    success=True, data=[], comparison_metrics={}, message="无法获取任何指数的历史数据"
+                )
             
-            for code in index_codes:
-                history_data = await self.get_index_history(code, start_date, end_date)
-                
+            codes = list(histories)
+            wide = metrics.align_prices({
+                code: pd.to_numeric(df["close"], errors="coerce").set_axis(df["date"].astype(str))
+                for code, df in histories.items()
+            })
+            prices = wide.to_numpy(dtype=float)
+            all_data = metrics.compute_metrics_matrix(prices, wide.index, codes)
+            rebased = np.round(metrics.rebase(prices), 4)
+            
+            comparison_items = []
+            for code in codes:
+                metadata = self.catalog.get(code) or {}
+                name = self.catalog.get_name(code)
+                statistics = all_data[code]
                 comparison_items.append(IndexComparisonItem(
                     code=code,
-                    name=history_data.name,
-                    index_type=IndexType.EQUITY,
-                    data=history_data.data,
-                    performance={
-                        "total_return": history_data.statistics.get("total_return", 0),
-                        "volatility": history_data.statistics.get("volatility", 0),
-                        "max_drawdown": 0.0  # 需要基于真实数据计算
-                    }
+                    name=name,
+                    index_type=metadata.get("index_type") or self._determine_index_type(code, name),
+                    data=index_data_points(index_history_columns(histories[code])),
+                    performance=metrics.pick(statistics, COMPARISON_PERFORMANCE_METRICS),
+                    statistics=statistics
                 ))
             
+            ranking = metrics.rank(all_data, "total_return")
+            comparison_metrics = {
+                "best_performer": ranking[0] if len(ranking) > 1 else "",
+                "worst_performer": ranking[-1] if len(ranking) > 1 else "",
+                **metrics.correlation_matrices(prices, codes),
+                # 对齐后的日期轴和各指数的归一化走势，序列开始前为None
+                "rebased": {
+                    "dates": wide.index.tolist(),
+                    "series": {
+                        code: [None if np.isnan(value) else value for value in rebased[:, i].tolist()]
+                        for i, code in enumerate(codes)
+                    },
+                },
+            }
+            
             return IndexComparisonResponse(
-                success=True,
-                comparison_items=comparison_items,
-                start_date=start_date,
-                end_date=end_date,
-                comparison_count=len(comparison_items)
+                success=True, data=comparison_items,
+                comparison_metrics=comparison_metrics, message="指数对比完成"
             )
         except Exception as e:
-            return IndexComparisonResponse(
-                success=False,
-                comparison_items=[],
-                start_date=start_date,
-                end_date=end_date,
-                comparison_count=0,
-                error_message=f"对比失败: {str(e)}"
-            )
+            logger.error(f"指数对比失败: {str(e)}")
+            raise
     
     async def get_realtime_data(self, index_code: str) -> Dict[str, Any]:
         """获取指数实时数据"""
@@ -305,17 +281,9 @@ class IndexService:
             raise
     
     async def search_indices(self, keyword: str, size: int = 10) -> List[IndexBaseInfo]:
-        """搜索指数"""
+        """按代码、名称或拼音首字母搜索指数"""
         try:
-            all_indices = await self.get_available_indices()
-            
-            # 简单的关键词匹配
-            matched_indices = [
-                index for index in all_indices
-                if keyword.lower() in index.name.lower() or keyword in index.code
-            ]
-            
-            return matched_indices[:size]
+            return [self._base_info(entry) for entry in self.catalog.search(keyword, size)]
         except Exception as e:
             logger.error(f"搜索指数失败: {str(e)}")
-            return [] 
\ No newline at end of file
+            return []
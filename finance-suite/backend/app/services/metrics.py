@@ -0,0 +1,215 @@
+"""
+收益/风险指标 - 基于价格（收盘点数或单位净值）数组的向量化计算，指数、基金和预测服务共用
+
+核心是按列计算的矩阵版本：输入 日期 × 代码 的价格矩阵，一次得到每一列的全部指标；
+单个序列的计算是只有一列的特例。
+"""
+import warnings
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# 年化使用的交易日数
+TRADING_DAYS = 252
+# 无风险利率（年化）
+RISK_FREE_RATE = 0.03
+
+
+def as_prices(values: Any) -> np.ndarray:
+    """转换为float数组并去掉缺失值"""
+    prices = np.asarray(values, dtype=float)
+    return prices[~np.isnan(prices)]
+
+
+def align_prices(series: Mapping[str, pd.Series]) -> pd.DataFrame:
+    """按日期对齐多个价格序列（外连接，按日期升序），缺失的交易日沿用前一日价格
+
+    每个序列以日期为索引；返回 日期 × 代码 的DataFrame，序列开始之前的日期为NaN。
+    """
+    if not series:
+        return pd.DataFrame()
+    # 同一日期重复出现时保留最后一条，否则无法按日期对齐
+    series = {code: values[~values.index.duplicated(keep="last")] for code, values in series.items()}
+    aligned = pd.concat(series, axis=1, join="outer").sort_index()
+    return aligned.ffill()
+
+
+def _forward_fill(prices: np.ndarray) -> np.ndarray:
+    """按列向前填充缺失值"""
+    index = np.where(np.isnan(prices), 0, np.arange(prices.shape[0])[:, None])
+    np.maximum.accumulate(index, axis=0, out=index)
+    return prices[index, np.arange(prices.shape[1])]
+
+
+def _returns_matrix(prices: np.ndarray) -> np.ndarray:
+    """按列计算日收益率，任一端缺失时为NaN"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = prices[1:] / prices[:-1] - 1
+    returns[~np.isfinite(returns)] = np.nan
+    return returns
+
+
+def compute_metrics_matrix(prices: Any, dates: Optional[Sequence[str]] = None,
+                           codes: Optional[Sequence[str]] = None,
+                           risk_free_rate: float = RISK_FREE_RATE) -> Dict[str, Dict[str, Any]]:
+    """一次计算价格矩阵（日期 × 代码）每一列的全部收益/风险指标
+
+    收益率、波动率、回撤、VaR等均为百分比；每列只使用自身第一个有效价格之后的数据，
+    中间的缺失值沿用前一日价格。有效价格少于2个的列返回空字典。
+    dates 与行数相同时返回最大回撤的峰值和谷底日期。
+    """
+    values = np.asarray(prices, dtype=float)
+    if values.ndim == 1:
+        values = values[:, None]
+    rows, cols = values.shape
+    codes = list(codes) if codes is not None else [str(i) for i in range(cols)]
+    if rows < 2 or cols == 0:
+        return {code: {} for code in codes}
+    dates = np.asarray(dates) if dates is not None else None
+
+    values = _forward_fill(values)
+    column_index = np.arange(cols)
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=0)
+    first = values[valid.argmax(axis=0), column_index]
+    last = values[-1]
+    usable = (counts >= 2) & (first > 0)
+
+    # 全部为NaN的列会产生 "Mean of empty slice" 等警告，这些列最终不返回指标
+    with np.errstate(divide="ignore", invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+
+        growth = last / first
+        periods = np.maximum(counts - 1, 1)
+        total_return = (growth - 1) * 100
+        annualized_return = np.where(growth > 0, (growth ** (TRADING_DAYS / periods) - 1) * 100, -100.0)
+
+        # 最大回撤及其峰值/谷底位置（序列开始前的NaN不参与）
+        running_max = np.fmax.accumulate(values, axis=0)
+        drawdowns = np.nan_to_num(1 - values / running_max, nan=0.0)
+        trough = drawdowns.argmax(axis=0)
+        max_drawdown = drawdowns[trough, column_index] * 100
+        before_trough = np.arange(rows)[:, None] <= trough[None, :]
+        peak = np.where(before_trough & valid, values, -np.inf).argmax(axis=0)
+
+        returns = _returns_matrix(values)
+        return_counts = (~np.isnan(returns)).sum(axis=0)
+        mean_annual = np.nanmean(returns, axis=0) * TRADING_DAYS
+        volatility = np.where(return_counts >= 2, np.nanstd(returns, axis=0, ddof=1), 0.0) \
+            * np.sqrt(TRADING_DAYS) * 100
+        shortfall = np.minimum(returns - risk_free_rate / TRADING_DAYS, 0.0)
+        downside = np.sqrt(np.nanmean(shortfall ** 2, axis=0)) * np.sqrt(TRADING_DAYS) * 100
+
+        # 历史模拟法的日VaR/CVaR，损失记为正数
+        # 排序一次（NaN排在末尾），按每列的有效样本数线性插值取分位数，等价于 np.nanquantile
+        sorted_returns = np.sort(returns, axis=0)
+        tail_metrics = {}
+        for level in (95, 99):
+            position = np.maximum(return_counts - 1, 0) * (1 - level / 100)
+            lower = np.floor(position).astype(int)
+            upper = np.ceil(position).astype(int)
+            low_value = sorted_returns[lower, column_index]
+            high_value = sorted_returns[upper, column_index]
+            threshold = np.where(return_counts > 0, low_value + (high_value - low_value) * (position - lower), np.nan)
+            tail = np.where(returns <= threshold, returns, np.nan)
+            tail_metrics[f"var_{level}"] = -threshold * 100
+            tail_metrics[f"cvar_{level}"] = -np.nanmean(tail, axis=0) * 100
+
+        sharpe = np.where(volatility > 0, (mean_annual - risk_free_rate) / (volatility / 100), 0.0)
+        sortino = np.where(downside > 0, (mean_annual - risk_free_rate) / (downside / 100), 0.0)
+        calmar = np.where(max_drawdown > 0, annualized_return / max_drawdown, 0.0)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for i, code in enumerate(codes):
+        if not usable[i]:
+            results[code] = {}
+            continue
+        has_drawdown = dates is not None and max_drawdown[i] > 0
+        results[code] = {
+            "total_return": float(total_return[i]),
+            "annualized_return": float(annualized_return[i]),
+            "volatility": float(volatility[i]),
+            "max_drawdown": float(max_drawdown[i]),
+            "max_drawdown_peak_date": str(dates[peak[i]]) if has_drawdown else None,
+            "max_drawdown_trough_date": str(dates[trough[i]]) if has_drawdown else None,
+            "sharpe_ratio": float(sharpe[i]),
+            "sortino_ratio": float(sortino[i]),
+            "calmar_ratio": float(calmar[i]),
+            "downside_deviation": float(np.nan_to_num(downside[i])),
+            **{key: float(np.nan_to_num(value[i])) for key, value in tail_metrics.items()},
+        }
+    return results
+
+
+def compute_metrics(prices: Any, dates: Optional[Sequence[str]] = None,
+                    risk_free_rate: float = RISK_FREE_RATE) -> Dict[str, Any]:
+    """一次计算单个价格序列的全部收益/风险指标，数据不足时返回空字典"""
+    return compute_metrics_matrix(prices, dates, ["series"], risk_free_rate)["series"]
+
+
+def rebase(prices: Any, base: float = 100.0) -> np.ndarray:
+    """价格矩阵按列以各自第一个有效价格为基数归一化（首日为base），缺失值沿用前一日"""
+    values = np.asarray(prices, dtype=float)
+    if values.ndim == 1:
+        values = values[:, None]
+    if values.size == 0:
+        return values
+    values = _forward_fill(values)
+    first = values[(~np.isnan(values)).argmax(axis=0), np.arange(values.shape[1])]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return values / np.where(first > 0, first, np.nan) * base
+
+
+def _matrix_to_dict(matrix: pd.DataFrame) -> Dict[str, Dict[str, Optional[float]]]:
+    matrix = matrix.astype(object).where(matrix.notna(), None)
+    return {str(code): row for code, row in matrix.to_dict("index").items()}
+
+
+def correlation_matrices(prices: Any, codes: Sequence[str],
+                         min_periods: int = 20) -> Dict[str, Dict[str, Dict[str, Optional[float]]]]:
+    """日收益率的相关系数矩阵和年化协方差矩阵（按两两都有数据的日期计算）"""
+    values = np.asarray(prices, dtype=float)
+    if values.ndim == 1:
+        values = values[:, None]
+    if values.shape[0] < 2:
+        return {"correlation": {}, "covariance": {}}
+
+    returns = pd.DataFrame(_returns_matrix(_forward_fill(values)), columns=list(codes))
+    return {
+        "correlation": _matrix_to_dict(returns.corr(min_periods=min_periods)),
+        "covariance": _matrix_to_dict(returns.cov(min_periods=min_periods) * TRADING_DAYS),
+    }
+
+
+# 指标分组，用于业绩分析和对比的响应字段
+RETURN_METRICS = ("total_return", "annualized_return")
+RISK_METRICS = ("volatility", "max_drawdown", "downside_deviation", "var_95", "cvar_95")
+RISK_ADJUSTED_METRICS = ("sharpe_ratio", "sortino_ratio", "calmar_ratio")
+
+
+def pick(metrics: Dict[str, Any], keys: Sequence[str]) -> Dict[str, float]:
+    """从指标结果中取出一组数值指标"""
+    return {key: float(metrics[key]) for key in keys if key in metrics}
+
+
+def rank(metrics: Mapping[str, Dict[str, Any]], key: str = "total_return") -> List[str]:
+    """按某个指标从高到低排列代码，缺少该指标的代码不参与排序"""
+    scored = {code: values[key] for code, values in metrics.items() if key in values}
+    return sorted(scored, key=scored.get, reverse=True)
+
+
+def price_statistics(prices: Any, dates: Optional[Sequence[str]] = None,
+                     volumes: Optional[Any] = None) -> Dict[str, Any]:
+    """价格序列的统计信息：全部收益/风险指标 + 最高/最低值、平均成交量"""
+    values = as_prices(prices)
+    if len(values) == 0:
+        return {}
+
+    statistics = compute_metrics(prices, dates)
+    statistics["max_value"] = float(values.max())
+    statistics["min_value"] = float(values.min())
+    if volumes is not None:
+        volumes = np.asarray(volumes, dtype=float)
+        statistics["avg_volume"] = float(np.nan_to_num(volumes).mean()) if len(volumes) else 0.0
+    return statistics
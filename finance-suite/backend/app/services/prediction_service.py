@@ -2,76 +2,288 @@
 投资预测服务
 """
 import logging
-from typing import Optional, List, Dict, Any
+from typing import Optional, Dict, Sequence, Tuple
 from datetime import datetime, timedelta
 
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.schemas.prediction_schemas import (
+    BacktestResult, BacktestStrategy, DCAAnalysis, InvestmentPrediction, InvestmentType, PredictionScenario, RiskAnalysis
+)
+from app.services import backtest, dca, metrics, simulation
+from app.services.converters import dca_data_points
 from app.services.fund_service import FundService
 
 logger = logging.getLogger(__name__)
 
+# 分析周期 -> 天数
+ANALYSIS_PERIOD_DAYS = {"1y": 365, "2y": 730, "3y": 1095, "5y": 1825}
+
+# 模拟所需的最少历史日收益率样本数
+MIN_SIMULATION_SAMPLES = 60
+
+# 定投账本中直接输出为数据点的字段
+DCA_LEDGER_FIELDS = (
+    "investment_amount", "shares_purchased", "cumulative_investment",
+    "cumulative_shares", "market_value", "total_return", "return_rate",
+)
+
+# 年化波动率(%)上限 -> 风险等级
+RISK_LEVELS = [
+    (5.0, "低"),
+    (15.0, "中低"),
+    (25.0, "中"),
+    (35.0, "中高"),
+    (float("inf"), "高"),
+]
+
 
 class PredictionService:
     """投资预测服务类"""
     
-    def __init__(self):
-        self.fund_service = FundService()
+    def __init__(self, fund_service: FundService):
+        self.fund_service = fund_service
 
     async def predict_fund_return(self, fund_code: str, investment_amount: float,
-                                investment_period: int, investment_type: str) -> Dict[str, Any]:
-        """预测基金收益"""
+                                investment_period: int, investment_type: str,
+                                method: str = "bootstrap") -> InvestmentPrediction:
+        """预测基金收益
+        
+        以近几年的日收益率为模型输入做蒙特卡洛模拟（bootstrap 重抽样或 gbm），
+        定投时 investment_amount 为总投入，按月平均投入。相同的请求和数据得到相同的结果。
+        """
         try:
-            fund_info = await self.fund_service.get_fund_info(fund_code)
-            if not fund_info:
-                raise ValueError(f"基金 {fund_code} 不存在")
+            investment_type = InvestmentType(investment_type)
+            if method not in simulation.SIMULATION_METHODS:
+                raise ValueError(f"不支持的模拟方法: {method}")
             
-            # 预测功能需要真实的历史数据分析和机器学习模型
-            raise NotImplementedError("预测功能需要基于真实历史数据的分析模型，当前未实现")
+            end_date = datetime.now()
+            start_date = end_date - timedelta(days=settings.PREDICTION_HISTORY_DAYS)
+            df = await self.fund_service.get_fund_history_frame(
+                fund_code, start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
+            )
+            prices = df["unit_net_value"].to_numpy(dtype=float)
+            returns = simulation.daily_returns(prices)
+            if len(returns) < MIN_SIMULATION_SAMPLES:
+                raise ValueError(f"基金 {fund_code} 的历史数据不足，无法进行收益预测")
             
+            history = metrics.compute_metrics(prices, df["date"])
+            days = investment_period * simulation.TRADING_DAYS_PER_MONTH
+            n_paths = min(settings.MONTE_CARLO_PATHS,
+                          max(settings.MONTE_CARLO_MIN_PATHS, settings.MONTE_CARLO_MAX_STEPS // days))
+            seed = simulation.stable_seed(fund_code, investment_amount, investment_period, investment_type.value,
+                                          method, df["date"].iloc[-1], base=settings.MONTE_CARLO_SEED)
+            
+            # 模拟是CPU密集计算，放到线程池中执行
+            executor = self.fund_service.adapter.executor
+            projection = await executor.run(
+                "compute", simulation.project, returns, investment_amount, investment_period,
+                dca=investment_type == InvestmentType.DCA, n_paths=n_paths, method=method, seed=seed
+            )
+            accuracy = await executor.run("compute", simulation.calibration_score, returns, method, seed=seed)
+            
+            return InvestmentPrediction(
+                fund_code=fund_code,
+                fund_name=await self.fund_service.directory.resolve_name(fund_code),
+                investment_amount=investment_amount,
+                investment_period=investment_period,
+                investment_type=investment_type,
+                scenarios=[PredictionScenario(**scenario) for scenario in projection["scenarios"]],
+                expected_final_value=projection["expected_final_value"],
+                expected_total_return=projection["expected_total_return"],
+                expected_annualized_return=projection["expected_annualized_return"],
+                volatility=history["volatility"],
+                max_drawdown=projection["max_drawdown"],
+                var_95=projection["var_95"],
+                historical_performance={
+                    **metrics.pick(history, metrics.RETURN_METRICS + metrics.RISK_ADJUSTED_METRICS),
+                    "max_drawdown": history["max_drawdown"],
+                    "probability_of_loss": projection["probability_of_loss"],
+                    "simulated_paths": float(projection["paths"]),
+                },
+                model_accuracy=accuracy if accuracy is not None else 0.0,
+                prediction_date=datetime.now()
+            )
         except Exception as e:
             logger.error(f"收益预测失败: {str(e)}")
             raise
 
     async def analyze_dca_strategy(self, fund_code: str, monthly_amount: float,
-                                 investment_months: int, start_date: Optional[str] = None) -> Dict[str, Any]:
-        """定投策略分析"""
+                                 investment_months: int, start_date: Optional[str] = None) -> DCAAnalysis:
+        """定投策略分析
+        
+        从 start_date（默认为 investment_months 个月前）起每月定投，按历史净值计算每期份额和市值，
+        年化收益率为资金加权收益率；同时给出同样金额在首次扣款日一次性买入的结果。
+        """
         try:
-            fund_info = await self.fund_service.get_fund_info(fund_code)
-            if not fund_info:
-                raise ValueError(f"基金 {fund_code} 不存在")
-
-            # 定投分析需要基于真实历史数据
-            raise NotImplementedError("定投策略分析需要基于真实历史数据，当前未实现")
+            today = pd.Timestamp(datetime.now().date())
+            start = pd.Timestamp(start_date) if start_date else today - pd.DateOffset(months=investment_months)
+            end = min(start + pd.DateOffset(months=investment_months), today)
+            df = await self.fund_service.get_fund_history_frame(
+                fund_code, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+            )
+            
+            dates = pd.to_datetime(df["date"])
+            nav = df["unit_net_value"].to_numpy(dtype=float)
+            positions = dca.purchase_positions(dates, start.strftime("%Y-%m-%d"), investment_months)
+            if len(positions) == 0 or len(nav) - positions[0] < 2:
+                raise ValueError(f"基金 {fund_code} 在定投区间内的净值数据不足")
+            
+            ledger = dca.dca_ledger(nav[positions], monthly_amount)
+            exit_date = dates.iloc[-1]
+            final_value = float(ledger["cumulative_shares"][-1] * nav[-1])
+            total_investment = float(ledger["cumulative_investment"][-1])
+            years_to_end = ((exit_date - dates.iloc[positions]).dt.days / 365.25).to_numpy()
             
+            # 投资期间（首次扣款日至期末）的净值风险指标
+            window = metrics.compute_metrics(nav[positions[0]:], df["date"].iloc[positions[0]:])
+            comparison = dca.lump_sum_comparison(
+                total_investment, nav[positions[0]], nav[-1], years=float(years_to_end[0]),
+                dca_final_value=final_value
+            )
+            
+            return DCAAnalysis(
+                fund_code=fund_code,
+                fund_name=await self.fund_service.directory.resolve_name(fund_code),
+                monthly_amount=monthly_amount,
+                investment_months=investment_months,
+                start_date=df["date"].iloc[positions[0]],
+                data_points=dca_data_points({
+                    "date": df["date"].iloc[positions].tolist(),
+                    "fund_price": nav[positions],
+                    **{key: ledger[key] for key in DCA_LEDGER_FIELDS},
+                }),
+                total_investment=total_investment,
+                final_value=final_value,
+                total_return=final_value - total_investment,
+                annualized_return=float(dca.money_weighted_return(
+                    ledger["investment_amount"], years_to_end, final_value
+                )),
+                volatility=window.get("volatility", 0.0),
+                max_drawdown=window.get("max_drawdown", 0.0),
+                sharpe_ratio=window.get("sharpe_ratio", 0.0),
+                lump_sum_comparison={key: float(value) for key, value in comparison.items()},
+                analysis_date=datetime.now()
+            )
         except Exception as e:
             logger.error(f"定投分析失败: {str(e)}")
             raise
 
     async def backtest_investment(self, fund_code: str, investment_amount: float,
                                 start_date: str, end_date: Optional[str] = None,
-                                strategy: str = "lump_sum") -> Dict[str, Any]:
-        """投资策略回测"""
+                                strategy: str = "lump_sum",
+                                parameters: Optional[Dict[str, Sequence[float]]] = None) -> BacktestResult:
+        """投资策略回测
+        
+        investment_amount 为投资总额，分批策略从 start_date 起每月扣款一次直到 end_date，未投入的部分保留为现金。
+        parameters 中每个参数可以给出多个取值，全部组合一次回测；返回夏普比率最高的组合的明细，
+        其余组合的指标在 parameter_results 中。
+        """
         try:
-            fund_info = await self.fund_service.get_fund_info(fund_code)
-            if not fund_info:
-                raise ValueError(f"基金 {fund_code} 不存在")
-
-            # 回测功能需要基于真实历史数据
-            raise NotImplementedError("投资策略回测需要基于真实历史数据，当前未实现")
+            strategy = BacktestStrategy(strategy).value
+            grid = backtest.parameter_grid(strategy, parameters)
+            if len(grid) > settings.BACKTEST_MAX_COMBINATIONS:
+                raise ValueError(f"参数组合过多: {len(grid)}，最多 {settings.BACKTEST_MAX_COMBINATIONS} 个")
+            
+            start = pd.Timestamp(start_date)
+            end = pd.Timestamp(end_date) if end_date else pd.Timestamp(datetime.now().date())
+            if end <= start:
+                raise ValueError("结束日期必须晚于开始日期")
+            # 分位数策略需要开始日期之前的净值作为回看区间（按交易日约为自然日的 252/365）
+            lookback = max((int(params.get("window", 0)) for params in grid), default=0)
+            fetch_start = start - pd.Timedelta(days=int(lookback * 365 / metrics.TRADING_DAYS) + 7)
+            df = await self.fund_service.get_fund_history_frame(
+                fund_code, fetch_start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+            )
+            
+            dates = pd.to_datetime(df["date"])
+            nav = df["unit_net_value"].to_numpy(dtype=float)
+            first = int(np.searchsorted(dates.to_numpy(), start.to_datetime64()))
+            months = (end.year - start.year) * 12 + end.month - start.month + 1
+            positions = dca.purchase_positions(dates, start.strftime("%Y-%m-%d"), months)
+            positions = positions[dates.iloc[positions].to_numpy() <= end.to_datetime64()]
+            if len(positions) == 0 or len(nav) - first < 2:
+                raise ValueError(f"基金 {fund_code} 在回测区间内的净值数据不足")
+            
+            window_dates = df["date"].iloc[first:].tolist()
+            # 参数组合多时计算量较大，放到线程池中执行
+            executor = self.fund_service.adapter.executor
+            ledger = await executor.run("compute", backtest.run, nav, positions, investment_amount,
+                                        strategy, grid, first)
+            results = await executor.run("compute", backtest.evaluate, ledger, window_dates, investment_amount)
+            best = backtest.best_combination(results)
+            result = results[best]
             
+            return BacktestResult(
+                fund_code=fund_code,
+                fund_name=await self.fund_service.directory.resolve_name(fund_code),
+                start_date=window_dates[0],
+                end_date=window_dates[-1],
+                strategy=strategy,
+                initial_investment=investment_amount,
+                final_value=result["final_value"],
+                total_return=result["total_profit"],
+                annualized_return=result.get("annualized_return", 0.0),
+                volatility=result.get("volatility", 0.0),
+                max_drawdown=result.get("max_drawdown", 0.0),
+                sharpe_ratio=result.get("sharpe_ratio", 0.0),
+                calmar_ratio=result.get("calmar_ratio", 0.0),
+                parameters=grid[best],
+                parameter_results=[
+                    {
+                        "parameters": params,
+                        "final_value": item["final_value"],
+                        "invested": item["invested"],
+                        **metrics.pick(item, metrics.RETURN_METRICS + metrics.RISK_ADJUSTED_METRICS),
+                        "volatility": item.get("volatility", 0.0),
+                        "max_drawdown": item.get("max_drawdown", 0.0),
+                    }
+                    for params, item in zip(grid, results)
+                ],
+                performance_data=backtest.performance_rows(ledger, window_dates, nav[first:], best)
+            )
         except Exception as e:
             logger.error(f"回测分析失败: {str(e)}")
             raise
 
-    async def analyze_risk(self, fund_code: str, period: str = "1y") -> Dict[str, Any]:
+    async def analyze_risk(self, fund_code: str, period: str = "1y") -> RiskAnalysis:
         """风险分析"""
         try:
-            fund_info = await self.fund_service.get_fund_info(fund_code)
-            if not fund_info:
-                raise ValueError(f"基金 {fund_code} 不存在")
-
-            # 风险分析需要基于真实历史数据的统计计算
-            raise NotImplementedError("风险分析需要基于真实历史数据的统计计算，当前未实现")
+            end_date = datetime.now()
+            start_date = end_date - timedelta(days=ANALYSIS_PERIOD_DAYS.get(period, 365))
+            df = await self.fund_service.get_fund_history_frame(
+                fund_code, start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
+            )
+            
+            risk = metrics.compute_metrics(df["unit_net_value"].to_numpy(dtype=float), df["date"])
+            if not risk:
+                raise ValueError(f"基金 {fund_code} 的历史数据不足，无法进行风险分析")
             
+            risk_level, risk_score = self._risk_level(risk["volatility"])
+            return RiskAnalysis(
+                fund_code=fund_code,
+                fund_name=await self.fund_service.directory.resolve_name(fund_code),
+                analysis_period=period,
+                volatility=risk["volatility"],
+                max_drawdown=risk["max_drawdown"],
+                var_95=risk["var_95"],
+                var_99=risk["var_99"],
+                cvar_95=risk["cvar_95"],
+                downside_deviation=risk["downside_deviation"],
+                risk_level=risk_level,
+                risk_score=risk_score,
+                analysis_date=datetime.now()
+            )
         except Exception as e:
             logger.error(f"风险分析失败: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
+
+    def _risk_level(self, volatility: float) -> Tuple[str, float]:
+        """根据年化波动率评定风险等级和评分（0-100，波动率40%及以上为100）"""
+        score = round(min(volatility / 40 * 100, 100.0), 1)
+        for threshold, level in RISK_LEVELS:
+            if volatility < threshold:
+                return level, score
+        return RISK_LEVELS[-1][1], score
@@ -0,0 +1,241 @@
+"""
+后台预取调度 - 定期刷新热门指数/基金的行情、估值和基金列表，使用户请求命中热数据
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import suppress
+from datetime import datetime, time as dt_time, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.adapters.akshare_adapter import AKShareAdapter
+from app.core.config import settings
+from app.services.fund_directory import FundDirectory
+from app.services.index_catalog import IndexCatalog
+
+logger = logging.getLogger(__name__)
+
+# A股交易时段（北京时间）
+MARKET_TZ = timezone(timedelta(hours=8))
+MARKET_SESSIONS = [(dt_time(9, 15), dt_time(11, 30)), (dt_time(13, 0), dt_time(15, 0))]
+
+
+def is_market_open(now: Optional[datetime] = None) -> bool:
+    """当前是否处于A股交易时段（不考虑节假日）"""
+    now = now or datetime.now(MARKET_TZ)
+    if now.weekday() >= 5:
+        return False
+    current = now.time()
+    return any(start <= current <= end for start, end in MARKET_SESSIONS)
+
+
+class HotSymbols:
+    """记录用户成功请求过的代码，用于确定需要预取的热门代码
+
+    每类最多记录 max_size 个代码，超过 2 × max_size 时只保留请求次数最多的 max_size 个；
+    decay 定期把请求次数减半并删除归零的代码，不再被请求的代码会逐渐退出预取列表。
+    """
+
+    def __init__(self, max_size: int = settings.HOT_SYMBOL_MAX_SIZE):
+        self.max_size = max_size
+        self._counts: Dict[str, Counter] = {}
+
+    def record(self, kind: str, code: str) -> None:
+        counts = self._counts.setdefault(kind, Counter())
+        counts[code] += 1
+        # 超出一倍时才裁剪，避免每次记录都排序
+        if len(counts) > 2 * self.max_size:
+            self._counts[kind] = Counter(dict(counts.most_common(self.max_size)))
+
+    def decay(self) -> None:
+        for kind, counts in self._counts.items():
+            self._counts[kind] = Counter({code: count // 2 for code, count in counts.items() if count // 2 > 0})
+
+    def top(self, kind: str, n: int) -> List[str]:
+        return [code for code, _ in self._counts.get(kind, Counter()).most_common(n)]
+
+
+class RefreshJob:
+    """一个周期性刷新任务"""
+
+    def __init__(self, name: str, action: Callable[[], Awaitable[Any]], interval: float,
+                 off_hours_interval: Optional[float] = None):
+        self.name = name
+        self.action = action
+        self.interval = interval
+        # 非交易时段的刷新间隔，None 表示与交易时段相同
+        self.off_hours_interval = off_hours_interval
+        self.runs = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_run: Optional[datetime] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.next_run: Optional[datetime] = None
+
+    def base_interval(self) -> float:
+        if self.off_hours_interval is not None and not is_market_open():
+            return self.off_hours_interval
+        return self.interval
+
+
+class RefreshScheduler:
+    """基于asyncio的后台刷新调度器
+
+    每个任务一个协程循环：执行后按间隔休眠，间隔加上随机抖动以避免同时请求上游；
+    连续失败时按指数退避延长间隔。
+    """
+
+    def __init__(self, jitter: float = settings.SCHEDULER_JITTER,
+                 max_backoff: float = settings.SCHEDULER_MAX_BACKOFF):
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.jobs: List[RefreshJob] = []
+        self._tasks: List["asyncio.Task[None]"] = []
+
+    def add_job(self, name: str, action: Callable[[], Awaitable[Any]], interval: float,
+                off_hours_interval: Optional[float] = None) -> RefreshJob:
+        job = RefreshJob(name, action, interval, off_hours_interval)
+        self.jobs.append(job)
+        return job
+
+    def _next_delay(self, job: RefreshJob) -> float:
+        delay = job.base_interval()
+        if job.consecutive_failures:
+            delay = min(delay * 2 ** job.consecutive_failures, max(self.max_backoff, delay))
+        # 只向后抖动，保证两次刷新间隔不小于缓存有效期
+        return delay * (1 + random.uniform(0, self.jitter))
+
+    async def _run_job(self, job: RefreshJob) -> None:
+        # 启动时错开首次执行
+        await asyncio.sleep(random.uniform(0, self.jitter * 10))
+        while True:
+            started = time.monotonic()
+            try:
+                await job.action()
+                job.consecutive_failures = 0
+                job.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job.failures += 1
+                job.consecutive_failures += 1
+                job.last_error = str(e)
+                logger.warning(f"后台刷新任务失败 {job.name}: {str(e)}")
+            job.runs += 1
+            job.last_run = datetime.now()
+            job.last_duration = time.monotonic() - started
+
+            delay = self._next_delay(job)
+            job.next_run = datetime.now() + timedelta(seconds=delay)
+            await asyncio.sleep(delay)
+
+    def start(self) -> None:
+        """启动所有任务"""
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._run_job(job), name=f"refresh:{job.name}") for job in self.jobs]
+        logger.info(f"后台刷新调度已启动: {[job.name for job in self.jobs]}")
+
+    async def stop(self) -> None:
+        """停止所有任务"""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+        self._tasks = []
+
+    def stats(self) -> Dict[str, Any]:
+        """调度统计信息"""
+        return {
+            "running": bool(self._tasks),
+            "market_open": is_market_open(),
+            "jobs": {
+                job.name: {
+                    "runs": job.runs,
+                    "failures": job.failures,
+                    "last_run": job.last_run.isoformat() if job.last_run else None,
+                    "last_duration": round(job.last_duration, 3) if job.last_duration is not None else None,
+                    "last_error": job.last_error,
+                    "next_run": job.next_run.isoformat() if job.next_run else None,
+                }
+                for job in self.jobs
+            },
+        }
+
+
+def hot_index_codes() -> List[str]:
+    """需要预取的指数：配置的热门指数 + 请求最多的指数"""
+    codes = list(settings.HOT_INDEX_CODES)
+    codes += [code for code in hot_symbols.top("index", settings.HOT_TOP_N) if code not in codes]
+    return codes
+
+
+def hot_fund_codes() -> List[str]:
+    """需要预取的基金：配置的热门基金 + 请求最多的基金"""
+    codes = list(settings.HOT_FUND_CODES)
+    codes += [code for code in hot_symbols.top("fund", settings.HOT_TOP_N) if code not in codes]
+    return codes
+
+
+async def _refresh_all(label: str, codes: List[str], refresh: Callable[[str], Awaitable[Any]]) -> None:
+    """并发刷新一组代码，全部失败时抛出异常以触发退避"""
+    if not codes:
+        return
+    results = await asyncio.gather(*(refresh(code) for code in codes), return_exceptions=True)
+    errors = [r for r in results if isinstance(r, Exception)]
+    if errors and len(errors) == len(results):
+        raise RuntimeError(f"{label}全部失败: {errors[0]}")
+
+
+def create_scheduler(adapter: AKShareAdapter, catalog: IndexCatalog,
+                     directory: FundDirectory) -> RefreshScheduler:
+    """创建带默认刷新任务的调度器"""
+    scheduler = RefreshScheduler()
+
+    async def refresh_index_quotes() -> None:
+        await _refresh_all("刷新指数行情", hot_index_codes(),
+                           lambda code: adapter.refresh("get_index_realtime", code))
+
+    async def refresh_valuations() -> None:
+        await _refresh_all("刷新指数估值", hot_index_codes(), adapter.refresh_valuation)
+
+    async def refresh_fund_navs() -> None:
+        async def refresh(code: str) -> None:
+            await adapter.refresh("get_fund_realtime", code)
+            await adapter.refresh("get_fund_nav", code)
+        await _refresh_all("刷新基金净值", hot_fund_codes(), refresh)
+
+    async def refresh_fund_list() -> None:
+        if await adapter.refresh("get_fund_list") is None:
+            raise RuntimeError("获取基金列表失败")
+        # 基金列表已刷新到缓存，基金目录直接从缓存重建
+        await directory.load()
+
+    async def refresh_fund_companies() -> None:
+        if not await directory.load_companies():
+            raise RuntimeError("加载基金公司失败")
+
+    async def refresh_catalog() -> None:
+        if not await catalog.load():
+            raise RuntimeError("加载指数目录失败")
+
+    async def decay_hot_symbols() -> None:
+        hot_symbols.decay()
+
+    scheduler.add_job("index_catalog", refresh_catalog, settings.INDEX_CATALOG_REFRESH_INTERVAL)
+    scheduler.add_job("index_quotes", refresh_index_quotes, settings.QUOTE_REFRESH_INTERVAL,
+                      off_hours_interval=settings.OFF_HOURS_REFRESH_INTERVAL)
+    scheduler.add_job("index_valuation", refresh_valuations, settings.VALUATION_REFRESH_INTERVAL)
+    scheduler.add_job("fund_nav", refresh_fund_navs, settings.FUND_NAV_REFRESH_INTERVAL)
+    scheduler.add_job("fund_list", refresh_fund_list, settings.FUND_LIST_REFRESH_INTERVAL)
+    scheduler.add_job("fund_companies", refresh_fund_companies, settings.FUND_COMPANY_REFRESH_INTERVAL)
+    scheduler.add_job("hot_symbols_decay", decay_hot_symbols, settings.HOT_SYMBOL_DECAY_INTERVAL)
+    return scheduler
+
+
+# 进程内共享的热门代码统计
+hot_symbols = HotSymbols()
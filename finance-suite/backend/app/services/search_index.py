@@ -0,0 +1,136 @@
+"""
+代码/名称搜索索引 - 指数目录和基金目录共用
+
+加载目录时一次性建立：
+- 前缀索引（相当于展开的字典树）：代码、名称、拼音首字母的每个前缀 -> 条目列表
+- 二元组倒排索引：用于名称/拼音/代码中间位置的子串匹配
+
+条目按 (名称长度, 代码) 排序后编号，每个索引列表天然有序，
+查询按匹配等级依次取结果，取满即停，不需要对全部候选排序。
+"""
+import logging
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# 前缀索引的最大前缀长度，更长的查询在该前缀的结果上再过滤
+MAX_PREFIX_LENGTH = 8
+
+_pinyin_unavailable = False
+
+
+def pinyin_initials(name: str) -> str:
+    """中文名称的拼音首字母（小写），未安装 pypinyin 时返回空字符串"""
+    global _pinyin_unavailable
+    if _pinyin_unavailable or not name:
+        return ""
+    try:
+        from pypinyin import Style, lazy_pinyin
+    except ImportError:
+        _pinyin_unavailable = True
+        logger.info("未安装pypinyin，指数名称不支持拼音首字母搜索")
+        return ""
+    # 非汉字（字母、数字）原样保留首字符
+    return "".join(part[0] for part in lazy_pinyin(name, style=Style.FIRST_LETTER, errors="default") if part).lower()
+
+
+def _normalize(text: str) -> str:
+    return text.strip().lower()
+
+
+class SearchIndex:
+    """代码、名称和拼音首字母的前缀 + 子串搜索索引
+
+    匹配等级（越小越靠前）：代码完全匹配、代码前缀、名称完全匹配、拼音首字母前缀、
+    名称前缀、名称/拼音/代码包含。同一等级内名称越短越靠前。
+    """
+
+    def __init__(self, entries: Iterable[Dict[str, Any]] = ()):
+        self._entries: List[Dict[str, Any]] = sorted(
+            entries, key=lambda entry: (len(entry["name"]), entry["code"])
+        )
+        self._keys: List[tuple] = []
+        self._code_exact: Dict[str, List[int]] = defaultdict(list)
+        self._code_prefix: Dict[str, List[int]] = defaultdict(list)
+        self._name_exact: Dict[str, List[int]] = defaultdict(list)
+        self._initials_prefix: Dict[str, List[int]] = defaultdict(list)
+        self._name_prefix: Dict[str, List[int]] = defaultdict(list)
+        # 二元组 -> 包含它的条目编号（升序、不重复）
+        self._grams: Dict[str, List[int]] = defaultdict(list)
+
+        grams = self._grams
+        for doc_id, entry in enumerate(self._entries):
+            code = _normalize(entry["code"])
+            name = _normalize(entry["name"])
+            initials = _normalize(entry.get("pinyin_initials") or "")
+            self._keys.append((code, name, initials))
+
+            self._code_exact[code].append(doc_id)
+            self._name_exact[name].append(doc_id)
+            for text, prefixes in ((code, self._code_prefix), (initials, self._initials_prefix),
+                                   (name, self._name_prefix)):
+                for length in range(1, min(len(text), MAX_PREFIX_LENGTH) + 1):
+                    prefixes[text[:length]].append(doc_id)
+            for text in (code, name, initials):
+                for i in range(len(text) - 1):
+                    posting = grams[text[i:i + 2]]
+                    if not posting or posting[-1] != doc_id:
+                        posting.append(doc_id)
+
+        # 查询时不能因为访问不存在的键而插入空列表
+        for index in (self._code_exact, self._code_prefix, self._name_exact,
+                      self._initials_prefix, self._name_prefix, self._grams):
+            index.default_factory = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _prefix_matches(self, prefixes: Dict[str, List[int]], query: str, field: int) -> Iterable[int]:
+        candidates = prefixes.get(query[:MAX_PREFIX_LENGTH], [])
+        if len(query) <= MAX_PREFIX_LENGTH:
+            return candidates
+        return (doc_id for doc_id in candidates if self._keys[doc_id][field].startswith(query))
+
+    def _substring_matches(self, query: str) -> Iterable[int]:
+        """在最短的二元组倒排列表上逐个确认是否包含查询串（列表有序，取满即可停止）"""
+        if len(query) < 2:
+            return []
+        postings = [self._grams.get(query[i:i + 2]) for i in range(len(query) - 1)]
+        if not all(postings):
+            return []
+        shortest = min(postings, key=len)
+        return (
+            doc_id for doc_id in shortest
+            if any(query in key for key in self._keys[doc_id])
+        )
+
+    def search(self, query: str, limit: int = 10,
+               predicate: Optional[Callable[[Dict[str, Any]], bool]] = None) -> List[Dict[str, Any]]:
+        """按匹配等级返回至多 limit 个条目，predicate 可进一步筛选条目"""
+        query = _normalize(query)
+        if not query or limit <= 0:
+            return []
+
+        tiers = (
+            lambda: self._code_exact.get(query, []),
+            lambda: self._prefix_matches(self._code_prefix, query, 0),
+            lambda: self._name_exact.get(query, []),
+            lambda: self._prefix_matches(self._initials_prefix, query, 2),
+            lambda: self._prefix_matches(self._name_prefix, query, 1),
+            lambda: self._substring_matches(query),
+        )
+        results: List[Dict[str, Any]] = []
+        seen: Set[int] = set()
+        for tier in tiers:
+            for doc_id in tier():
+                if doc_id in seen:
+                    continue
+                entry = self._entries[doc_id]
+                if predicate is not None and not predicate(entry):
+                    continue
+                seen.add(doc_id)
+                results.append(entry)
+                if len(results) >= limit:
+                    return results
+        return results
@@ -0,0 +1,139 @@
+"""
+DataFrame -> 响应模型转换的基准测试：按列转换（converters）与原来的逐行 iterrows 转换对比
+
+在 backend 目录下运行：python -m tests.benchmark_converters [--runs 5]
+输出每种数据的单行耗时（微秒/行）。数据为固定种子生成的模拟数据，结果可复现。
+"""
+import argparse
+import time
+from typing import Callable, List
+
+import numpy as np
+import pandas as pd
+
+from app.schemas.fund_schemas import FundBaseInfo, FundDataPoint, FundType
+from app.schemas.index_schemas import IndexDataPoint
+from app.services.converters import (
+    fund_base_infos, fund_data_points, fund_history_columns, index_data_points, index_history_columns
+)
+
+
+def make_fund_history(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    nav = np.cumprod(1 + rng.normal(0.0003, 0.01, rows))
+    return pd.DataFrame({
+        "净值日期": pd.bdate_range("2020-01-01", periods=rows).strftime("%Y-%m-%d"),
+        "单位净值": nav,
+        "累计净值": nav + 0.5,
+        "日增长率": np.concatenate(([np.nan], np.diff(nav) / nav[:-1] * 100)),
+    })
+
+
+def make_index_history(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 3000 * np.cumprod(1 + rng.normal(0.0003, 0.012, rows))
+    return pd.DataFrame({
+        "date": pd.bdate_range("2020-01-01", periods=rows).strftime("%Y-%m-%d"),
+        "open": close * 0.998,
+        "close": close,
+        "high": close * 1.01,
+        "low": close * 0.99,
+        "volume": rng.integers(1_000_000, 9_000_000, rows),
+        "amount": rng.uniform(1e9, 9e9, rows),
+    })
+
+
+def make_fund_entries(rows: int) -> List[dict]:
+    return [
+        {"code": f"{i:06d}", "name": f"测试基金{i}", "fund_type": FundType.HYBRID, "company": "测试基金公司"}
+        for i in range(rows)
+    ]
+
+
+# 原来的逐行转换实现，作为对照
+def fund_history_by_row(df: pd.DataFrame) -> List[FundDataPoint]:
+    data_points = []
+    for _, row in df.iterrows():
+        data_points.append(FundDataPoint(
+            date=row['净值日期'],
+            unit_net_value=float(row['单位净值']),
+            accumulated_net_value=float(row['累计净值']),
+            daily_growth_rate=float(row.get('日增长率', 0)) if pd.notnull(row.get('日增长率')) else None
+        ))
+    return data_points
+
+
+def index_history_by_row(df: pd.DataFrame) -> List[IndexDataPoint]:
+    data_points = []
+    for _, row in df.iterrows():
+        data_points.append(IndexDataPoint(
+            date=row["date"],
+            open_value=float(row["open"]),
+            close_value=float(row["close"]),
+            high_value=float(row["high"]),
+            low_value=float(row["low"]),
+            volume=int(row.get("volume", 0)),
+            change_value=0.0,
+            change_percent=0.0
+        ))
+    for i in range(1, len(data_points)):
+        prev_close = data_points[i - 1].close_value
+        change = data_points[i].close_value - prev_close
+        data_points[i].change_value = round(change, 2)
+        data_points[i].change_percent = round((change / prev_close * 100) if prev_close > 0 else 0, 2)
+    return data_points
+
+
+def fund_list_by_row(df: pd.DataFrame) -> List[FundBaseInfo]:
+    funds = []
+    for _, row in df.iterrows():
+        funds.append(FundBaseInfo(
+            code=str(row.get('code', '')),
+            name=str(row.get('name', '')),
+            fund_type=row.get('fund_type'),
+            company=str(row.get('company', ''))
+        ))
+    return funds
+
+
+def per_row_microseconds(func: Callable[[], list], rows: int, runs: int) -> float:
+    """多次运行取平均，返回每行耗时（微秒）"""
+    func()  # 预热
+    elapsed = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        elapsed.append(time.perf_counter() - started)
+    return float(np.mean(elapsed)) / rows * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="每项重复次数")
+    args = parser.parse_args()
+
+    fund_history = make_fund_history(1250)
+    index_history = make_index_history(1250)
+    entries = make_fund_entries(10000)
+    entries_df = pd.DataFrame(entries)
+
+    cases = [
+        ("fund history", len(fund_history),
+         lambda: fund_history_by_row(fund_history),
+         lambda: fund_data_points(fund_history_columns(fund_history))),
+        ("index history", len(index_history),
+         lambda: index_history_by_row(index_history),
+         lambda: index_data_points(index_history_columns(index_history))),
+        ("fund list", len(entries),
+         lambda: fund_list_by_row(entries_df),
+         lambda: fund_base_infos(entries)),
+    ]
+    print(f"{'case':<15}{'rows':>8}{'per-row us':>14}{'columnar us':>14}{'speedup':>10}")
+    for name, rows, by_row, columnar in cases:
+        before = per_row_microseconds(by_row, rows, args.runs)
+        after = per_row_microseconds(columnar, rows, args.runs)
+        print(f"{name:<15}{rows:>8}{before:>14.1f}{after:>14.1f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
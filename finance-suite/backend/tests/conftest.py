@@ -0,0 +1,49 @@
+"""
+测试公共配置：把后端目录加入导入路径，测试中可以直接 import app
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import pytest
+
+from app.core.executor import BlockingExecutor
+from app.services.fund_directory import FundDirectory
+from app.services.fund_service import FundService
+from app.services.prediction_service import PredictionService
+
+
+class FakeFundAdapter:
+    """只提供基金列表和历史净值的内存适配器"""
+
+    def __init__(self, nav: pd.DataFrame):
+        self.executor = BlockingExecutor(2, {})
+        self.nav = nav
+
+    async def get_fund_list(self):
+        return pd.DataFrame({"基金代码": ["000001"], "基金简称": ["测试基金"], "基金类型": ["股票型"],
+                             "拼音缩写": ["CSJJ"]})
+
+    async def get_fund_history(self, fund_code, start_date, end_date):
+        df = self.nav[(self.nav["净值日期"] >= start_date) & (self.nav["净值日期"] <= end_date)]
+        return df if not df.empty else None
+
+
+@pytest.fixture
+def prediction_service():
+    """由净值序列（日期 -> 单位净值）构建预测服务"""
+    adapters = []
+
+    def build(dates, navs) -> PredictionService:
+        nav = pd.DataFrame({"净值日期": list(dates), "单位净值": list(navs)})
+        nav["累计净值"] = nav["单位净值"]
+        nav["日增长率"] = 0.0
+        adapter = FakeFundAdapter(nav)
+        adapters.append(adapter)
+        return PredictionService(FundService(adapter, FundDirectory(adapter)))
+
+    yield build
+    for adapter in adapters:
+        adapter.executor.shutdown()
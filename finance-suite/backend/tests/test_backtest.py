@@ -0,0 +1,158 @@
+"""
+策略回测账本（手工计算的用例）和参数组合
+"""
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import backtest
+
+
+def test_parameter_grid_is_cartesian_product_with_defaults():
+    grid = backtest.parameter_grid("valuation", {"threshold": [20, 30], "multiplier": [2, 3]})
+
+    assert [(p["threshold"], p["multiplier"]) for p in grid] == [(20, 2), (20, 3), (30, 2), (30, 3)]
+    assert {p["window"] for p in grid} == {756}
+    assert backtest.parameter_grid("dca") == [{}]
+
+
+def test_parameter_grid_rejects_unknown_strategy_or_parameter():
+    with pytest.raises(ValueError):
+        backtest.parameter_grid("martingale")
+    with pytest.raises(ValueError):
+        backtest.parameter_grid("dca", {"target_growth": [0.1]})
+
+
+def test_lump_sum_ledger():
+    ledger = backtest.run([1.0, 2.0, 4.0], np.array([0]), 100.0, "lump_sum", [{}])
+
+    assert ledger["shares"][:, 0].tolist() == [100.0, 100.0, 100.0]
+    assert ledger["market_value"][:, 0].tolist() == [100.0, 200.0, 400.0]
+    assert ledger["cash"][:, 0].tolist() == [0.0, 0.0, 0.0]
+
+
+def test_dca_ledger_keeps_uninvested_cash():
+    ledger = backtest.run([1.0, 2.0, 4.0, 4.0], np.array([0, 1, 2]), 300.0, "dca", [{}])
+
+    assert ledger["shares"][:, 0].tolist() == [100.0, 150.0, 175.0, 175.0]
+    assert ledger["invested"][:, 0].tolist() == [100.0, 200.0, 300.0, 300.0]
+    assert ledger["cash"][:, 0].tolist() == [200.0, 100.0, 0.0, 0.0]
+    assert ledger["total_value"][:, 0].tolist() == [300.0, 400.0, 700.0, 700.0]
+
+
+def test_ledger_starts_at_first_trading_day():
+    # 第一个交易日之前的净值只用于回看，不出现在账本中
+    ledger = backtest.run([9.0, 1.0, 2.0], np.array([1]), 100.0, "lump_sum", [{}], first=1)
+    assert ledger["total_value"][:, 0].tolist() == [100.0, 200.0]
+
+
+def test_value_averaging_tops_up_to_target():
+    grid = [{"target_growth": 0.0}]
+    shares = backtest.strategy_shares("value_averaging", np.array([1.0, 0.5, 1.0]), np.arange(3), 300.0, grid)
+
+    # 目标市值 100/200/300：目标份额 100/400/300，不卖出时第三期不买入
+    assert shares[:, 0].tolist() == [100.0, 300.0, 0.0]
+
+
+def test_value_averaging_is_capped_by_budget():
+    grid = [{"target_growth": 0.0}]
+    shares = backtest.strategy_shares("value_averaging", np.array([1.0, 0.25]), np.arange(2), 200.0, grid)
+
+    # 第二期需要 175 元，只剩 100 元现金
+    assert shares[:, 0].tolist() == [100.0, 400.0]
+
+
+def test_value_averaging_target_grows():
+    grid = [{"target_growth": 0.12}]
+    shares = backtest.strategy_shares("value_averaging", np.ones(2), np.arange(2), 1000.0, grid)
+
+    # 第二期目标市值 500 × 2 × 1.01 = 1010，超出投资总额
+    assert shares[:, 0].tolist() == pytest.approx([500.0, 500.0])
+
+
+def test_valuation_scales_purchases_by_percentile():
+    nav = np.array([2.0, 1.0, 3.0])
+    grid = backtest.parameter_grid("valuation", {"multiplier": [1, 2], "window": [3]})
+    shares = backtest.strategy_shares("valuation", nav, np.arange(3), 300.0, grid)
+
+    # multiplier=1 等同于定投
+    assert shares[:, 0].tolist() == pytest.approx([50.0, 100.0, 100 / 3])
+    # 第一期只有一个净值，分位数按50处理；第二期处于最低（0%）加倍买入，用完投资总额
+    assert shares[:, 1].tolist() == pytest.approx([50.0, 200.0, 0.0])
+
+
+def test_nav_percentile_uses_only_the_window():
+    nav = np.array([5.0, 1.0, 2.0, 3.0])
+    percentile = backtest._periodic_nav_percentile(nav, np.array([3]), np.array([3, 4]))
+
+    assert percentile[0].tolist() == pytest.approx([100.0, 200 / 3])
+
+
+def test_evaluate_account_value():
+    ledger = backtest.run([1.0, 0.5, 2.0], np.array([0]), 100.0, "lump_sum", [{}])
+    result = backtest.evaluate(ledger, ["d0", "d1", "d2"], 100.0)[0]
+
+    assert result["final_value"] == 200.0
+    assert result["invested"] == 100.0
+    assert result["total_profit"] == 100.0
+    assert result["total_return"] == pytest.approx(100.0)
+    assert result["max_drawdown"] == pytest.approx(50.0)
+    assert (result["max_drawdown_peak_date"], result["max_drawdown_trough_date"]) == ("d0", "d1")
+
+
+def test_best_combination_and_performance_rows():
+    assert backtest.best_combination([{"sharpe_ratio": 0.5}, {"sharpe_ratio": 1.5}, {}]) == 1
+
+    ledger = backtest.run([1.0, 2.0], np.array([0, 1]), 200.0, "dca", [{}])
+    rows = backtest.performance_rows(ledger, ["d0", "d1"], np.array([1.0, 2.0]), 0)
+    assert rows[1] == {"date": "d1", "nav": 2.0, "shares": 150.0, "invested": 200.0,
+                       "market_value": 300.0, "cash": 0.0, "total_value": 300.0}
+
+
+@pytest.fixture
+def nav_history():
+    dates = pd.bdate_range("2024-01-02", "2024-03-29").strftime("%Y-%m-%d")
+    navs = 1 + 0.2 * np.sin(np.arange(len(dates)) / 6)
+    return dates, navs
+
+
+def test_backtest_investment_dca(prediction_service, nav_history):
+    dates, navs = nav_history
+    service = prediction_service(dates, navs)
+
+    result = asyncio.run(service.backtest_investment("000001", 300.0, "2024-01-02", "2024-03-29", "dca"))
+
+    purchase = [dates.get_loc(day) for day in ("2024-01-02", "2024-02-02", "2024-03-04")]
+    assert result.final_value == pytest.approx((100 / navs[purchase]).sum() * navs[-1])
+    assert result.total_return == pytest.approx(result.final_value - 300.0)
+    assert len(result.performance_data) == len(dates)
+    assert result.performance_data[0]["cash"] == 200.0
+    assert result.parameters == {}
+
+
+def test_backtest_investment_picks_best_sharpe(prediction_service, nav_history):
+    dates, navs = nav_history
+    service = prediction_service(dates, navs)
+
+    result = asyncio.run(service.backtest_investment(
+        "000001", 300.0, "2024-01-02", "2024-03-29", "valuation",
+        {"threshold": [20, 40], "multiplier": [1, 3], "window": [10]}
+    ))
+
+    assert len(result.parameter_results) == 4
+    best = max(result.parameter_results, key=lambda item: item["sharpe_ratio"])
+    assert result.parameters == best["parameters"]
+    assert result.sharpe_ratio == best["sharpe_ratio"]
+    assert result.final_value == best["final_value"]
+
+
+def test_backtest_investment_rejects_invalid_requests(prediction_service, nav_history):
+    service = prediction_service(*nav_history)
+
+    with pytest.raises(ValueError):
+        asyncio.run(service.backtest_investment("000001", 300.0, "2024-03-01", "2024-01-02", "dca"))
+    with pytest.raises(ValueError):
+        asyncio.run(service.backtest_investment("000001", 300.0, "2024-01-02", "2024-03-29", "dca",
+                                                {"window": [10]}))
@@ -0,0 +1,149 @@
+"""
+响应缓存：过期、LRU淘汰、stale-while-revalidate
+"""
+import asyncio
+
+import pytest
+
+from app.core import cache as cache_module
+from app.core.cache import TTLCache, cached
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+
+
+class FakeClock:
+    """可手动推进的 time 替身（只提供 monotonic）"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache_module, "time", fake)
+    return fake
+
+
+class Source:
+    """带缓存方法的数据源，记录上游调用次数"""
+
+    def __init__(self, cache: TTLCache):
+        self.cache = cache
+        self.flight = SingleFlight()
+        self.calls = 0
+        self.value = {"price": 1.0}
+
+    @cached(ttl=60)
+    async def quote(self, code: str):
+        self.calls += 1
+        return dict(self.value) if self.value is not None else None
+
+
+def test_entry_expires_after_ttl(clock):
+    cache = TTLCache(max_size=10, default_ttl=60)
+    cache.set("a", 1)
+
+    clock.now += 59
+    assert cache.get("a") == 1
+    clock.now += 1
+    assert cache.get("a") is None
+    assert "a" not in cache
+    assert cache.stats()["expirations"] == 1
+
+
+def test_stale_entry_served_within_grace(clock):
+    cache = TTLCache(max_size=10, default_ttl=60, stale_grace=30)
+    cache.set("a", 1)
+
+    clock.now += 70
+    assert cache.get("a") is None
+    entry = cache.get_entry("a")
+    assert entry is not None and entry.stale and entry.value == 1
+
+    clock.now += 30
+    assert cache.get_entry("a") is None
+    assert len(cache) == 0
+
+
+def test_lru_eviction_keeps_recently_used(clock):
+    cache = TTLCache(max_size=2, default_ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # a 变为最近使用
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_zero_ttl_is_not_stored(clock):
+    cache = TTLCache(max_size=2, default_ttl=60)
+    cache.set("a", 1, ttl=0)
+    assert len(cache) == 0
+
+
+def test_cached_method_hits_cache_and_returns_copies(clock):
+    async def scenario():
+        source = Source(TTLCache(max_size=10, default_ttl=60, stale_grace=30))
+        first = await source.quote("000300")
+        first["price"] = 99.0  # 修改返回值不影响缓存
+        second = await source.quote("000300")
+        return source, second
+
+    source, second = asyncio.run(scenario())
+    assert source.calls == 1
+    assert second == {"price": 1.0, "stale": False}
+
+
+def test_cached_method_does_not_cache_none(clock):
+    async def scenario():
+        source = Source(TTLCache(max_size=10, default_ttl=60))
+        source.value = None
+        assert await source.quote("000300") is None
+        assert await source.quote("000300") is None
+        return source
+
+    assert asyncio.run(scenario()).calls == 2
+
+
+def test_stale_while_revalidate_returns_old_value_and_refreshes_once(clock):
+    async def scenario():
+        source = Source(TTLCache(max_size=10, default_ttl=60, stale_grace=30))
+        await source.quote("000300")
+        source.value = {"price": 2.0}
+        clock.now += 61
+
+        # 过期后的两次并发请求都立即拿到旧值，后台只刷新一次
+        stale = await asyncio.gather(source.quote("000300"), source.quote("000300"))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        fresh = await source.quote("000300")
+        return source, stale, fresh
+
+    source, stale, fresh = asyncio.run(scenario())
+    assert stale == [{"price": 1.0, "stale": True}] * 2
+    assert fresh == {"price": 2.0, "stale": False}
+    assert source.calls == 2
+
+
+def test_result_marked_stale_is_cached_briefly(clock):
+    async def scenario():
+        source = Source(TTLCache(max_size=10, default_ttl=300, stale_grace=0))
+        source.value = {"price": 1.0, "stale": True}
+        first = await source.quote("000300")
+        hit = await source.quote("000300")
+        clock.now += settings.CACHE_TTL_STALE_RESULT
+        source.value = {"price": 2.0}
+        refreshed = await source.quote("000300")
+        return source, first, hit, refreshed
+
+    source, first, hit, refreshed = asyncio.run(scenario())
+    assert first["stale"] and hit["stale"]
+    assert refreshed == {"price": 2.0, "stale": False}
+    assert source.calls == 2
@@ -0,0 +1,64 @@
+"""
+按列转换与逐行转换的结果一致性
+"""
+import math
+
+import numpy as np
+
+from app.services.converters import (
+    fund_base_infos, fund_data_points, fund_history_columns, index_data_points, index_history_columns
+)
+from benchmark_converters import (
+    fund_history_by_row, index_history_by_row, make_fund_entries, make_fund_history, make_index_history
+)
+
+
+def test_fund_history_matches_per_row_conversion():
+    df = make_fund_history(50)
+    columnar = fund_data_points(fund_history_columns(df))
+    by_row = fund_history_by_row(df)
+
+    assert [point.model_dump() for point in columnar] == [point.model_dump() for point in by_row]
+    # 第一天没有日增长率，返回None而不是NaN
+    assert columnar[0].daily_growth_rate is None
+
+
+def test_fund_history_without_accumulated_nav_returns_none():
+    df = make_fund_history(3).drop(columns=["累计净值"])
+    points = fund_data_points(fund_history_columns(df))
+
+    assert [point.accumulated_net_value for point in points] == [None, None, None]
+
+
+def test_index_history_matches_per_row_conversion():
+    df = make_index_history(50)
+    columnar = index_data_points(index_history_columns(df))
+    by_row = index_history_by_row(df)
+
+    assert len(columnar) == len(by_row)
+    for new, old in zip(columnar, by_row):
+        assert new.date == old.date
+        assert new.close_value == old.close_value
+        assert new.volume == old.volume
+        assert math.isclose(new.change_value, old.change_value, abs_tol=1e-9)
+        assert math.isclose(new.change_percent, old.change_percent, abs_tol=1e-9)
+    assert columnar[0].change_value == 0.0
+    assert columnar[0].turnover == float(df["amount"].iloc[0])
+
+
+def test_index_history_change_percent_with_zero_previous_close():
+    df = make_index_history(3)
+    df.loc[0, "close"] = 0.0
+    columns = index_history_columns(df)
+
+    assert columns["change_percent"][1] == 0.0
+    assert not np.isnan(columns["change_value"]).any()
+
+
+def test_fund_base_infos_preserves_entries():
+    entries = make_fund_entries(3)
+    infos = fund_base_infos(entries)
+
+    assert [(info.code, info.name, info.fund_type, info.company) for info in infos] == [
+        (entry["code"], entry["name"], entry["fund_type"], entry["company"]) for entry in entries
+    ]
@@ -0,0 +1,98 @@
+"""
+定投账本、资金加权收益率和一次性投资对比（手工计算的用例）
+"""
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import dca
+
+
+def test_purchase_positions_roll_forward_and_keep_day_of_month():
+    dates = pd.bdate_range("2024-01-01", "2024-06-30").strftime("%Y-%m-%d")
+    positions = dca.purchase_positions(dates, "2024-01-31", 6)
+
+    # 3月31日是周日顺延到4月1日；6月30日之后没有净值，不返回
+    assert dates[positions].tolist() == ["2024-01-31", "2024-02-29", "2024-04-01", "2024-04-30", "2024-05-31"]
+
+
+def test_ledger_hand_computed():
+    ledger = dca.dca_ledger([1.0, 2.0, 4.0], 100.0)
+
+    assert ledger["shares_purchased"].tolist() == [100.0, 50.0, 25.0]
+    assert ledger["cumulative_shares"].tolist() == [100.0, 150.0, 175.0]
+    assert ledger["cumulative_investment"].tolist() == [100.0, 200.0, 300.0]
+    assert ledger["market_value"].tolist() == [100.0, 300.0, 700.0]
+    assert ledger["total_return"].tolist() == [0.0, 100.0, 400.0]
+    assert ledger["return_rate"].tolist() == pytest.approx([0.0, 50.0, 400 / 3])
+
+
+def test_ledger_columns_are_independent_funds():
+    prices = np.array([[1.0, 2.0], [2.0, 1.0]])
+    ledger = dca.dca_ledger(prices, 100.0)
+
+    assert ledger["cumulative_shares"][-1].tolist() == [150.0, 150.0]
+    assert ledger["market_value"][-1].tolist() == [300.0, 150.0]
+
+
+def test_money_weighted_return_hand_computed():
+    # 两笔100元，分别持有1年和半年，按10%年化增长
+    final_value = 100 * 1.1 + 100 * 1.1 ** 0.5
+    assert dca.money_weighted_return([100.0, 100.0], [1.0, 0.5], final_value) == pytest.approx(10.0)
+    # 单笔投资持有2年，100 -> 121
+    assert dca.money_weighted_return([100.0], [2.0], 121.0) == pytest.approx(10.0)
+    # 亏损
+    assert dca.money_weighted_return([100.0], [1.0], 80.0) == pytest.approx(-20.0)
+
+
+def test_money_weighted_return_for_several_funds_at_once():
+    amounts = np.full((2, 2), 100.0)
+    result = dca.money_weighted_return(amounts, [2.0, 1.0], [100 * 1.21 + 100 * 1.1, 400.0])
+
+    assert result[0] == pytest.approx(10.0)
+    assert 100 * (1 + result[1] / 100) ** 2 + 100 * (1 + result[1] / 100) == pytest.approx(400.0)
+
+
+def test_sub_day_horizon_is_not_annualized():
+    assert dca.money_weighted_return([100.0], [0.0], 110.0) == 0.0
+    assert dca.lump_sum_comparison(100.0, 1.0, 1.1, years=0.0)["lump_sum_annualized_return"] == 0.0
+
+
+def test_lump_sum_comparison_hand_computed():
+    result = dca.lump_sum_comparison(300.0, 1.0, 4.0, years=1.0, dca_final_value=700.0)
+
+    assert result["lump_sum_final_value"] == pytest.approx(1200.0)
+    assert result["lump_sum_total_return"] == pytest.approx(900.0)
+    assert result["lump_sum_return_rate"] == pytest.approx(300.0)
+    assert result["lump_sum_annualized_return"] == pytest.approx(300.0)
+    assert result["dca_advantage"] == pytest.approx(-500.0)
+
+
+def test_analyze_dca_strategy(prediction_service):
+    dates = pd.bdate_range("2024-01-02", "2024-03-29").strftime("%Y-%m-%d")
+    navs = 1 + 0.01 * np.arange(len(dates))
+    service = prediction_service(dates, navs)
+
+    result = asyncio.run(service.analyze_dca_strategy("000001", 100.0, 3, "2024-01-02"))
+
+    purchase = [dates.get_loc(day) for day in ("2024-01-02", "2024-02-02", "2024-03-04")]
+    shares = 100 / navs[purchase]
+    assert [point.date for point in result.data_points] == ["2024-01-02", "2024-02-02", "2024-03-04"]
+    assert result.fund_name == "测试基金"
+    assert result.total_investment == 300.0
+    assert result.final_value == pytest.approx(shares.sum() * navs[-1])
+    assert result.data_points[-1].cumulative_shares == pytest.approx(shares.sum())
+    assert result.lump_sum_comparison["lump_sum_final_value"] == pytest.approx(300 * navs[-1] / navs[0])
+    assert result.lump_sum_comparison["dca_advantage"] == pytest.approx(
+        result.final_value - 300 * navs[-1] / navs[0]
+    )
+    assert result.annualized_return > 0
+
+
+def test_analyze_dca_strategy_rejects_single_nav_point(prediction_service):
+    service = prediction_service(["2024-01-02"], [1.0])
+
+    with pytest.raises(ValueError):
+        asyncio.run(service.analyze_dca_strategy("000001", 100.0, 1, "2024-01-02"))
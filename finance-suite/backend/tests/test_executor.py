@@ -0,0 +1,101 @@
+"""
+阻塞调用执行器：按接口族的并发上限
+"""
+import asyncio
+import threading
+import time
+
+from app.core.executor import BlockingExecutor
+
+
+def test_family_limit_bounds_concurrency():
+    executor = BlockingExecutor(max_workers=8, family_limits={"quotes": 2})
+    lock = threading.Lock()
+    running = peak = 0
+
+    def work():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+        return threading.current_thread().name
+
+    async def scenario():
+        return await asyncio.gather(*(executor.run("quotes", work) for _ in range(6)))
+
+    names = asyncio.run(scenario())
+    executor.shutdown()
+    assert peak == 2
+    assert all(name.startswith("blocking") for name in names)
+    stats = executor.stats()["families"]["quotes"]
+    assert stats["calls"] == 6 and stats["active"] == 0 and stats["max_waiting"] == 4
+
+
+def test_saturated_family_does_not_block_others():
+    executor = BlockingExecutor(max_workers=4, family_limits={"history": 1, "quotes": 1})
+    release = threading.Event()
+
+    async def scenario():
+        slow = [asyncio.ensure_future(executor.run("history", release.wait, 1)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        quick = await asyncio.wait_for(executor.run("quotes", lambda: "quote"), timeout=0.5)
+        release.set()
+        await asyncio.gather(*slow)
+        return quick
+
+    assert asyncio.run(scenario()) == "quote"
+    executor.shutdown()
+
+
+def test_cancelled_caller_keeps_slot_until_thread_finishes():
+    executor = BlockingExecutor(max_workers=2, family_limits={"store": 1})
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.ensure_future(executor.run("store", release.wait, 1))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.sleep(0.01)
+        # 线程仍在运行，名额没有释放
+        assert executor.stats()["families"]["store"]["active"] == 1
+        release.set()
+        return await asyncio.wait_for(executor.run("store", lambda: "next"), timeout=1)
+
+    assert asyncio.run(scenario()) == "next"
+    executor.shutdown()
+
+
+def test_exceptions_propagate_and_release_slot():
+    executor = BlockingExecutor(max_workers=2, family_limits={"metadata": 1})
+
+    def fail():
+        raise ValueError("bad")
+
+    async def scenario():
+        try:
+            await executor.run("metadata", fail)
+        except ValueError as e:
+            error = str(e)
+        return error, await executor.run("metadata", lambda: "ok")
+
+    assert asyncio.run(scenario()) == ("bad", "ok")
+    executor.shutdown()
+
+
+def test_thread_finishing_after_loop_closed_is_ignored(caplog):
+    executor = BlockingExecutor(max_workers=1, family_limits={})
+    release = threading.Event()
+
+    async def scenario():
+        asyncio.ensure_future(executor.run("store", release.wait, 1))
+        await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    executor.shutdown(wait=False)
+    release.set()
+    time.sleep(0.05)
+    # 线程池会把完成回调中的异常记录到 concurrent.futures 日志
+    assert not [record for record in caplog.records if record.name == "concurrent.futures"]
@@ -0,0 +1,65 @@
+"""
+本地时间序列存储：读写、覆盖范围
+"""
+import pandas as pd
+import pytest
+
+from app.adapters.history_store import HistoryStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(str(tmp_path / "history.db"))
+
+
+def bars(dates, start=1.0):
+    closes = [start + i for i in range(len(dates))]
+    return pd.DataFrame({
+        "date": dates, "open": closes, "close": closes, "high": closes, "low": closes,
+        "volume": [100.0] * len(dates), "amount": [1000.0] * len(dates),
+    })
+
+
+def test_coverage_is_none_before_first_write(store):
+    assert store.coverage("index_daily", "000300") is None
+
+
+def test_read_returns_rows_within_range_in_order(store):
+    store.write("index_daily", "000300", bars(["2024-01-03", "2024-01-02", "2024-01-04"]),
+                "2024-01-01", "2024-01-05")
+
+    df = store.read("index_daily", "000300", "2024-01-03", "2024-01-04")
+    assert df["date"].tolist() == ["2024-01-03", "2024-01-04"]
+    assert store.read("index_daily", "000905").empty
+
+
+def test_write_overwrites_same_date_and_extends_coverage(store):
+    store.write("index_daily", "000300", bars(["2024-01-02", "2024-01-03"]), "2024-01-02", "2024-01-03")
+    store.write("index_daily", "000300", bars(["2024-01-03", "2024-01-04"], start=10.0), "2024-01-03", "2024-01-06")
+    store.write("index_daily", "000300", None, "2023-12-25", "2024-01-01")
+
+    df = store.read("index_daily", "000300")
+    assert df["date"].tolist() == ["2024-01-02", "2024-01-03", "2024-01-04"]
+    assert df["close"].tolist() == [1.0, 10.0, 11.0]
+
+    coverage = store.coverage("index_daily", "000300")
+    # 请求过的区间（含没有数据的日期）和实际数据范围分开记录
+    assert (coverage.covered_from, coverage.covered_to) == ("2023-12-25", "2024-01-06")
+    assert (coverage.first_date, coverage.last_date) == ("2024-01-02", "2024-01-04")
+    assert coverage.age < 60
+
+
+def test_read_tail_returns_latest_rows_ascending(store):
+    store.write("index_daily", "000300", bars(["2024-01-02", "2024-01-03", "2024-01-04"]),
+                "2024-01-02", "2024-01-04")
+
+    assert store.read_tail("index_daily", "000300", 2)["date"].tolist() == ["2024-01-03", "2024-01-04"]
+
+
+def test_missing_columns_are_stored_as_null(store):
+    nav = pd.DataFrame({"date": ["2024-01-02"], "unit_net_value": [1.23]})
+    store.write("fund_nav", "000001", nav, "2024-01-02", "2024-01-02")
+
+    row = store.read("fund_nav", "000001").iloc[0]
+    assert row["unit_net_value"] == 1.23
+    assert pd.isna(row["accumulated_net_value"])
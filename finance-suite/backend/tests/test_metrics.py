@@ -0,0 +1,131 @@
+"""
+向量化指标计算：与 pandas 逐项计算的参考值对比
+"""
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import metrics
+from app.services.metrics import TRADING_DAYS
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(42)
+    dates = pd.bdate_range("2022-01-03", periods=300).strftime("%Y-%m-%d")
+    prices = pd.Series(100 * np.cumprod(1 + rng.normal(0.0004, 0.015, 300)), index=dates)
+    return prices
+
+
+def reference(prices: pd.Series, risk_free_rate: float = metrics.RISK_FREE_RATE) -> dict:
+    """pandas 参考实现"""
+    returns = prices.pct_change().dropna()
+    drawdown = 1 - prices / prices.cummax()
+    trough = drawdown.idxmax()
+    peak = prices.loc[:trough].idxmax()
+    var = {level: -returns.quantile(1 - level / 100) for level in (95, 99)}
+    cvar = {level: -returns[returns <= -var[level]].mean() for level in (95, 99)}
+    volatility = returns.std(ddof=1) * math.sqrt(TRADING_DAYS)
+    growth = prices.iloc[-1] / prices.iloc[0]
+    return {
+        "total_return": (growth - 1) * 100,
+        "annualized_return": (growth ** (TRADING_DAYS / (len(prices) - 1)) - 1) * 100,
+        "volatility": volatility * 100,
+        "max_drawdown": drawdown.max() * 100,
+        "max_drawdown_peak_date": peak,
+        "max_drawdown_trough_date": trough,
+        "var_95": var[95] * 100,
+        "var_99": var[99] * 100,
+        "cvar_95": cvar[95] * 100,
+        "cvar_99": cvar[99] * 100,
+        "sharpe_ratio": (returns.mean() * TRADING_DAYS - risk_free_rate) / volatility,
+    }
+
+
+def test_single_series_matches_pandas_reference(series):
+    result = metrics.compute_metrics(series.to_numpy(), series.index)
+    expected = reference(series)
+
+    for key, value in expected.items():
+        if isinstance(value, str):
+            assert result[key] == value, key
+        else:
+            assert result[key] == pytest.approx(value, rel=1e-9), key
+    assert result["calmar_ratio"] == pytest.approx(result["annualized_return"] / result["max_drawdown"])
+
+
+def test_matrix_columns_match_single_series(series):
+    other = series.iloc[::-1].reset_index(drop=True).set_axis(series.index) * 0.5
+    matrix = np.column_stack([series.to_numpy(), other.to_numpy()])
+
+    results = metrics.compute_metrics_matrix(matrix, series.index, ["a", "b"])
+    assert results["a"] == pytest.approx(metrics.compute_metrics(series.to_numpy(), series.index))
+    assert results["b"]["volatility"] == pytest.approx(reference(other)["volatility"])
+    assert results["b"]["max_drawdown_trough_date"] == reference(other)["max_drawdown_trough_date"]
+
+
+def test_column_with_late_start_uses_only_its_own_data(series):
+    late = series.copy()
+    late.iloc[:100] = np.nan
+    matrix = np.column_stack([series.to_numpy(), late.to_numpy()])
+
+    result = metrics.compute_metrics_matrix(matrix, series.index, ["full", "late"])["late"]
+    expected = reference(series.iloc[100:])
+    for key in ("total_return", "annualized_return", "volatility", "max_drawdown", "var_95", "cvar_95"):
+        assert result[key] == pytest.approx(expected[key], rel=1e-9), key
+
+
+def test_gaps_are_forward_filled(series):
+    gapped = series.copy()
+    gapped.iloc[[10, 11, 50]] = np.nan
+
+    result = metrics.compute_metrics(gapped.to_numpy(), gapped.index)
+    expected = reference(gapped.ffill())
+    assert result["volatility"] == pytest.approx(expected["volatility"])
+    assert result["max_drawdown"] == pytest.approx(expected["max_drawdown"])
+
+
+def test_known_drawdown_and_dates():
+    prices = [100, 120, 90, 110, 60, 130]
+    dates = ["d0", "d1", "d2", "d3", "d4", "d5"]
+
+    result = metrics.compute_metrics(prices, dates)
+    assert result["max_drawdown"] == pytest.approx(50.0)
+    assert (result["max_drawdown_peak_date"], result["max_drawdown_trough_date"]) == ("d1", "d4")
+    assert result["total_return"] == pytest.approx(30.0)
+
+
+def test_insufficient_data_returns_empty():
+    assert metrics.compute_metrics([1.0]) == {}
+    assert metrics.compute_metrics_matrix(np.array([[1.0, np.nan], [2.0, np.nan]]), codes=["a", "b"])["b"] == {}
+
+
+def test_align_prices_outer_joins_and_forward_fills():
+    a = pd.Series([1.0, 2.0, 3.0], index=["2024-01-01", "2024-01-02", "2024-01-03"])
+    b = pd.Series([10.0, 30.0, 31.0], index=["2024-01-02", "2024-01-03", "2024-01-03"])
+
+    aligned = metrics.align_prices({"a": a, "b": b})
+    assert aligned.index.tolist() == ["2024-01-01", "2024-01-02", "2024-01-03"]
+    assert np.isnan(aligned.loc["2024-01-01", "b"])
+    # 重复日期保留最后一条
+    assert aligned.loc["2024-01-03", "b"] == 31.0
+
+
+def test_rebase_starts_each_column_at_base():
+    prices = np.array([[np.nan, 50.0], [10.0, 55.0], [12.0, np.nan]])
+    rebased = metrics.rebase(prices)
+
+    assert np.isnan(rebased[0, 0])
+    assert rebased[1:, 0].tolist() == pytest.approx([100.0, 120.0])
+    assert rebased[:, 1].tolist() == pytest.approx([100.0, 110.0, 110.0])
+
+
+def test_correlation_matches_pandas(series):
+    other = series.shift(1).bfill() * 0.3 + series * 0.7
+    result = metrics.correlation_matrices(np.column_stack([series, other]), ["a", "b"])
+
+    returns = pd.DataFrame({"a": series, "b": other}).pct_change()
+    assert result["correlation"]["a"]["b"] == pytest.approx(returns.corr().loc["a", "b"])
+    assert result["covariance"]["a"]["a"] == pytest.approx(returns["a"].var() * TRADING_DAYS)
@@ -0,0 +1,83 @@
+"""
+代码/名称/拼音首字母搜索的匹配等级和排序
+"""
+import pytest
+
+from app.services.search_index import MAX_PREFIX_LENGTH, SearchIndex
+
+ENTRIES = [
+    {"code": "000300", "name": "沪深300", "pinyin_initials": "hs300"},
+    {"code": "000905", "name": "中证500", "pinyin_initials": "zz500"},
+    {"code": "000852", "name": "中证1000", "pinyin_initials": "zz1000"},
+    {"code": "399300", "name": "沪深300收益", "pinyin_initials": "hs300sy"},
+    {"code": "930050", "name": "中证A50", "pinyin_initials": "zza50"},
+    {"code": "000922", "name": "中证红利", "pinyin_initials": "zzhl"},
+    {"code": "H30269", "name": "红利低波", "pinyin_initials": "hldb"},
+    {"code": "399006", "name": "创业板指", "pinyin_initials": "cybz"},
+]
+
+
+@pytest.fixture
+def index():
+    return SearchIndex(ENTRIES)
+
+
+def codes(results):
+    return [entry["code"] for entry in results]
+
+
+def test_exact_code_ranks_before_code_prefix(index):
+    assert codes(index.search("000300")) == ["000300"]
+    assert codes(index.search("3993")) == ["399300"]
+    # 代码前缀内按名称长度排序
+    assert codes(index.search("0009")) == ["000922", "000905"]
+
+
+def test_exact_name_ranks_before_name_prefix(index):
+    assert codes(index.search("沪深300")) == ["000300", "399300"]
+
+
+def test_name_prefix_orders_shorter_names_first(index):
+    assert codes(index.search("中证")) == ["000922", "000905", "930050", "000852"]
+
+
+def test_pinyin_initials_prefix_is_case_insensitive(index):
+    assert codes(index.search("HS300")) == ["000300", "399300"]
+    assert codes(index.search("cy")) == ["399006"]
+
+
+def test_substring_matches_name_pinyin_and_code_last(index):
+    # "红利" 是"红利低波"的名称前缀，排在"中证红利"（包含）之前
+    assert codes(index.search("红利")) == ["H30269", "000922"]
+    assert codes(index.search("板指")) == ["399006"]
+    assert codes(index.search("h302")) == ["H30269"]
+
+
+def test_code_prefix_ranks_before_substring_match(index):
+    # "930" 是 930050 的代码前缀，也是 399300 代码中间的子串；子串匹配排在前缀匹配之后
+    assert codes(index.search("930")) == ["930050", "399300"]
+    # 没有前缀匹配时，名称/拼音/代码中的子串按名称长度排序
+    assert codes(index.search("300")) == ["000300", "930050", "399300"]
+
+
+def test_limit_and_predicate(index):
+    assert codes(index.search("中证", limit=2)) == ["000922", "000905"]
+    only_sz = index.search("300", predicate=lambda entry: entry["code"].startswith("399"))
+    assert codes(only_sz) == ["399300"]
+
+
+def test_empty_or_unmatched_queries(index):
+    assert index.search("") == []
+    assert index.search("   ") == []
+    assert index.search("不存在") == []
+    assert index.search("中证", limit=0) == []
+    assert SearchIndex().search("000300") == []
+
+
+def test_queries_longer_than_prefix_index_are_filtered():
+    long_name = {"code": "000001", "name": "一二三四五六七八九十", "pinyin_initials": ""}
+    other = {"code": "000002", "name": "一二三四五六七八零", "pinyin_initials": ""}
+    index = SearchIndex([long_name, other])
+
+    query = long_name["name"][:MAX_PREFIX_LENGTH + 1]
+    assert codes(index.search(query)) == ["000001"]
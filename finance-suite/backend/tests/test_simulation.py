@@ -0,0 +1,81 @@
+"""
+蒙特卡洛收益模拟
+"""
+import numpy as np
+import pytest
+
+from app.services import simulation
+from app.services.simulation import TRADING_DAYS_PER_MONTH
+
+
+@pytest.fixture
+def returns():
+    return np.random.default_rng(7).normal(0.0004, 0.012, 750)
+
+
+def test_daily_returns_skip_missing_values():
+    assert simulation.daily_returns([1.0, np.nan, 1.1, 1.21]).tolist() == pytest.approx([0.1, 0.1])
+    assert len(simulation.daily_returns([1.0])) == 0
+
+
+def test_stable_seed_is_deterministic():
+    assert simulation.stable_seed("000001", 1000, 12) == simulation.stable_seed("000001", 1000, 12)
+    assert simulation.stable_seed("000001", 1000, 12) != simulation.stable_seed("000001", 1000, 24)
+
+
+@pytest.mark.parametrize("method", simulation.SIMULATION_METHODS)
+def test_simulated_paths_start_at_one(returns, method):
+    growth = simulation.simulate_growth(returns, 20, 50, method, np.random.default_rng(0))
+
+    assert growth.shape == (50, 21)
+    assert (growth[:, 0] == 1.0).all()
+    assert (growth > 0).all()
+
+
+def test_bootstrap_with_constant_return_is_exact():
+    growth = simulation.simulate_growth(np.full(10, 0.01), 5, 3, "bootstrap", np.random.default_rng(0))
+    assert growth[:, -1] == pytest.approx([1.01 ** 5] * 3)
+
+
+def test_constant_return_projection_for_lump_sum_and_dca():
+    months = 2
+    daily = 0.001
+    lump = simulation.project(np.full(10, daily), 1200.0, months, dca=False, n_paths=10)
+    dca = simulation.project(np.full(10, daily), 1200.0, months, dca=True, n_paths=10)
+
+    days = months * TRADING_DAYS_PER_MONTH
+    assert lump["expected_final_value"] == pytest.approx(1200 * (1 + daily) ** days)
+    # 定投：每月投入600，第二笔少持有一个月
+    expected_dca = 600 * (1 + daily) ** days + 600 * (1 + daily) ** (days - TRADING_DAYS_PER_MONTH)
+    assert dca["expected_final_value"] == pytest.approx(expected_dca)
+    assert lump["probability_of_loss"] == 0.0
+    assert lump["max_drawdown"] == pytest.approx(0.0)
+    assert [s["scenario_name"] for s in lump["scenarios"]] == ["悲观", "中性", "乐观"]
+
+
+def test_projection_is_reproducible_and_chunking_is_consistent(returns):
+    first = simulation.project(returns, 10000.0, 12, n_paths=400, seed=3)
+    again = simulation.project(returns, 10000.0, 12, n_paths=400, seed=3)
+    # 分批生成的路径不同，但期望值应在抽样误差范围内一致
+    chunked = simulation.project(returns, 10000.0, 12, n_paths=400, seed=3,
+                                 max_elements=100 * (12 * TRADING_DAYS_PER_MONTH + 1))
+
+    assert first == again
+    assert chunked["paths"] == 400
+    assert chunked["expected_final_value"] == pytest.approx(first["expected_final_value"], rel=0.05)
+
+
+def test_scenarios_are_ordered(returns):
+    result = simulation.project(returns, 10000.0, 24, n_paths=2000, seed=1)
+    values = [s["final_value"] for s in result["scenarios"]]
+
+    assert values == sorted(values)
+    assert sum(s["probability"] for s in result["scenarios"]) == pytest.approx(1.0)
+    assert 0.0 <= result["probability_of_loss"] <= 1.0
+
+
+def test_calibration_score(returns):
+    score = simulation.calibration_score(returns, n_paths=500, seed=0)
+
+    assert score is not None and 0.0 <= score <= 1.0
+    assert simulation.calibration_score(returns[:40]) is None
@@ -0,0 +1,93 @@
+"""
+请求合并：并发的相同请求只执行一次
+"""
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flight = SingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"value": calls}
+
+        results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(5)))
+        return flight, calls, results
+
+    flight, calls, results = asyncio.run(scenario())
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"inflight": 0, "executed": 1, "shared": 4}
+
+
+def test_different_keys_and_later_calls_execute_again():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch(key):
+            calls.append(key)
+            await asyncio.sleep(0)
+            return key
+
+        await asyncio.gather(flight.do("a", lambda: fetch("a")), flight.do("b", lambda: fetch("b")))
+        await flight.do("a", lambda: fetch("a"))
+        return calls
+
+    assert asyncio.run(scenario()) == ["a", "b", "a"]
+
+
+def test_exception_is_shared_and_key_released():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0)
+            raise RuntimeError("upstream down")
+
+        results = await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+        return flight, results
+
+    flight, results = asyncio.run(scenario())
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+    assert flight.inflight == 0
+
+
+def test_cancelled_caller_does_not_cancel_other_waiters():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            return 42
+
+        first = asyncio.create_task(flight.do("k", fetch))
+        second = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == 42
+
+
+def test_drain_waits_for_inflight_requests():
+    async def scenario():
+        flight = SingleFlight()
+        flight.start("slow", lambda: asyncio.sleep(0.01))
+        flight.start("stuck", lambda: asyncio.sleep(10))
+        pending = await flight.drain(timeout=0.1)
+        return pending
+
+    assert asyncio.run(scenario()) == 1
@@ -0,0 +1,103 @@
+"""
+最新行情/净值只同步本地序列的尾部
+"""
+import asyncio
+import sqlite3
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from app.adapters.akshare_adapter import SERIES_TAIL_WINDOW_DAYS, AKShareAdapter
+from app.adapters.history_store import HistoryStore
+from app.core.cache import TTLCache
+from app.core.executor import BlockingExecutor
+from app.core.singleflight import SingleFlight
+
+TODAY = date.today().isoformat()
+YESTERDAY = (date.today() - timedelta(days=1)).isoformat()
+
+
+def bars(dates, start=100.0):
+    closes = [start + i for i in range(len(dates))]
+    return pd.DataFrame({
+        "date": dates, "open": closes, "close": closes, "high": closes, "low": closes,
+        "volume": [1.0] * len(dates), "amount": [1.0] * len(dates),
+    })
+
+
+class RecordingAdapter(AKShareAdapter):
+    """上游替换为内存数据，记录请求的日期区间"""
+
+    def __init__(self, path: str):
+        super().__init__(cache=TTLCache(max_size=100, default_ttl=60), flight=SingleFlight(),
+                         history=HistoryStore(path), executor=BlockingExecutor(4, {}))
+        self.requests = []
+        self.upstream = bars([YESTERDAY, TODAY])
+        self.fail = False
+
+    async def _fetch_series(self, kind, code, start_date, end_date, family):
+        self.requests.append((kind, code, start_date, end_date))
+        if self.fail:
+            raise RuntimeError("upstream down")
+        df = self.upstream
+        return df[(df["date"] >= start_date) & (df["date"] <= end_date)]
+
+
+@pytest.fixture
+def adapter(tmp_path):
+    return RecordingAdapter(str(tmp_path / "history.db"))
+
+
+def age_series(adapter, seconds):
+    with sqlite3.connect(adapter.history.path) as conn:
+        conn.execute("UPDATE series_meta SET synced_at = synced_at - ?", (seconds,))
+
+
+def test_empty_store_downloads_only_recent_window(adapter):
+    quote = asyncio.run(adapter.get_index_realtime("000300"))
+
+    window_start = (date.today() - timedelta(days=SERIES_TAIL_WINDOW_DAYS)).isoformat()
+    assert adapter.requests == [("index_daily", "000300", window_start, TODAY)]
+    assert quote["current"] == 101.0
+    assert quote["change"] == 1.0
+    assert quote["stale"] is False
+
+
+def test_fresh_series_skips_upstream(adapter):
+    adapter.history.write("index_daily", "000300", bars([YESTERDAY, TODAY]), YESTERDAY, TODAY)
+
+    synced, synced_at = asyncio.run(adapter._sync_tail("index_daily", "000300", max_age=60))
+    assert synced and synced_at is not None
+    assert adapter.requests == []
+
+
+def test_expired_series_fetches_from_last_bar(adapter):
+    adapter.history.write("index_daily", "000300", bars([YESTERDAY]), "2020-01-01", YESTERDAY)
+
+    synced, _ = asyncio.run(adapter._sync_tail("index_daily", "000300", max_age=60))
+    assert synced
+    assert adapter.requests == [("index_daily", "000300", YESTERDAY, TODAY)]
+    assert adapter.history.read_tail("index_daily", "000300", 1)["date"].tolist() == [TODAY]
+
+
+def test_published_fund_nav_is_not_refetched(adapter):
+    nav = pd.DataFrame({"date": [TODAY], "unit_net_value": [1.5]})
+    adapter.history.write("fund_nav", "000001", nav, "2020-01-01", TODAY)
+    age_series(adapter, 3600)
+
+    synced, _ = asyncio.run(adapter._sync_tail("fund_nav", "000001", max_age=60))
+    assert synced
+    assert adapter.requests == []
+
+
+def test_upstream_failure_marks_quote_stale_with_last_sync_time(adapter):
+    adapter.history.write("index_daily", "000300", bars([YESTERDAY]), "2020-01-01", YESTERDAY)
+    age_series(adapter, 3600)
+    last_sync = adapter.history.coverage("index_daily", "000300").synced_at
+    adapter.fail = True
+
+    quote = asyncio.run(adapter.get_index_realtime("000300"))
+    assert quote["stale"] is True
+    assert quote["date"] == YESTERDAY
+    assert quote["last_update"] == datetime.fromtimestamp(last_sync).isoformat()